@@ -0,0 +1,129 @@
+"""
+Load test of the Monegros query service with concurrent keep-alive clients.
+
+Usage:
+    python benchmarks/load_test.py                          # in-process service
+    python benchmarks/load_test.py --clients 50 --requests 20000
+    python benchmarks/load_test.py --url http://127.0.0.1:8080
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from urllib.parse import quote, urlsplit
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from monegros.utils.logger import Logger
+
+
+async def get(reader, writer, host, path):
+    """Sends one GET over a keep-alive connection and returns (status, body)"""
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode('latin-1'))
+    await writer.drain()
+    head = (await reader.readuntil(b'\r\n\r\n')).decode('latin-1').split('\r\n')
+    length = next(int(line.split(':', 1)[1]) for line in head if line.lower().startswith('content-length'))
+    return int(head[0].split(' ')[1]), await reader.readexactly(length)
+
+
+async def discover_paths(host, port):
+    """Builds the query mix from the data the service holds"""
+    reader, writer = await asyncio.open_connection(host, port)
+    _, body = await get(reader, writer, host, '/clubs?limit=50')
+    clubs = [club['club'] for club in json.loads(body)]
+    dorsals = []
+    for club in clubs[:20]:
+        _, body = await get(reader, writer, host, f"/clubs/{quote(club)}?limit=50")
+        dorsals += [rider['dorsal'] for rider in json.loads(body)['riders']]
+    writer.close()
+    return {
+        'rider': [f"/riders/{dorsal}" for dorsal in dorsals],
+        'club': [f"/clubs/{quote(club)}" for club in clubs],
+        'clubs': ['/clubs?limit=10'],
+        'histogram': ['/histogram'],
+        'position': [f"/position?seconds={seconds}" for seconds in range(3 * 3600, 15 * 3600, 97)],
+    }
+
+
+async def client(host, port, paths, n_requests, latencies, errors, seed):
+    """Sends n_requests random queries over one connection, recording latencies"""
+    rng = random.Random(seed)
+    kinds = list(paths)
+    reader, writer = await asyncio.open_connection(host, port)
+    for _ in range(n_requests):
+        kind = rng.choice(kinds)
+        start = time.perf_counter()
+        status, _ = await get(reader, writer, host, rng.choice(paths[kind]))
+        latencies[kind].append(time.perf_counter() - start)
+        if status != 200:
+            errors[kind] += 1
+    writer.close()
+
+
+async def run_load(host, port, clients, requests, seed):
+    """
+    Runs the load test against a running service.
+
+    Returns:
+        tuple: (latencies by query kind in seconds, errors by kind, wall seconds)
+    """
+    paths = await discover_paths(host, port)
+    latencies = {kind: [] for kind in paths}
+    errors = {kind: 0 for kind in paths}
+    per_client = [requests // clients + (i < requests % clients) for i in range(clients)]
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, paths, n, latencies, errors, seed + i)
+                           for i, n in enumerate(per_client)))
+    return latencies, errors, time.perf_counter() - start
+
+
+def print_report(latencies, errors, elapsed):
+    print(f"\n{'query':<10} {'count':>7} {'errors':>6} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    rows = list(latencies.items()) + [('all', [value for values in latencies.values() for value in values])]
+    for kind, values in rows:
+        if not values:
+            continue
+        p50, p90, p99 = np.percentile(np.array(values) * 1000, [50, 90, 99])
+        failed = errors.get(kind, sum(errors.values()))
+        print(f"{kind:<10} {len(values):>7} {failed:>6} {p50:>8.2f} {p90:>8.2f} {p99:>8.2f} {max(values) * 1000:>8.2f}")
+    total = len(rows[-1][1])
+    print(f"\n{total} requests in {elapsed:.2f}s: {total / elapsed:,.0f} req/s")
+
+
+async def main_async(args):
+    if args.url:
+        url = urlsplit(args.url)
+        return await run_load(url.hostname, url.port or 80, args.clients, args.requests, args.seed)
+
+    from monegros.src.service import QueryService, build_index
+
+    print("Building the index...")
+    service = QueryService(build_index(), port=0)
+    await service.start()
+    try:
+        return await run_load(service.host, service.port, args.clients, args.requests, args.seed)
+    finally:
+        await service.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Monegros query service load test')
+    parser.add_argument('--url', type=str, help='Running service; an in-process one is started if omitted')
+    parser.add_argument('--clients', type=int, default=20, help='Concurrent keep-alive connections')
+    parser.add_argument('--requests', type=int, default=5000, help='Total number of requests')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    Logger.configure(level='WARNING')
+
+    latencies, errors, elapsed = asyncio.run(main_async(args))
+    print_report(latencies, errors, elapsed)
+    return 1 if sum(errors.values()) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,173 @@
+"""
+Throughput benchmarks of the Monegros analysis stages on synthetic data.
+
+Every stage calls the public entry point of its exercise
+(load_and_analyze_data, anonymize_and_clean_data, create_time_histogram,
+analyze_clubs and analyze_ucsc), in pipeline order.
+
+Usage:
+    python benchmarks/run_benchmarks.py --sizes 10k 1M
+    python benchmarks/run_benchmarks.py --sizes 10k 1M --save-baseline
+    python benchmarks/run_benchmarks.py --sizes 10M --no-memory
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from monegros.src.ex1_data import DataLoader
+from monegros.src.ex2_anonymize import DataAnonymizer
+from monegros.src.ex3_histogram import TimeHistogram
+from monegros.src.ex4_clubs import ClubAnalyzer
+from monegros.src.ex5_ucsc import UCSCAnalyzer
+from monegros.src.synthetic import SIZES, write_race_csv
+from monegros.utils.logger import Logger
+
+BASELINE_PATH = Path(__file__).parent / 'baseline.json'
+
+
+def stage_load(state):
+    state['df'] = DataLoader(state['path']).load_and_analyze_data()
+
+
+def stage_anonymize(state):
+    state['df'] = DataAnonymizer().anonymize_and_clean_data(state['df'])
+
+
+def stage_histogram(state):
+    histogram = TimeHistogram()
+    # Keep the package image untouched
+    histogram.img_path = state['path'].with_name(f"{state['path'].stem}_histograma.png")
+    # Always draw: an unchanged histogram would otherwise be skipped on later runs
+    histogram.img_path.with_name(histogram.img_path.name + '.sha256').unlink(missing_ok=True)
+    state['df'] = histogram.create_time_histogram(state['df'])
+
+
+def stage_clubs(state):
+    state['df'] = ClubAnalyzer().analyze_clubs(state['df'])
+
+
+def stage_ucsc(state):
+    state['ucsc'] = UCSCAnalyzer().analyze_ucsc(state['df'])
+
+
+STAGES = [
+    ('load', stage_load),
+    ('anonymize', stage_anonymize),
+    ('histogram', stage_histogram),
+    ('clubs', stage_clubs),
+    ('ucsc', stage_ucsc),
+]
+
+
+def dataset_path(size, seed, data_dir):
+    """Generates the synthetic dataset of a size once and reuses it"""
+    data_dir.mkdir(parents=True, exist_ok=True)
+    path = data_dir / f"race_{size}_{seed}.csv"
+    if not path.exists():
+        print(f"Generating {size} rows into {path}...")
+        write_race_csv(path, SIZES[size], seed=seed)
+    return path
+
+
+def run_stages(path, memory):
+    """
+    Runs every stage once on the file, in order.
+
+    Args:
+        path (Path): Synthetic dataset
+        memory (bool): Measure peak memory with tracemalloc (slower)
+
+    Returns:
+        dict: seconds (and peak_mb) per stage
+    """
+    state = {'path': path}
+    results = {}
+    for name, stage in STAGES:
+        if memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        stage(state)
+        elapsed = time.perf_counter() - start
+        results[name] = {'seconds': elapsed}
+        if memory:
+            results[name]['peak_mb'] = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+            tracemalloc.stop()
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compares stage times against the baseline.
+
+    Returns:
+        list: (size, stage, seconds, baseline seconds) of the regressions
+    """
+    regressions = []
+    for size, stages in results.items():
+        for name, metrics in stages.items():
+            reference = baseline.get(size, {}).get(name)
+            if reference and metrics['seconds'] > reference['seconds'] * (1 + tolerance):
+                regressions.append((size, name, metrics['seconds'], reference['seconds']))
+    return regressions
+
+
+def print_table(results, baseline):
+    print(f"\n{'size':>5} {'stage':<10} {'seconds':>9} {'rows/s':>12} {'peak MB':>9} {'vs base':>8}")
+    for size, stages in results.items():
+        for name, metrics in stages.items():
+            reference = baseline.get(size, {}).get(name)
+            ratio = f"{metrics['seconds'] / reference['seconds']:.2f}x" if reference else '-'
+            peak = f"{metrics['peak_mb']:.1f}" if 'peak_mb' in metrics else '-'
+            rate = SIZES[size] / metrics['seconds'] if metrics['seconds'] else float('inf')
+            print(f"{size:>5} {name:<10} {metrics['seconds']:>9.3f} {rate:>12,.0f} {peak:>9} {ratio:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Monegros stage benchmarks')
+    parser.add_argument('--sizes', nargs='+', choices=list(SIZES), default=['10k', '1M'])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--data-dir', type=Path, default=Path(tempfile.gettempdir()) / 'monegros_bench')
+    parser.add_argument('--no-memory', action='store_true', help='Skip the tracemalloc pass')
+    parser.add_argument('--baseline', type=Path, default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help='Store these results as the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed slowdown before flagging')
+    parser.add_argument('--output', type=Path, help='Write the results as JSON')
+    args = parser.parse_args()
+    # Time the analyzers, not their dataframe previews
+    Logger.configure(level='WARNING', buffered=False)
+
+    results = {}
+    for size in args.sizes:
+        path = dataset_path(size, args.seed, args.data_dir)
+        print(f"Benchmarking {size}...")
+        results[size] = run_stages(path, memory=False)
+        if not args.no_memory:
+            # Separate pass: tracemalloc slows down the Python-level code
+            for name, metrics in run_stages(path, memory=True).items():
+                results[size][name]['peak_mb'] = metrics['peak_mb']
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    print_table(results, baseline)
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+    if args.save_baseline:
+        baseline.update(results)
+        args.baseline.write_text(json.dumps(baseline, indent=2) + '\n')
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    for size, name, seconds, reference in regressions:
+        print(f"REGRESSION {size} {name}: {seconds:.3f}s vs {reference:.3f}s baseline")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,46 +1,347 @@
 import argparse
-from monegros.src.ex1_data import DataLoader
-from monegros.src.ex2_anonymize import DataAnonymizer
-from monegros.src.ex3_histogram import TimeHistogram
-from monegros.src.ex4_clubs import ClubAnalyzer
-from monegros.src.ex5_ucsc import UCSCAnalyzer
+from pathlib import Path
+from monegros.utils.logger import Logger, metrics
 
-def main(exercise=None):
+# The analysis modules are imported inside main() and batch_main(): pandas,
+# faker and matplotlib are only loaded when a stage that needs them runs,
+# and not at all for --help or argument errors.
+
+EXERCISE_STAGES = {'1': 'load', '2': 'anonymize', '3': 'histogram', '4': 'clubs', '5': 'ucsc'}
+
+def main(exercise=None, engine='c', use_cache=True, clear_cache=False, bin_minutes=20,
+         pseudonym_key=None, stage_workers=1, club='UCSC', histogram_format='png', club_mapping=None,
+         validation='raise'):
     """
     Main function to run the Orbea Monegros 2024 data analysis
     """
+    from monegros.src.ex1_data import DataLoader
+    from monegros.src.ex2_anonymize import DataAnonymizer
+    from monegros.src.ex3_histogram import TimeHistogram
+    from monegros.src.ex4_clubs import ClubAnalyzer
+    from monegros.src.ex5_ucsc import UCSCAnalyzer
+    from monegros.src.club_dedup import load_mapping
+    from monegros.src.pipeline import build_pipeline
+    from monegros.src.validation import DataValidator
+
     # Initialize classes
-    loader = DataLoader()
-    anonymizer = DataAnonymizer()
-    histogram = TimeHistogram()
-    club_analyzer = ClubAnalyzer()
+    loader = DataLoader(engine=engine, use_cache=use_cache,
+                        validator=DataValidator(validation) if validation else None)
+    if clear_cache:
+        loader.clear_cache()
+    anonymizer = DataAnonymizer(mode='hash', key=pseudonym_key) if pseudonym_key else DataAnonymizer()
+    histogram = TimeHistogram(output_format=histogram_format)
+    club_analyzer = ClubAnalyzer(load_mapping(club_mapping) if club_mapping else None)
     ucsc_analyzer = UCSCAnalyzer()
-    
-    # Load initial data
-    if exercise is None or exercise == '1':
-        print("\n=== Exercise 1: Data Loading and EDA ===")
-        df = loader.load_and_analyze_data()
-        
-    if exercise is None or exercise == '2':
-        print("\n=== Exercise 2: Data Anonymization and Cleaning ===")
-        df = anonymizer.anonymize_and_clean_data(df)
-        
-    if exercise is None or exercise == '3':
-        print("\n=== Exercise 3: Time Histogram ===")
-        df = histogram.create_time_histogram(df)
-        
-    if exercise is None or exercise == '4':
-        print("\n=== Exercise 4: Cycling Clubs Analysis ===")
-        df = club_analyzer.analyze_clubs(df)
-        
-    if exercise is None or exercise == '5':
-        print("\n=== Exercise 5: UCSC Analysis ===")
-        ucsc_analyzer.analyze_ucsc(df)
+
+    pipeline = build_pipeline(loader, anonymizer, histogram, club_analyzer, ucsc_analyzer,
+                              bin_minutes=bin_minutes, club=club, max_workers=stage_workers)
+
+    # Each exercise only runs the stages it depends on
+    targets = None if exercise is None else [EXERCISE_STAGES[exercise]]
+    results = pipeline.run(targets)
+
+    logger = Logger("Main")
+    logger.preview("\n=== Stage metrics ===")
+    logger.preview(metrics.summary)
+    Logger.flush()
+    return results
+
+def batch_main(inputs, jobs=1, output_dir=None, **options):
+    """
+    Runs the analysis on several race files and merges the results by edition
+    """
+    from monegros.src.batch import run_batch
+
+    combined = run_batch(inputs, jobs=jobs, img_dir=output_dir, **options)
+
+    logger = Logger("Main")
+    logger.preview("\n=== Club ranking by edition ===")
+    logger.preview(combined['ranking'])
+
+    if output_dir is not None:
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        for name, frame in combined.items():
+            frame.to_csv(output_dir / f"{name}.csv", sep=";", index=False)
+        logger.info(f"Combined results written to {output_dir}")
+    Logger.flush()
+    return combined
+
+def chunked_main(inputs=None, chunk_rows=500_000, output_dir=None, bin_minutes=20, club='UCSC',
+                 pseudonym_key=None, histogram_format='png', club_mapping=None):
+    """
+    Analyzes one or more race files in bounded-size chunks, for inputs larger than memory
+    """
+    from monegros.src.batch import edition_names, expand_inputs
+    from monegros.src.chunked import ChunkedPipeline
+    from monegros.src.club_dedup import load_mapping
+    from monegros.src.ex1_data import DataLoader
+    from monegros.src.ex2_anonymize import DataAnonymizer
+    from monegros.src.ex3_histogram import TimeHistogram
+    from monegros.src.ex4_clubs import ClubAnalyzer
+
+    paths = expand_inputs(inputs) if inputs else [DataLoader().data_path]
+    histogram = TimeHistogram(output_format=histogram_format)
+    pipeline = ChunkedPipeline(
+        DataAnonymizer(mode='hash', key=pseudonym_key) if pseudonym_key else DataAnonymizer(),
+        ClubAnalyzer(load_mapping(club_mapping) if club_mapping else None),
+        bin_minutes=bin_minutes, club=club, chunk_rows=chunk_rows,
+    )
+
+    img_dir = Path(output_dir) if output_dir is not None else histogram.img_path.parent
+    img_dir.mkdir(parents=True, exist_ok=True)
+
+    logger = Logger("Main")
+    results = {}
+    for path, edition in zip(paths, edition_names(paths)):
+        results[edition] = pipeline.run(path)
+        tag = edition.replace('/', '_')
+        # The package dataset keeps the usual histogram path
+        img_path = histogram.img_path if not inputs else img_dir / f"histograma_{tag}.png"
+        if output_dir is not None:
+            img_path = img_dir / img_path.name
+            for key in ('histogram', 'clubs', 'leaders'):
+                results[edition][key].to_csv(img_dir / f"{tag}_{key}.csv", sep=";", index=False)
+        img_path, _ = histogram.renderer.render(results[edition]['histogram'], img_path, histogram_format)
+        logger.info(f"Histogram saved to {img_path}")
+    Logger.flush()
+    return results
+
+def facets_main(facet='club', inputs=None, jobs=1, output_dir=None, grid_columns=0, min_count=1,
+                bin_minutes=20, histogram_format='png', engine='c', use_cache=True, club_mapping=None):
+    """
+    Renders one finish-time histogram per club or per edition
+    """
+    from monegros.src.ex3_histogram import TimeHistogram
+
+    if inputs:
+        from monegros.src.batch import run_batch
+        riders = run_batch(inputs, jobs=jobs, engine=engine, use_cache=use_cache, bin_minutes=bin_minutes,
+                           histogram_format=histogram_format, club_mapping=club_mapping,
+                           img_dir=output_dir)['riders']
+    else:
+        if facet == 'edition':
+            raise ValueError("Edition facets need several --input files")
+        from monegros.src.ex1_data import DataLoader
+        from monegros.src.ex2_anonymize import DataAnonymizer
+        from monegros.src.ex4_clubs import ClubAnalyzer
+        from monegros.src.ex5_ucsc import UCSCAnalyzer
+        from monegros.src.club_dedup import load_mapping
+        from monegros.src.pipeline import build_pipeline
+
+        pipeline = build_pipeline(DataLoader(engine=engine, use_cache=use_cache), DataAnonymizer(),
+                                  TimeHistogram(output_format=histogram_format),
+                                  ClubAnalyzer(load_mapping(club_mapping) if club_mapping else None),
+                                  UCSCAnalyzer(), bin_minutes=bin_minutes)
+        riders = pipeline.run(['clubs'])['clubs']
+
+    histogram = TimeHistogram(output_format=histogram_format)
+    facets = histogram.render_facets(riders, 'club_clean' if facet == 'club' else 'edition', bin_minutes,
+                                     output_dir=output_dir, min_count=min_count, grid_columns=grid_columns,
+                                     jobs=jobs)
+    logger = Logger("Main")
+    logger.info(f"{int(facets['rendered'].sum())} of {facets['path'].nunique()} facet histograms "
+                f"written to {Path(facets['path'].iloc[0]).parent if len(facets) else output_dir}")
+    Logger.flush()
+    return facets
+
+def splits_main(path, layout=None, distances=None, output_dir=None, bin_minutes=20, histogram_format='png',
+                min_count=1):
+    """
+    Analyzes checkpoint split times: segment durations, paces, ranks, gaps and per-checkpoint histograms
+    """
+    from monegros.src.ex1_data import DataLoader
+    from monegros.src.ex3_histogram import TimeHistogram
+    from monegros.src.splits import SplitAnalyzer
+
+    splits = DataLoader(path).load_splits(layout, distances=distances)
+    histogram = TimeHistogram(output_format=histogram_format)
+    results = SplitAnalyzer(histogram).analyze_splits(splits, bin_minutes)
+
+    logger = Logger("Main")
+    if output_dir is not None:
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        for key, frame in results.items():
+            frame.to_csv(output_dir / f"splits_{key}.csv", sep=";", index=False)
+        logger.info(f"Split results written to {output_dir}")
+    if histogram_format in ('png', 'svg'):
+        facets = histogram.render_facets(splits.to_long(), 'checkpoint', bin_minutes, output_dir=output_dir,
+                                         min_count=min_count)
+        logger.info(f"{int(facets['rendered'].sum())} of {len(facets)} checkpoint histograms rendered")
+    Logger.flush()
+    return results
+
+def dedup_main(output, threshold=0.85, engine='c', use_cache=True):
+    """
+    Clusters the club name variants of the dataset and writes the mapping for review
+    """
+    from monegros.src.ex1_data import DataLoader
+    from monegros.src.ex4_clubs import ClubAnalyzer
+    from monegros.src.club_dedup import ClubDeduplicator, save_mapping
+
+    df = DataLoader(engine=engine, use_cache=use_cache).load_data()
+    mapping = ClubDeduplicator(threshold=threshold).deduplicate(ClubAnalyzer().clean_clubs(df['club']))
+    save_mapping(mapping, output)
+
+    logger = Logger("Main")
+    logger.preview(mapping[mapping['club'] != mapping['canonical']])
+    logger.info(f"Club mapping written to {output}; review it and pass it with --club-mapping")
+    Logger.flush()
+    return mapping
+
+def serve_main(host='127.0.0.1', port=8080, engine='c', use_cache=True, bin_minutes=20, club='UCSC',
+               pseudonym_key=None, club_mapping=None, validation='raise'):
+    """
+    Analyzes the dataset once and serves the results over HTTP
+    """
+    import asyncio
+    from monegros.src.club_dedup import load_mapping
+    from monegros.src.service import QueryService, build_index
+    from monegros.src.validation import DataValidator
+
+    index = build_index(engine=engine, use_cache=use_cache, bin_minutes=bin_minutes, club=club,
+                        pseudonym_key=pseudonym_key,
+                        canonical_names=load_mapping(club_mapping) if club_mapping else None,
+                        validator=DataValidator(validation) if validation else None)
+    service = QueryService(index, host=host, port=port)
+    Logger.flush()
+    try:
+        asyncio.run(service.serve_forever())
+    except KeyboardInterrupt:
+        Logger("Main").info("Query service stopped")
+
+def live_main(path, bin_minutes=20, snapshot_interval=60.0, follow=True):
+    """
+    Follows a growing results file and prints race snapshots
+    """
+    from monegros.src.streaming import LiveRace, follow_race
+
+    logger = Logger("Main")
+
+    def publish(snapshot):
+        logger.info("Finishers: %d (non-finishers: %d, rejected: %d)",
+                    snapshot['finishers'], snapshot['non_finishers'], snapshot['rejected'])
+        logger.preview(snapshot['histogram'])
+        logger.preview(snapshot['clubs'])
+        Logger.flush()
+
+    try:
+        return follow_race(path, LiveRace(bin_minutes), snapshot_interval=snapshot_interval,
+                           on_snapshot=publish, follow=follow)
+    except KeyboardInterrupt:
+        logger.info("Stopped following the results file")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Orbea Monegros 2024 Data Analysis')
     parser.add_argument('--exercise', type=str, choices=['1', '2', '3', '4', '5'],
                       help='Specific exercise to run (1-5)')
+    parser.add_argument('--engine', type=str, choices=['c', 'pyarrow'], default='c',
+                      help='CSV parser engine (pyarrow requires the pyarrow package)')
+    parser.add_argument('--no-cache', action='store_true',
+                      help='Parse the CSV even if a valid cache exists')
+    parser.add_argument('--clear-cache', action='store_true',
+                      help='Remove the cached dataset before running')
+    parser.add_argument('--bin-minutes', type=int, default=20,
+                      help='Width of the histogram intervals in minutes')
+    parser.add_argument('--pseudonym-key', type=str,
+                      help='Secret key for stable, hash-based pseudonyms (by dorsal)')
+    parser.add_argument('--stage-workers', type=int, default=1,
+                      help='Number of independent stages (histogram, clubs) run concurrently')
+    parser.add_argument('--club', type=str, default='UCSC',
+                      help='Cleaned club name analyzed in exercise 5')
+    parser.add_argument('--input', type=str, nargs='+',
+                      help='Race CSV files, directories or glob patterns to analyze in batch')
+    parser.add_argument('--jobs', type=int, default=1,
+                      help='Number of files processed in parallel in batch mode')
+    parser.add_argument('--output-dir', type=str,
+                      help='Directory for the combined batch results and histograms')
+    parser.add_argument('--metrics', type=str,
+                      help='Write per-stage metrics as JSON lines to this file')
+    parser.add_argument('--trace-memory', action='store_true',
+                      help='Measure the peak memory of every stage with tracemalloc')
+    parser.add_argument('--profile-dir', type=str,
+                      help='Write a cProfile dump per stage to this directory')
+    parser.add_argument('--log-level', type=str, default='INFO', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                      help='Minimum level of the log messages and dataframe previews')
+    parser.add_argument('--log-sync', action='store_true',
+                      help='Write log lines synchronously instead of from a background thread')
+    parser.add_argument('--histogram-format', type=str, default='png', choices=['png', 'svg', 'csv', 'json'],
+                      help='Histogram output: a png/svg plot or the csv/json counts only')
+    parser.add_argument('--dedup-clubs', type=str,
+                      help='Cluster club name variants and write the canonical name mapping to this CSV')
+    parser.add_argument('--dedup-threshold', type=float, default=0.85,
+                      help='Minimum n-gram similarity to merge two club names')
+    parser.add_argument('--club-mapping', type=str,
+                      help='Reviewed club mapping CSV applied after cleaning the club names')
+    parser.add_argument('--serve', action='store_true',
+                      help='Serve rider, club, histogram and position queries over HTTP')
+    parser.add_argument('--host', type=str, default='127.0.0.1',
+                      help='Interface the query service listens on')
+    parser.add_argument('--port', type=int, default=8080,
+                      help='Port the query service listens on')
+    parser.add_argument('--validation', type=str, choices=['raise', 'drop', 'quarantine', 'off'],
+                      help='Invalid rows: report and stop (default), drop them, write them to '
+                           '<file>.quarantine.csv and drop them, or skip the validation')
+    parser.add_argument('--chunk-rows', type=int,
+                      help='Analyze the input in chunks of this many rows, with constant memory '
+                           '(C parser, without validation)')
+    parser.add_argument('--facet', type=str, choices=['club', 'edition'],
+                      help='Render one histogram per club or per edition (--input), on --jobs processes')
+    parser.add_argument('--facet-grid', type=int, default=0,
+                      help='Draw the facets as small multiples with this many columns')
+    parser.add_argument('--facet-min', type=int, default=1,
+                      help='Skip facets with fewer finishers')
+    parser.add_argument('--splits', type=str,
+                      help='Analyze a checkpoint split-time CSV (wide or long layout)')
+    parser.add_argument('--splits-layout', type=str, choices=['wide', 'long'],
+                      help="Layout of the split file, detected from its header by default")
+    parser.add_argument('--distances', type=float, nargs='+',
+                      help='Distance in km of every checkpoint, in course order, for the paces')
+    parser.add_argument('--live', type=str,
+                      help='Follow a growing CSV/JSONL results file and print periodic snapshots')
+    parser.add_argument('--snapshot-interval', type=float, default=60.0,
+                      help='Seconds between live snapshots')
     args = parser.parse_args()
+    Logger.configure(level=args.log_level, buffered=not args.log_sync)
+    validation = None if args.validation == 'off' else args.validation or 'raise'
+    metrics.configure(trace_memory=args.trace_memory, profile_dir=args.profile_dir)
     
-    main(args.exercise)
\ No newline at end of file
+    if args.live:
+        live_main(args.live, bin_minutes=args.bin_minutes, snapshot_interval=args.snapshot_interval)
+    elif args.serve:
+        serve_main(args.host, args.port, engine=args.engine, use_cache=not args.no_cache,
+                   bin_minutes=args.bin_minutes, club=args.club, pseudonym_key=args.pseudonym_key,
+                   club_mapping=args.club_mapping, validation=validation)
+    elif args.splits:
+        splits_main(args.splits, args.splits_layout, args.distances, output_dir=args.output_dir,
+                    bin_minutes=args.bin_minutes, histogram_format=args.histogram_format,
+                    min_count=args.facet_min)
+    elif args.facet:
+        facets_main(args.facet, args.input, jobs=args.jobs, output_dir=args.output_dir,
+                    grid_columns=args.facet_grid, min_count=args.facet_min, bin_minutes=args.bin_minutes,
+                    histogram_format=args.histogram_format, engine=args.engine,
+                    use_cache=not args.no_cache, club_mapping=args.club_mapping)
+    elif args.chunk_rows:
+        if args.validation is not None or args.engine != 'c':
+            parser.error("--chunk-rows reads the input with the C parser and does not validate it; "
+                         "--validation and --engine pyarrow are not supported")
+        chunked_main(args.input, chunk_rows=args.chunk_rows, output_dir=args.output_dir,
+                     bin_minutes=args.bin_minutes, club=args.club, pseudonym_key=args.pseudonym_key,
+                     histogram_format=args.histogram_format, club_mapping=args.club_mapping)
+    elif args.dedup_clubs:
+        dedup_main(args.dedup_clubs, threshold=args.dedup_threshold, engine=args.engine,
+                   use_cache=not args.no_cache)
+    elif args.input:
+        batch_main(args.input, jobs=args.jobs, output_dir=args.output_dir, engine=args.engine,
+                   use_cache=not args.no_cache, bin_minutes=args.bin_minutes,
+                   club=args.club, pseudonym_key=args.pseudonym_key,
+                   histogram_format=args.histogram_format, club_mapping=args.club_mapping,
+                   validation=validation)
+    else:
+        main(args.exercise, args.engine, not args.no_cache, args.clear_cache, args.bin_minutes,
+             args.pseudonym_key, args.stage_workers, args.club, args.histogram_format, args.club_mapping,
+             validation)
+
+    if args.metrics:
+        metrics.write_json_lines(args.metrics)
\ No newline at end of file
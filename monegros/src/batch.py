@@ -0,0 +1,152 @@
+import glob
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import pandas as pd
+from monegros.src.ex1_data import DataLoader
+from monegros.src.ex2_anonymize import DataAnonymizer
+from monegros.src.ex3_histogram import TimeHistogram
+from monegros.src.ex4_clubs import ClubAnalyzer
+from monegros.src.club_dedup import load_mapping
+from monegros.src.ex5_ucsc import UCSCAnalyzer
+from monegros.src.pipeline import build_pipeline
+from monegros.src.sketch import KLLSketch
+from monegros.src.validation import DataValidator
+from monegros.utils.logger import Logger
+from monegros.utils.times import frame_seconds
+
+def expand_inputs(patterns):
+    """
+    Expands a list of paths and glob patterns into CSV files.
+
+    Args:
+        patterns (list): File paths, directories or glob patterns
+
+    Returns:
+        list: Sorted, de-duplicated file paths
+
+    Raises:
+        FileNotFoundError: If a pattern matches no file
+    """
+    paths = []
+    for pattern in patterns:
+        if Path(pattern).is_dir():
+            matches = sorted(Path(pattern).glob('*.csv'))
+        else:
+            matches = sorted(Path(match) for match in glob.glob(str(pattern)))
+        if not matches:
+            raise FileNotFoundError(f"No input files match '{pattern}'")
+        paths.extend(matches)
+    return sorted(set(paths))
+
+def edition_names(paths):
+    """
+    Derives an edition tag for every file from its name.
+
+    The file stem is used ('monegros_2023.csv' -> 'monegros_2023'). Files
+    with the same stem are told apart by their parent directory.
+
+    Args:
+        paths (list): Input file paths
+
+    Returns:
+        list: One edition tag per path
+    """
+    stems = [Path(path).stem for path in paths]
+    return [f"{Path(path).parent.name}/{stem}" if stems.count(stem) > 1 else stem
+            for path, stem in zip(paths, stems)]
+
+def analyze_file(path, edition, options):
+    """
+    Runs the whole pipeline on one file.
+
+    Runs in a worker process, so it only receives and returns picklable values.
+
+    Args:
+        path (Path): CSV file to analyze
+        edition (str): Edition tag of the file
+        options (dict): engine, use_cache, bin_minutes, club, pseudonym_key,
+            histogram_format, club_mapping (reviewed mapping CSV), validation
+            (policy for invalid rows, not validated if None) and img_dir
+            (default: the package img directory)
+
+    Returns:
+        dict: riders, histogram and clubs (per-club statistics) dataframes,
+        the club ranking (position_info) and the serialized KLL sketch of
+        the finish times of the edition
+    """
+    histogram = TimeHistogram(output_format=options.get('histogram_format', 'png'))
+    img_dir = Path(options['img_dir']) if options.get('img_dir') is not None else histogram.img_path.parent
+    histogram.img_path = img_dir / f"histograma_{edition.replace('/', '_')}.png"
+
+    pseudonym_key = options.get('pseudonym_key')
+    club_mapping = options.get('club_mapping')
+    validation = options.get('validation')
+    pipeline = build_pipeline(
+        DataLoader(path, engine=options.get('engine', 'c'), use_cache=options.get('use_cache', False),
+                   validator=DataValidator(validation) if validation else None),
+        DataAnonymizer(mode='hash', key=pseudonym_key) if pseudonym_key else DataAnonymizer(),
+        histogram,
+        ClubAnalyzer(load_mapping(club_mapping) if club_mapping else None),
+        UCSCAnalyzer(),
+        bin_minutes=options.get('bin_minutes', 20),
+        club=options.get('club', 'UCSC'),
+    )
+    results = pipeline.run()
+
+    riders = results['clubs'].copy(deep=False)
+    riders['time_grouped'] = results['histogram']['time_grouped']
+    _, _, position_info = results['ucsc']
+
+    return {
+        'riders': riders,
+        'histogram': histogram.time_frequencies(riders, options.get('bin_minutes', 20)),
+        'clubs': ClubAnalyzer().club_statistics(riders),
+        'ranking': dict(position_info or {}, club=options.get('club', 'UCSC')),
+        'sketch': KLLSketch(options.get('sketch_k', 200), seed=0).update(frame_seconds(riders)).to_bytes(),
+    }
+
+def run_batch(patterns, jobs=1, **options):
+    """
+    Runs the pipeline on several race files, one process per file.
+
+    Args:
+        patterns (list): File paths, directories or glob patterns
+        jobs (int): Number of worker processes
+        **options: Options forwarded to analyze_file
+
+    Returns:
+        dict: Combined riders, histogram, clubs, ranking and percentiles
+        dataframes, each with a leading 'edition' column. The percentiles
+        of every edition come from its KLL sketch; the sketches are merged
+        for the 'ALL' row
+    """
+    logger = Logger("Batch")
+    paths = expand_inputs(patterns)
+    editions = edition_names(paths)
+    logger.info(f"Processing {len(paths)} files with {jobs} job(s)...")
+
+    if jobs > 1 and len(paths) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(analyze_file, paths, editions, [options] * len(paths)))
+    else:
+        results = [analyze_file(path, edition, options) for path, edition in zip(paths, editions)]
+
+    combined = {}
+    for name in ('riders', 'histogram', 'clubs'):
+        combined[name] = pd.concat(
+            [result[name].assign(edition=edition) for result, edition in zip(results, editions)],
+            ignore_index=True,
+        )
+    combined['ranking'] = pd.DataFrame(
+        [dict(result['ranking'], edition=edition) for result, edition in zip(results, editions)]
+    )
+    sketches = [KLLSketch.from_bytes(result['sketch']) for result in results]
+    combined['percentiles'] = pd.DataFrame(
+        [dict(sketch.summary(), edition=edition) for sketch, edition in zip(sketches, editions)]
+        + [dict(KLLSketch.merged(sketches, seed=0).summary(), edition='ALL')]
+    )
+    for name, frame in combined.items():
+        combined[name] = frame[['edition'] + [col for col in frame.columns if col != 'edition']]
+
+    logger.info(f"Processed {len(combined['riders'])} riders from {len(paths)} editions")
+    return combined
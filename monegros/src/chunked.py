@@ -0,0 +1,334 @@
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from monegros.src.ex1_data import DataLoader
+from monegros.src.ex4_clubs import ClubAnalyzer
+from monegros.src.ranking import radix_argsort
+from monegros.utils.logger import Logger, timed
+from monegros.utils.times import format_hhmm, is_finisher, parse_seconds, seconds_to_strings
+
+class RaceAggregate:
+    # Columns of the club and top rider partials
+    CLUB_COLUMNS = ['club', 'participants', 'total_seconds', 'best_seconds', 'best_row', 'best_dorsal', 'best_biker']
+    RIDER_COLUMNS = ['row', 'dorsal', 'biker', 'club_clean', 'seconds']
+
+    def __init__(self, bin_minutes=20, top=10):
+        """
+        Mergeable partial results of a race, built chunk by chunk.
+
+        Holds only bounded aggregates, never the riders: finishers per
+        finish second (which gives exact positions), histogram bucket
+        counts, per-club participants, total and best time, and the top
+        riders as candidates for the first positions. Aggregates of
+        separate chunks merge into the aggregate of their union, and the
+        results match the in-memory pipeline, ties going to the earlier row.
+
+        Args:
+            bin_minutes (int): Width of the histogram intervals in minutes
+            top (int): Number of leading riders kept
+        """
+        self.bin_seconds = int(bin_minutes) * 60
+        self.top = top
+        self.non_finishers = 0
+        self.second_counts = np.zeros(0, dtype=np.int64)
+        self.bucket_counts = np.zeros(0, dtype=np.int64)
+        self.club_rows = pd.DataFrame(columns=self.CLUB_COLUMNS)
+        self.leaders = pd.DataFrame(columns=self.RIDER_COLUMNS)
+
+    @staticmethod
+    def _add_counts(counts, other):
+        """Sum of two count arrays of possibly different lengths"""
+        if len(other) > len(counts):
+            counts, other = other, counts
+        counts = counts.copy()
+        counts[:len(other)] += other
+        return counts
+
+    @staticmethod
+    def _first_per_club(frame):
+        """Row with the lowest (best_seconds, best_row) of every club"""
+        frame = frame.iloc[radix_argsort(frame['best_seconds'].to_numpy(np.int64),
+                                         radix_argsort(frame['best_row'].to_numpy(np.int64)))]
+        return frame.drop_duplicates('club')
+
+    def update(self, chunk, first_row=0):
+        """
+        Adds a cleaned chunk: finishers only, with seconds and club_clean.
+
+        Args:
+            chunk (pd.DataFrame): dorsal, biker, club_clean and seconds
+            first_row (int): Position of the chunk's first row in the input,
+                used to break ties like the in-memory pipeline
+
+        Returns:
+            RaceAggregate: self
+        """
+        seconds = chunk['seconds'].to_numpy().astype(np.int64)
+        rows = first_row + np.arange(len(chunk), dtype=np.int64)
+        self.second_counts = self._add_counts(self.second_counts, np.bincount(seconds))
+        self.bucket_counts = self._add_counts(self.bucket_counts, np.bincount(seconds // self.bin_seconds))
+
+        # Rows by (time, row): the first row of a club is its best rider
+        order = radix_argsort(seconds)
+        codes, names = pd.factorize(chunk['club_clean'])
+        participants = np.bincount(codes, minlength=len(names))
+        totals = np.bincount(codes, weights=seconds, minlength=len(names))
+        _, first = np.unique(codes[order], return_index=True)
+        best = order[first]
+        clubs = pd.DataFrame({
+            'club': names[codes[best]],
+            'participants': participants[codes[best]],
+            'total_seconds': totals[codes[best]],
+            'best_seconds': seconds[best],
+            'best_row': rows[best],
+            'best_dorsal': chunk['dorsal'].to_numpy()[best],
+            'best_biker': chunk['biker'].to_numpy()[best],
+        })
+
+        leaders = order[:self.top]
+        chunk_leaders = pd.DataFrame({
+            'row': rows[leaders],
+            'dorsal': chunk['dorsal'].to_numpy()[leaders],
+            'biker': chunk['biker'].to_numpy()[leaders],
+            'club_clean': chunk['club_clean'].to_numpy()[leaders],
+            'seconds': seconds[leaders],
+        })
+        return self._merge_partials(clubs, chunk_leaders)
+
+    def _merge_partials(self, clubs, leaders):
+        """Merges club and leader partials into this aggregate"""
+        if len(self.club_rows):
+            merged = pd.concat([self.club_rows, clubs], ignore_index=True)
+            sums = merged.groupby('club', sort=False)[['participants', 'total_seconds']].sum()
+            best = self._first_per_club(merged).set_index('club')
+            best[['participants', 'total_seconds']] = sums.loc[best.index]
+            clubs = best.reset_index()
+        self.club_rows = clubs[self.CLUB_COLUMNS].reset_index(drop=True)
+
+        leaders = pd.concat([self.leaders, leaders], ignore_index=True) if len(self.leaders) else leaders
+        order = radix_argsort(leaders['seconds'].to_numpy(np.int64),
+                              radix_argsort(leaders['row'].to_numpy(np.int64)))
+        self.leaders = leaders.iloc[order[:self.top]].reset_index(drop=True)
+        return self
+
+    def merge(self, other):
+        """
+        Adds the results summarized by another aggregate.
+
+        Args:
+            other (RaceAggregate): Aggregate with the same bin width
+
+        Returns:
+            RaceAggregate: self
+
+        Raises:
+            ValueError: If the aggregates have different bin widths
+        """
+        if other.bin_seconds != self.bin_seconds:
+            raise ValueError("Cannot merge aggregates with different histogram bin widths")
+        self.second_counts = self._add_counts(self.second_counts, other.second_counts)
+        self.bucket_counts = self._add_counts(self.bucket_counts, other.bucket_counts)
+        self.non_finishers += other.non_finishers
+        return self._merge_partials(other.club_rows, other.leaders)
+
+    @property
+    def finishers(self):
+        return int(self.second_counts.sum())
+
+    def position(self, seconds):
+        """Position of a finish time among the finishers ('min' ties, like RankIndex)"""
+        lower = np.concatenate(([0], np.cumsum(self.second_counts)))
+        return lower[np.minimum(np.asarray(seconds, dtype=np.int64), len(self.second_counts))] + 1
+
+    def histogram(self):
+        """Non-empty intervals with time_grouped and count, like TimeHistogram.time_frequencies"""
+        present = np.flatnonzero(self.bucket_counts)
+        return pd.DataFrame({
+            'time_grouped': format_hhmm(present * self.bin_seconds),
+            'count': self.bucket_counts[present],
+        })
+
+    def clubs(self):
+        """
+        Per-club results, like the matching columns of ClubAnalyzer.club_statistics.
+
+        Returns:
+            pd.DataFrame: club, participants, best_seconds, best_time,
+            mean_seconds, best_dorsal, best_biker and best_position, most
+            participants first
+        """
+        clubs = self.club_rows
+        best_seconds = clubs['best_seconds'].to_numpy(np.int64)
+        stats = pd.DataFrame({
+            'club': clubs['club'].to_numpy(dtype=object),
+            'participants': clubs['participants'].to_numpy(np.int64),
+            'best_seconds': best_seconds,
+            'best_time': seconds_to_strings(best_seconds).astype(object),
+            'mean_seconds': clubs['total_seconds'].to_numpy(np.float64) / clubs['participants'].to_numpy(np.int64),
+            'best_dorsal': clubs['best_dorsal'].to_numpy(),
+            'best_biker': clubs['best_biker'].to_numpy(dtype=object),
+            'best_position': self.position(best_seconds),
+        })
+        order = np.lexsort((stats['club'].to_numpy(dtype=str), -stats['participants'].to_numpy()))
+        return stats.iloc[order].reset_index(drop=True)
+
+    def leaderboard(self):
+        """Leading riders with their time and position"""
+        leaders = self.leaders.drop(columns='row').astype({'seconds': np.int64})
+        leaders.insert(0, 'position', self.position(leaders['seconds'].to_numpy()))
+        leaders['time'] = seconds_to_strings(leaders['seconds'].to_numpy())
+        return leaders
+
+    def club_best(self, club):
+        """
+        Best rider of a club and its position, like UCSCAnalyzer.analyze_ucsc.
+
+        Returns:
+            dict: dorsal, biker, seconds, time, position, total and
+            percentage, or None if the club has no finishers
+        """
+        rows = self.club_rows[self.club_rows['club'] == club]
+        if rows.empty:
+            return None
+        best = rows.iloc[0]
+        seconds = int(best['best_seconds'])
+        position = int(self.position(seconds))
+        return {
+            'dorsal': best['best_dorsal'],
+            'biker': best['best_biker'],
+            'seconds': seconds,
+            'time': str(seconds_to_strings([seconds])[0]),
+            'position': position,
+            'total': self.finishers,
+            'percentage': position / self.finishers * 100,
+        }
+
+class ChunkedPipeline:
+    def __init__(self, anonymizer=None, club_analyzer=None, bin_minutes=20, club='UCSC',
+                 chunk_rows=500_000, top=10):
+        """
+        Runs the analysis over a CSV in bounded-size chunks.
+
+        Every chunk goes through the clean (drop non-finishers), bucket and
+        club-normalize steps and is folded into a RaceAggregate, so peak
+        memory depends on chunk_rows, not on the size of the input. Only the
+        reported riders (leaders and club bests) are anonymized, at the end;
+        with a hash-mode DataAnonymizer they get the same pseudonyms as in
+        the in-memory pipeline.
+
+        Args:
+            anonymizer (DataAnonymizer): Anonymizes the reported riders, names
+                are kept if None
+            club_analyzer (ClubAnalyzer): Cleans the club names
+            bin_minutes (int): Width of the histogram intervals in minutes
+            club (str): Club whose best rider is reported
+            chunk_rows (int): Rows read at a time
+            top (int): Number of leading riders reported
+        """
+        self.anonymizer = anonymizer
+        self.club_analyzer = club_analyzer or ClubAnalyzer()
+        self.bin_minutes = bin_minutes
+        self.club = club
+        self.chunk_rows = chunk_rows
+        self.top = top
+        self.logger = Logger("ChunkedPipeline")
+
+    def chunks(self, path):
+        """Reads the CSV chunk_rows rows at a time with the DataLoader schema"""
+        return pd.read_csv(path, sep=';', dtype=DataLoader.SCHEMA, chunksize=self.chunk_rows)
+
+    def aggregate_chunk(self, chunk, first_row=0):
+        """
+        Cleans one chunk and summarizes it.
+
+        Args:
+            chunk (pd.DataFrame): Rows as read from the CSV
+            first_row (int): Position of the chunk's first row in the input
+
+        Returns:
+            RaceAggregate: Aggregate of the chunk
+
+        Raises:
+            ValueError: If a dorsal is negative
+        """
+        DataLoader.check_dorsals(chunk['dorsal'])
+        seconds = parse_seconds(chunk['time'])
+        finished = is_finisher(seconds)
+        riders = pd.DataFrame({
+            'dorsal': chunk['dorsal'].to_numpy()[finished],
+            'biker': chunk['biker'].to_numpy()[finished],
+            'club_clean': self.club_analyzer.clean_clubs(chunk['club'][finished]).to_numpy(),
+            'seconds': seconds[finished],
+        })
+        aggregate = RaceAggregate(self.bin_minutes, self.top)
+        # Rows are numbered among the finishers, as in the cleaned dataframe
+        aggregate.update(riders, first_row)
+        aggregate.non_finishers = int((~finished).sum())
+        return aggregate
+
+    def _pseudonyms(self, dorsals, bikers):
+        """
+        Anonymizes the reported riders in one call, so each dorsal gets a single name.
+
+        Args:
+            dorsals (array-like): Dorsals of the reported riders, possibly repeated
+            bikers (array-like): Their names
+
+        Returns:
+            dict: Anonymized name by dorsal
+        """
+        riders = pd.DataFrame({'dorsal': dorsals, 'biker': bikers}).drop_duplicates('dorsal')
+        riders = riders.sort_values('dorsal', kind='stable').reset_index(drop=True)
+        names = self.anonymizer.name_surname(riders)['biker']
+        return dict(zip(riders['dorsal'].tolist(), names.tolist()))
+
+    @timed
+    def run(self, path):
+        """
+        Analyzes a race CSV chunk by chunk.
+
+        Args:
+            path (Path): ';' separated race CSV
+
+        Returns:
+            dict: histogram, clubs and leaders dataframes, the club result
+            ('ranking', like UCSCAnalyzer's position_info) and the
+            finishers and non_finishers counts
+        """
+        path = Path(path)
+        self.logger.info("Analyzing %s in chunks of %d rows...", path, self.chunk_rows)
+        total = RaceAggregate(self.bin_minutes, self.top)
+        for number, chunk in enumerate(self.chunks(path)):
+            total.merge(self.aggregate_chunk(chunk, total.finishers))
+            self.logger.debug("Chunk %d: %d finishers so far", number, total.finishers)
+
+        ranking = total.club_best(self.club)
+        clubs, leaders = total.clubs(), total.leaderboard()
+        if self.anonymizer is not None:
+            reported = [(clubs['best_dorsal'], clubs['best_biker']), (leaders['dorsal'], leaders['biker'])]
+            if ranking is not None:
+                reported.append(([ranking['dorsal']], [ranking['biker']]))
+            names = self._pseudonyms(np.concatenate([np.asarray(d) for d, _ in reported]),
+                                     np.concatenate([np.asarray(b, dtype=object) for _, b in reported]))
+            clubs['best_biker'] = clubs['best_dorsal'].map(names)
+            leaders['biker'] = leaders['dorsal'].map(names)
+            if ranking is not None:
+                ranking['biker'] = names[ranking['dorsal']]
+        results = {
+            'histogram': total.histogram(),
+            'clubs': clubs,
+            'leaders': leaders,
+            'ranking': ranking,
+            'finishers': total.finishers,
+            'non_finishers': total.non_finishers,
+        }
+
+        self.logger.info(f"Finishers: {results['finishers']} (non-finishers: {results['non_finishers']})")
+        self.logger.info("Leading riders:")
+        self.logger.preview(results['leaders'])
+        if ranking is not None:
+            self.logger.info(f"{self.club}: position {ranking['position']} out of {ranking['total']} "
+                             f"(top {ranking['percentage']:.2f}%)")
+        else:
+            self.logger.warning(f"No {self.club} cyclists found in the dataset")
+        return results
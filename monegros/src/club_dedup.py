@@ -0,0 +1,261 @@
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from pathlib import Path
+import pandas as pd
+from monegros.utils.logger import Logger, timed
+
+class UnionFind:
+    def __init__(self, size):
+        """
+        Disjoint sets over the integers 0..size-1, with path halving.
+
+        Args:
+            size (int): Number of elements
+        """
+        self.parent = list(range(size))
+
+    def find(self, i):
+        """Root of the set of i"""
+        parent = self.parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(self, i, j):
+        """Merges the sets of i and j"""
+        root_i, root_j = self.find(i), self.find(j)
+        if root_i != root_j:
+            self.parent[max(root_i, root_j)] = min(root_i, root_j)
+
+class ClubDeduplicator:
+    # Abbreviations glued to the name ('CC.FRAGA', 'C.D.EL CUBIO', 'CC/HUARTE'),
+    # which the ClubAnalyzer patterns miss because they expect a space after them
+    GLUED_PREFIX = re.compile(r'^(?:[ACES]\.?[CDE]|U\.?C)[./](?=\w)')
+    # Spanish / Catalan spelling rules that do not change the pronunciation,
+    # applied in order to the accent-free, upper case name
+    PHONETIC_RULES = [
+        (re.compile(r'NY'), 'N'),
+        (re.compile(r'LL'), 'Y'),
+        (re.compile(r'QU'), 'K'),
+        (re.compile(r'C(?=[EI])'), 'S'),
+        (re.compile(r'G(?=[EI])'), 'J'),
+        (re.compile(r'[CQ]'), 'K'),
+        (re.compile(r'Z'), 'S'),
+        (re.compile(r'V'), 'B'),
+        (re.compile(r'W'), 'U'),
+        (re.compile(r'H'), ''),
+        (re.compile(r'(\w)\1+'), r'\1'),
+        (re.compile(r'S\b'), ''),
+    ]
+
+    def __init__(self, threshold=0.85, ngram=3, min_length=5, max_block_size=200, acronyms=True):
+        """
+        Clusters spelling variants of cleaned club names.
+
+        Names whose phonetic keys are equal are merged directly. The rest are
+        compared only when they share character n-grams (blocking), and merged
+        when the Dice similarity of their n-gram sets reaches the threshold.
+        Single word names can also be merged with the only multi-word name
+        they abbreviate ('UCSC' -> 'UNIÓ CICLISTA SANT CUGAT').
+
+        Args:
+            threshold (float): Minimum n-gram similarity to merge two names
+            ngram (int): Length of the character n-grams
+            min_length (int): Shorter keys are only merged on exact key match
+            max_block_size (int): N-grams shared by more names than this are
+                too common to block on and are ignored
+            acronyms (bool): Merge acronyms with the name they abbreviate
+        """
+        if not 0 < threshold <= 1:
+            raise ValueError(f"Threshold must be in (0, 1], got {threshold}")
+        self.threshold = threshold
+        self.ngram = ngram
+        self.min_length = min_length
+        self.max_block_size = max_block_size
+        self.acronyms = acronyms
+        self.logger = Logger("ClubDeduplicator")
+
+    @classmethod
+    def normalize(cls, name):
+        """
+        Accent-free, upper case name with only letters, digits and spaces.
+
+        Example:
+            'C.C.Tàrrega' -> 'TARREGA'
+            'Almorzar.as' -> 'ALMORZARAS'
+        """
+        name = unicodedata.normalize('NFKD', name.upper())
+        name = ''.join(char for char in name if not unicodedata.combining(char))
+        name = cls.GLUED_PREFIX.sub('', name)
+        name = re.sub(r'[.\'_*]', '', name)
+        return ' '.join(re.sub(r'[^A-Z0-9]+', ' ', name).split())
+
+    @classmethod
+    def phonetic_key(cls, name):
+        """
+        Key shared by spellings that sound the same, spaces removed.
+
+        Example:
+            'PEÑA GUARA' and 'PENYA GUARA' -> 'PENAGUARA'
+        """
+        key = cls.normalize(name)
+        for pattern, replacement in cls.PHONETIC_RULES:
+            key = pattern.sub(replacement, key)
+        return key.replace(' ', '')
+
+    def _ngrams(self, key):
+        """Set of the character n-grams of a key, padded at both ends"""
+        padded = f"#{key}#"
+        return {padded[i:i + self.ngram] for i in range(len(padded) - self.ngram + 1)}
+
+    def candidate_pairs(self, keys):
+        """
+        Pairs of keys similar enough to be merged, found through n-gram blocking.
+
+        Only keys sharing at least one n-gram are compared, and only when
+        their n-gram counts make the threshold reachable.
+
+        Args:
+            keys (list): Distinct phonetic keys
+
+        Yields:
+            tuple: (i, j, similarity) with i < j indexes into keys
+        """
+        grams = [self._ngrams(key) if len(key) >= self.min_length else set() for key in keys]
+        postings = defaultdict(list)
+        for i, key_grams in enumerate(grams):
+            for gram in key_grams:
+                postings[gram].append(i)
+        # Dice >= t needs min(|a|, |b|) / max(|a|, |b|) >= t / (2 - t)
+        ratio = self.threshold / (2 - self.threshold)
+
+        for i, key_grams in enumerate(grams):
+            shared = Counter()
+            for gram in key_grams:
+                block = postings[gram]
+                if len(block) <= self.max_block_size:
+                    shared.update(j for j in block if j > i)
+            for j, count in shared.items():
+                size_i, size_j = len(key_grams), len(grams[j])
+                if min(size_i, size_j) < ratio * max(size_i, size_j):
+                    continue
+                similarity = 2 * count / (size_i + size_j)
+                if similarity >= self.threshold:
+                    yield i, j, similarity
+
+    def _acronym_pairs(self, names):
+        """Pairs (acronym index, name index) where the name is the only one with those initials"""
+        words = [self.normalize(name).split() for name in names]
+        by_initials = defaultdict(list)
+        for i, name_words in enumerate(words):
+            if len(name_words) >= 3:
+                by_initials[''.join(word[0] for word in name_words)].append(i)
+        for i, name_words in enumerate(words):
+            if len(name_words) == 1 and len(by_initials.get(name_words[0], ())) == 1:
+                yield i, by_initials[name_words[0]][0]
+
+    def build_mapping(self, names, counts=None):
+        """
+        Clusters club names and picks a canonical name for every cluster.
+
+        The canonical name is the most common spelling of the cluster (ties
+        go to the alphabetically first one).
+
+        Args:
+            names (list): Distinct cleaned club names
+            counts (list): Participants of every name, all 1 if None
+
+        Returns:
+            pd.DataFrame: club, canonical, participants and cluster_size of the
+            names in clusters of two or more, sorted by canonical and club
+        """
+        names = list(names)
+        counts = [1] * len(names) if counts is None else [int(count) for count in counts]
+        sets = UnionFind(len(names))
+
+        # Exact blocking: same phonetic key
+        key_index = {}
+        keys = []
+        for i, name in enumerate(names):
+            key = self.phonetic_key(name)
+            if key in key_index:
+                sets.union(i, keys[key_index[key]][1])
+            else:
+                key_index[key] = len(keys)
+                keys.append((key, i))
+
+        # Fuzzy matching between the distinct keys
+        for a, b, _ in self.candidate_pairs([key for key, _ in keys]):
+            sets.union(keys[a][1], keys[b][1])
+
+        if self.acronyms:
+            for i, j in self._acronym_pairs(names):
+                sets.union(i, j)
+
+        clusters = defaultdict(list)
+        for i in range(len(names)):
+            clusters[sets.find(i)].append(i)
+
+        rows = []
+        for members in clusters.values():
+            if len(members) < 2:
+                continue
+            canonical = names[min(members, key=lambda i: (-counts[i], names[i]))]
+            rows.extend((names[i], canonical, counts[i], len(members)) for i in members)
+        mapping = pd.DataFrame(rows, columns=['club', 'canonical', 'participants', 'cluster_size'])
+        return mapping.sort_values(['canonical', 'club'], ignore_index=True)
+
+    @timed
+    def deduplicate(self, clubs):
+        """
+        Builds the canonical name mapping of a column of cleaned club names.
+
+        Args:
+            clubs (pd.Series): Cleaned club names (club_clean)
+
+        Returns:
+            pd.DataFrame: The mapping returned by build_mapping
+        """
+        counts = clubs.value_counts()
+        mapping = self.build_mapping(counts.index.tolist(), counts.tolist())
+        merged = mapping['club'].ne(mapping['canonical']).sum()
+        self.logger.info(f"{merged} of {len(counts)} club names merged into "
+                         f"{mapping['canonical'].nunique()} canonical names")
+        return mapping
+
+def save_mapping(mapping, path):
+    """
+    Writes a canonical name mapping as a ';' separated CSV, for review.
+
+    Args:
+        mapping (pd.DataFrame): Mapping with club and canonical columns
+        path (Path): Output file
+
+    Returns:
+        Path: The output file
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    mapping.to_csv(path, sep=';', index=False)
+    return path
+
+def load_mapping(path):
+    """
+    Reads a (possibly hand edited) canonical name mapping.
+
+    Args:
+        path (Path): CSV written by save_mapping
+
+    Returns:
+        dict: Club name -> canonical name, for the names that change
+
+    Raises:
+        ValueError: If the file has no club and canonical columns
+    """
+    mapping = pd.read_csv(path, sep=';', dtype=str, keep_default_na=False)
+    if not {'club', 'canonical'} <= set(mapping.columns):
+        raise ValueError(f"Club mapping {path} needs 'club' and 'canonical' columns")
+    mapping = mapping[(mapping['canonical'] != '') & (mapping['club'] != mapping['canonical'])]
+    return dict(zip(mapping['club'], mapping['canonical']))
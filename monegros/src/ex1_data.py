@@ -1,38 +1,305 @@
+import hashlib
+import json
+import os
+import numpy as np
 import pandas as pd
 from pathlib import Path
-from monegros.utils.logger import Logger
+from monegros.src.race_table import RaceTable
+from monegros.src.validation import ValidationReport
+from monegros.utils.logger import Logger, timed
+from monegros.utils.times import parse_seconds
+
+def _has_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
 
 class DataLoader:
-    def __init__(self):
+    # Declared schema of dataset.csv. dorsal is read signed, so a negative
+    # dorsal is rejected instead of wrapping around, and downcast once its
+    # range is known.
+    SCHEMA = {
+        'dorsal': 'int64',
+        'biker': 'str',
+        'club': 'category',
+        'time': 'str',
+    }
+    ENGINES = ('c', 'pyarrow')
+    # Bump when the schema or the parsing changes so old caches are rebuilt
+    CACHE_VERSION = 2
+
+    def __init__(self, data_path=None, engine='c', usecols=None, use_cache=False, validator=None):
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown parser engine '{engine}'. Expected one of {self.ENGINES}")
         self.root_dir = Path(__file__).parent.parent
-        self.data_path = self.root_dir / 'data' / 'dataset.csv'
+        self.data_path = Path(data_path) if data_path is not None else self.root_dir / 'data' / 'dataset.csv'
+        self.engine = engine
+        self.usecols = list(usecols) if usecols is not None else None
+        self.use_cache = use_cache
+        self.cache_format = 'feather' if _has_pyarrow() else 'pickle'
+        self.cache_path = self.data_path.with_name(f"{self.data_path.name}.cache.{self.cache_format}")
+        self.cache_meta_path = self.data_path.with_name(f"{self.data_path.name}.cache.json")
+        self.validator = validator
+        self.quarantine_path = self.data_path.with_name(f"{self.data_path.stem}.quarantine.csv")
+        self.validation_report = None
         self.df = None
+        self.memory_usage = None
         self.logger = Logger("DataLoader")
 
+    def _file_hash(self):
+        """Returns the SHA-256 of the source file"""
+        digest = hashlib.sha256()
+        with open(self.data_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _cache_key(self):
+        """Returns the part of the cache key that does not need hashing the file"""
+        stat = self.data_path.stat()
+        return {
+            'version': self.CACHE_VERSION,
+            'path': str(self.data_path.resolve()),
+            'usecols': self.usecols,
+            'format': self.cache_format,
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'validation': self.validator.settings() if self.validator is not None else None,
+        }
+
+    def _read_cache(self, key):
+        """
+        Reads the cached dataset if it is still valid for the source file.
+
+        Size and mtime are checked first. If only the mtime changed the content
+        hash decides, so touching the CSV does not force a rebuild. With a
+        validator, the validation report stored with the entry is restored;
+        the entry is stale if it quarantined rows whose quarantine file is gone.
+
+        Args:
+            key (dict): Current cache key from _cache_key
+
+        Returns:
+            pd.DataFrame: Cached dataset, or None if missing or stale
+        """
+        if not self.cache_path.exists() or not self.cache_meta_path.exists():
+            return None
+        try:
+            meta = json.loads(self.cache_meta_path.read_text())
+        except (OSError, ValueError):
+            return None
+
+        fixed = ('version', 'path', 'usecols', 'format', 'size', 'validation')
+        if any(meta.get(field) != key[field] for field in fixed):
+            return None
+        if meta.get('mtime_ns') != key['mtime_ns']:
+            if meta.get('sha256') != self._file_hash():
+                return None
+            meta['mtime_ns'] = key['mtime_ns']
+            self._write_json(self.cache_meta_path, meta)
+
+        if self.validator is not None:
+            report = meta.get('report')
+            if report is None:
+                return None
+            issues = {check: np.asarray(rows, dtype=np.int64) for check, rows in report['issues'].items()}
+            if issues and self.validator.policy == 'quarantine' and not self.quarantine_path.exists():
+                return None
+            self.validation_report = ValidationReport(report['total'], issues)
+
+        if self.cache_format == 'feather':
+            return pd.read_feather(self.cache_path)
+        return pd.read_pickle(self.cache_path)
+
+    def _write_cache(self, df, key):
+        """Writes the dataset and its key next to the source file"""
+        tmp_path = self.cache_path.with_name(self.cache_path.name + '.tmp')
+        if self.cache_format == 'feather':
+            df.to_feather(tmp_path)
+        else:
+            df.to_pickle(tmp_path)
+        os.replace(tmp_path, self.cache_path)
+        meta = dict(key, sha256=self._file_hash())
+        if self.validation_report is not None:
+            report = self.validation_report
+            meta['report'] = {'total': report.total,
+                              'issues': {check: rows.tolist() for check, rows in report.issues.items()}}
+        self._write_json(self.cache_meta_path, meta)
+
+    @staticmethod
+    def _write_json(path, data):
+        tmp_path = path.with_name(path.name + '.tmp')
+        tmp_path.write_text(json.dumps(data))
+        os.replace(tmp_path, path)
+
+    def clear_cache(self):
+        """Removes the cached dataset, if any"""
+        for path in (self.cache_path, self.cache_meta_path):
+            if path.exists():
+                path.unlink()
+                self.logger.info(f"Removed cache file {path}")
+
+    @staticmethod
+    def check_dorsals(dorsals):
+        """
+        Checks that no dorsal is negative.
+
+        Args:
+            dorsals (pd.Series): Dorsals as read with the declared schema
+
+        Raises:
+            ValueError: If a dorsal is negative
+        """
+        negative = dorsals[dorsals < 0]
+        if len(negative):
+            raise ValueError(f"Found {len(negative)} negative dorsals, e.g. {negative.iloc[:5].tolist()}")
+
+    def read_data(self):
+        """
+        Reads the dataset with the declared schema.
+
+        The 'time' column is parsed once into a uint32 'seconds' column.
+        With a validator, the whole file is checked before typing the
+        dorsals and times, and invalid rows are handled by its policy (the
+        report is kept in validation_report).
+
+        Returns:
+            pd.DataFrame: The typed dataset
+
+        Raises:
+            FileNotFoundError: If the data file is not found
+            ValueError: If a time is not in format 'HH:MM:SS', a dorsal is
+                negative, or rows are invalid and the validation policy is 'raise'
+        """
+        columns = self.usecols if self.usecols is not None else list(self.SCHEMA)
+        dtype = {col: self.SCHEMA[col] for col in columns if col in self.SCHEMA}
+        if self.validator is not None and 'dorsal' in dtype:
+            # Read as text so malformed or negative dorsals reach the validator
+            dtype['dorsal'] = 'str'
+
+        df = pd.read_csv(self.data_path, sep=";", engine=self.engine,
+                         usecols=self.usecols, dtype=dtype)
+
+        if self.validator is not None:
+            df, self.validation_report = self.validator.validate_data(df, self.quarantine_path)
+            if 'dorsal' in df.columns:
+                df['dorsal'] = pd.to_numeric(df['dorsal']).astype(self.SCHEMA['dorsal'])
+
+        if 'dorsal' in df.columns:
+            self.check_dorsals(df['dorsal'])
+            df['dorsal'] = pd.to_numeric(df['dorsal'], downcast='unsigned')
+        if 'time' in df.columns:
+            df['seconds'] = parse_seconds(df['time'])
+        return df
+
+    def load_data(self):
+        """
+        Returns the typed dataset, from the columnar cache when it is valid.
+
+        Returns:
+            pd.DataFrame: The typed dataset
+
+        Raises:
+            FileNotFoundError: If the data file is not found
+        """
+        if not self.use_cache:
+            return self.read_data()
+
+        key = self._cache_key()
+        df = self._read_cache(key)
+        if df is not None:
+            self.logger.info(f"Loaded dataset from cache {self.cache_path}")
+            if self.validation_report is not None and not self.validation_report.ok:
+                self.logger.warning(f"{self.validation_report.summary()}\nInvalid rows were "
+                                    f"{'quarantined' if self.validator.policy == 'quarantine' else 'dropped'}")
+            return df
+
+        df = self.read_data()
+        self._write_cache(df, key)
+        self.logger.info(f"Dataset cache written to {self.cache_path}")
+        return df
+
+    def load_table(self, with_names=False):
+        """
+        Returns the dataset as a compact RaceTable.
+
+        Args:
+            with_names (bool): Keep the rider names
+
+        Returns:
+            RaceTable: The dataset, with the clubs dictionary encoded
+        """
+        return RaceTable.from_frame(self.load_data(), with_names=with_names)
+
+    def load_splits(self, layout=None, checkpoints=None, distances=None):
+        """
+        Reads a split-time file into a riders x checkpoints SplitTimes.
+
+        Wide files have one row per rider and one 'HH:MM:SS' column per
+        checkpoint (elapsed since the start) after dorsal, biker and club;
+        long files have one dorsal;checkpoint;time row per split. Missing
+        splits and '00:00:00' are checkpoints the rider did not reach.
+
+        Args:
+            layout (str): 'wide' or 'long'; detected from the header
+                (a 'checkpoint' column means long) when None
+            checkpoints (list): Checkpoint order of a long file
+            distances (array-like): Distance of every checkpoint in km
+
+        Returns:
+            SplitTimes: The split times
+
+        Raises:
+            FileNotFoundError: If the data file is not found
+            ValueError: If the layout is unknown or a time is malformed
+        """
+        # Imported here: the loader does not depend on the analysis modules
+        from monegros.src.splits import SplitTimes
+
+        df = pd.read_csv(self.data_path, sep=";", engine=self.engine, dtype=str)
+        if layout is None:
+            layout = 'long' if 'checkpoint' in df.columns else 'wide'
+        if layout not in ('wide', 'long'):
+            raise ValueError(f"Unknown split layout '{layout}'. Expected 'wide' or 'long'")
+
+        df['dorsal'] = pd.to_numeric(df['dorsal'], downcast='unsigned')
+        if layout == 'long':
+            splits = SplitTimes.from_long(df, checkpoints, distances)
+        else:
+            splits = SplitTimes.from_wide(df, distances)
+        self.logger.info(f"Loaded {len(splits)} riders and {len(splits.checkpoints)} checkpoints "
+                         f"from {layout} split file {self.data_path}")
+        return splits
+
+    @timed
     def load_and_analyze_data(self):
         """
         Loads and performs initial analysis of the Orbea Monegros dataset.
-                
+
         Returns:
             pd.DataFrame: The loaded dataset
-        
+
         Raises:
             FileNotFoundError: If the data file is not found
         """
         self.logger.info("Loading dataset...")
-        self.df = pd.read_csv(self.data_path, sep=";")
-        
+        self.df = self.load_data()
+        self.memory_usage = int(self.df.memory_usage(deep=True).sum())
+
         self.logger.info(f"Dataset loaded with {len(self.df)} rows")
+        self.logger.info(f"Memory footprint: {self.memory_usage / 1024 ** 2:.2f} MB")
         self.logger.info("First 5 rows of the dataset:")
-        print(self.df.head())
-        
+        self.logger.preview(self.df.head)
+
         self.logger.info(f"Number of participants: {len(self.df)}")
-        
+
         self.logger.info("Dataframe columns:")
-        print(self.df.columns.tolist())
-        
+        self.logger.preview(self.df.columns.tolist)
+
         return self.df
 
 if __name__ == "__main__":
     loader = DataLoader()
-    loader.load_and_analyze_data()
\ No newline at end of file
+    loader.load_and_analyze_data()
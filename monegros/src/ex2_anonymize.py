@@ -1,16 +1,98 @@
+import hashlib
+import numpy as np
 import pandas as pd
-from faker import Faker
-from monegros.utils.logger import Logger
+from monegros.utils.logger import Logger, timed
+from monegros.utils.times import frame_seconds, is_finisher
 
 class DataAnonymizer:
-    def __init__(self):
-        self.fake = Faker()
-        Faker.seed(42)
+    MODES = ('random', 'hash')
+    # Number of distinct first names and surnames sampled from Faker
+    POOL_SIZE = 1000
+
+    def __init__(self, seed=42, mode='random', key=None, key_column='dorsal', pool_size=POOL_SIZE):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown anonymization mode '{mode}'. Expected one of {self.MODES}")
+        if mode == 'hash' and not key:
+            raise ValueError("The 'hash' anonymization mode requires a secret key")
+        self._fake = None
+        self.seed = seed
+        self.mode = mode
+        self.key = key.encode() if isinstance(key, str) else key
+        if self.key is not None and len(self.key) > hashlib.blake2b.MAX_KEY_SIZE:
+            # BLAKE2b keys are at most 64 bytes: longer keys are hashed, like HMAC does
+            self.key = hashlib.blake2b(self.key).digest()
+        self.key_column = key_column
+        self.pool_size = pool_size
+        self._pools = None
         self.logger = Logger("DataAnonymizer")
 
+    @property
+    def fake(self):
+        """Seeded Faker instance, created (and faker imported) on first use"""
+        if self._fake is None:
+            from faker import Faker
+            self._fake = Faker()
+            self._fake.seed_instance(self.seed)
+        return self._fake
+
+    def name_pools(self):
+        """
+        Builds the first-name and surname pools, once.
+
+        The pools are read from Faker's person provider and subsampled with a
+        seeded RNG, so they only depend on the seed and the Faker locale data.
+
+        Returns:
+            tuple: (first_names, last_names) as object arrays
+        """
+        if self._pools is None:
+            rng = np.random.default_rng(self.seed)
+            person = next((provider for provider in self.fake.get_providers()
+                           if hasattr(provider, 'first_names') and hasattr(provider, 'last_names')), None)
+            pools = []
+            for attr, draw in (('first_names', self.fake.first_name), ('last_names', self.fake.last_name)):
+                if person is not None:
+                    names = sorted(set(getattr(person, attr)))
+                else:
+                    names = sorted({draw() for _ in range(self.pool_size * 4)})
+                names = np.array(names, dtype=object)
+                if len(names) > self.pool_size:
+                    names = names[np.sort(rng.choice(len(names), size=self.pool_size, replace=False))]
+                pools.append(names)
+            self._pools = tuple(pools)
+        return self._pools
+
+    def _random_indices(self, n, n_first, n_last):
+        """Draws distinct (first, last) combinations with a seeded NumPy RNG"""
+        rng = np.random.default_rng(self.seed)
+        total = n_first * n_last
+        combos = rng.choice(total, size=n, replace=n > total)
+        return combos // n_last, combos % n_last
+
+    def _hash_indices(self, values, n_first, n_last):
+        """
+        Maps every value to a (first, last) combination with a keyed BLAKE2b hash.
+
+        Only the distinct values are hashed. The same value always gets the
+        same combination for a given key, whatever the row order or file.
+        """
+        codes, uniques = pd.factorize(values)
+        digests = np.array([
+            int.from_bytes(hashlib.blake2b(str(value).encode(), key=self.key, digest_size=8).digest(), 'little')
+            for value in uniques
+        ], dtype=np.uint64)[codes]
+        return digests % np.uint64(n_first), (digests // np.uint64(n_first)) % np.uint64(n_last)
+
     def name_surname(self, df):
         """
-        Anonymizes the biker names in the dataframe using Faker.
+        Anonymizes the biker names in the dataframe.
+
+        Names are built from first-name and surname pools sampled once from
+        Faker. In 'random' mode the combinations are drawn without
+        replacement with a seeded RNG, so names are distinct whenever the
+        pools allow it. In 'hash' mode the combination is derived from a keyed
+        hash of key_column, so a rider gets the same pseudonym on every run
+        and in every file (distinct riders may occasionally collide).
         
         Args:
             df (pd.DataFrame): Original dataframe with biker names
@@ -18,13 +100,22 @@ class DataAnonymizer:
         Returns:
             pd.DataFrame: New dataframe with anonymized names
         """
-        df_anon = df.copy()
-        df_anon['biker'] = [self.fake.name() for _ in range(len(df))]
+        first_names, last_names = self.name_pools()
+        if self.mode == 'hash':
+            first, last = self._hash_indices(df[self.key_column], len(first_names), len(last_names))
+        else:
+            first, last = self._random_indices(len(df), len(first_names), len(last_names))
+
+        # Shallow copy: the new column replaces 'biker' without copying the rest
+        df_anon = df.copy(deep=False)
+        df_anon['biker'] = first_names[first] + ' ' + last_names[last]
         return df_anon
 
     def clean_dataset(self, df):
         """
-        Removes entries where time is '00:00:00' (did not participate).
+        Removes the riders who did not finish (DNF_SECONDS, '00:00:00').
+
+        Uses the 'seconds' column when present instead of comparing strings.
         
         Args:
             df (pd.DataFrame): DataFrame to clean
@@ -32,8 +123,9 @@ class DataAnonymizer:
         Returns:
             pd.DataFrame: Cleaned DataFrame
         """
-        return df[df['time'] != '00:00:00'].copy()
+        return df[is_finisher(frame_seconds(df))]
 
+    @timed
     def anonymize_and_clean_data(self, df):
         """
         Main function to anonymize and clean the dataset.
@@ -48,20 +140,20 @@ class DataAnonymizer:
         self.logger.info("Starting data anonymization...")
         df_processed = self.name_surname(df)
         self.logger.info("First 5 rows after anonymization:")
-        print(df_processed.head())
+        self.logger.preview(df_processed.head)
         
         # Clean dataset
         self.logger.info("Cleaning dataset...")
         df_processed = self.clean_dataset(df_processed)
-        self.logger.info(f"Number of participants after cleaning: {len(df_processed)}")
+        self.logger.info("Number of participants after cleaning: %d", len(df_processed))
         self.logger.info("First 5 rows after cleaning:")
-        print(df_processed.head())
+        self.logger.preview(df_processed.head)
         
         # Get data for biker with dorsal 1000
         biker_1000 = df_processed[df_processed['dorsal'] == 1000]
         if not biker_1000.empty:
             self.logger.info("Data for biker with dorsal 1000:")
-            print(biker_1000)
+            self.logger.preview(biker_1000)
         else:
             self.logger.warning("No biker found with dorsal 1000")
         
@@ -1,18 +1,259 @@
+import hashlib
+import json
+import re
+import threading
+import unicodedata
+import numpy as np
 import pandas as pd
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
 from pathlib import Path
-from monegros.utils.logger import Logger
+from monegros.src.race_table import RaceTable
+from monegros.src.ranking import radix_argsort
+from monegros.src.shared import map_shared
+from monegros.utils.logger import Logger, timed
+from monegros.utils.times import frame_seconds, format_hhmm
+
+class HistogramRenderer:
+    FORMATS = ('png', 'svg', 'csv', 'json')
+
+    def __init__(self, figsize=(15, 6), title='Distribution of Race Completion Times',
+                 xlabel='Time (HH:MM)', ylabel='Number of Cyclists', tight=True):
+        """
+        Draws histograms on one reusable figure.
+
+        Args:
+            figsize (tuple): Figure size in inches
+            title (str): Plot title
+            xlabel (str): X axis label
+            ylabel (str): Y axis label
+            tight (bool): Fit the saved image to its contents, which costs an
+                extra layout pass; fixed margins are used otherwise
+        """
+        self.figsize = figsize
+        self.title = title
+        self.xlabel = xlabel
+        self.ylabel = ylabel
+        self.tight = tight
+        self._figure = None
+        self._bars = None
+        self._labels = None
+        self._lock = threading.Lock()
+
+    def _axes(self):
+        """
+        Returns the reusable figure axes, cleared.
+
+        matplotlib is imported here, on the first plot, and the figure is
+        drawn on an Agg canvas directly, without pyplot.
+        """
+        if self._figure is None:
+            from matplotlib.figure import Figure
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+            self._figure = Figure(figsize=self.figsize)
+            FigureCanvasAgg(self._figure)
+            self._figure.add_subplot()
+            if not self.tight:
+                self._figure.subplots_adjust(bottom=0.2)
+        ax = self._figure.axes[0]
+        ax.clear()
+        return ax
+
+    def _draw(self, time_freq):
+        """
+        Draws a frequency table on the reusable figure.
+
+        When the intervals are the same as in the previous plot (as for the
+        facets of one race), the bars are kept and only their heights change.
+        """
+        labels = [str(label) for label in time_freq['time_grouped']]
+        if labels != self._labels:
+            ax = self._axes()
+            self._bars = self._plot(ax, time_freq, self.title)
+            ax.set_xlabel(self.xlabel)
+            ax.set_ylabel(self.ylabel)
+            self._labels = labels
+            return
+        ax = self._figure.axes[0]
+        for bar, height in zip(self._bars, time_freq['count'].tolist()):
+            bar.set_height(height)
+        ax.relim()
+        ax.autoscale_view()
+        ax.set_title(self.title)
+
+    def options(self):
+        """Constructor arguments, to build an equal renderer in a worker process"""
+        return {'figsize': self.figsize, 'title': self.title, 'xlabel': self.xlabel, 'ylabel': self.ylabel,
+                'tight': self.tight}
+
+    def output_path(self, img_path, output_format):
+        """Output file of a format, img_path with the format as suffix"""
+        return Path(img_path).with_suffix(f'.{output_format}')
+
+    def content_hash(self, time_freq, output_format):
+        """Hash of the counts and plot options that determine the output"""
+        key = json.dumps({
+            'labels': [str(label) for label in time_freq['time_grouped']],
+            'counts': [int(count) for count in time_freq['count']],
+            'options': [list(self.figsize), self.title, self.xlabel, self.ylabel, self.tight, output_format],
+        })
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def render(self, time_freq, img_path, output_format='png'):
+        """
+        Writes the histogram unless an identical one already exists.
+
+        The hash of the counts and options is stored next to the output
+        ('<file>.sha256'); when it matches, nothing is drawn.
+
+        Args:
+            time_freq (pd.DataFrame): Frequency table with time_grouped and count
+            img_path (Path): Output path, its suffix is replaced by the format
+            output_format (str): 'png' or 'svg' for a plot, 'csv' or 'json'
+                for the counts only
+
+        Returns:
+            tuple: (path, rendered) with the output path and whether it was written
+
+        Raises:
+            ValueError: If the format is not supported
+        """
+        if output_format not in self.FORMATS:
+            raise ValueError(f"Unknown output format '{output_format}'. Expected one of {self.FORMATS}")
+
+        path = self.output_path(img_path, output_format)
+        hash_path = path.with_name(path.name + '.sha256')
+        digest = self.content_hash(time_freq, output_format)
+        if path.exists() and hash_path.exists() and hash_path.read_text().strip() == digest:
+            return path, False
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if output_format == 'csv':
+            time_freq.to_csv(path, sep=';', index=False)
+        elif output_format == 'json':
+            path.write_text(json.dumps(dict(zip(time_freq['time_grouped'].astype(str),
+                                                time_freq['count'].astype(int).tolist()))))
+        else:
+            with self._lock:
+                self._draw(time_freq)
+                self._figure.savefig(path, bbox_inches='tight' if self.tight else None, format=output_format)
+        hash_path.write_text(digest)
+        return path, True
+
+    @staticmethod
+    def _plot(ax, time_freq, title, tick_step=1, fontsize=None):
+        """Draws the bars of a frequency table on ax and returns them"""
+        positions = np.arange(len(time_freq))
+        bars = ax.bar(positions, time_freq['count'])
+        ax.set_xticks(positions[::tick_step])
+        ax.set_xticklabels(list(time_freq['time_grouped'])[::tick_step], rotation=45, fontsize=fontsize)
+        ax.set_title(title, fontsize=fontsize)
+        ax.grid(True, alpha=0.3)
+        return bars
+
+    def render_grid(self, panels, img_path, output_format='png', columns=4):
+        """
+        Writes small multiples, one panel per frequency table, unless unchanged.
+
+        Args:
+            panels (list): (title, time_freq) pairs; the tables should share
+                their intervals so the panels are comparable
+            img_path (Path): Output path, its suffix is replaced by the format
+            output_format (str): 'png' or 'svg'
+            columns (int): Panels per row
+
+        Returns:
+            tuple: (path, rendered) with the output path and whether it was written
+
+        Raises:
+            ValueError: If the format is not a plot format
+        """
+        if output_format not in ('png', 'svg'):
+            raise ValueError(f"Grids need a plot format ('png' or 'svg'), got '{output_format}'")
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        path = self.output_path(img_path, output_format)
+        hash_path = path.with_name(path.name + '.sha256')
+        digest = hashlib.sha256(''.join(
+            f"{title}:{self.content_hash(time_freq, output_format)}" for title, time_freq in panels
+        ).encode() + str(columns).encode()).hexdigest()
+        if path.exists() and hash_path.exists() and hash_path.read_text().strip() == digest:
+            return path, False
+
+        rows = -(-len(panels) // columns)
+        figure = Figure(figsize=(columns * 4, rows * 3))
+        FigureCanvasAgg(figure)
+        figure.subplots_adjust(left=0.05, right=0.98, top=1 - 0.4 / rows, bottom=0.3 / rows, hspace=0.6, wspace=0.25)
+        axes = np.atleast_1d(figure.subplots(rows, columns, squeeze=False)).ravel()
+        tick_step = max(1, len(panels[0][1]) // 8) if panels else 1
+        for ax, (title, time_freq) in zip(axes, panels):
+            self._plot(ax, time_freq, title, tick_step=tick_step, fontsize=8)
+        for ax in axes[len(panels):]:
+            ax.set_visible(False)
+        figure.suptitle(f"{self.title} ({self.xlabel}, {self.ylabel})")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        figure.savefig(path, format=output_format)
+        hash_path.write_text(digest)
+        return path, True
+
+def facet_slug(key):
+    """
+    File name fragment for a facet key ('Unió Ciclista' -> 'unio_ciclista').
+
+    Args:
+        key: Facet value, e.g. a club or an edition
+
+    Returns:
+        str: Lowercase ASCII letters, digits and underscores
+    """
+    text = unicodedata.normalize('NFKD', str(key)).encode('ascii', 'ignore').decode()
+    return re.sub(r'[^A-Za-z0-9]+', '_', text).strip('_').lower() or 'none'
+
+# Renderers of a worker process, by options, reused across its tasks
+_renderers = {}
+
+def _render_task(options, kind, payload, img_path, output_format, columns):
+    """Renders one facet histogram or grid; runs in a worker process"""
+    key = json.dumps(options, sort_keys=True)
+    if key not in _renderers:
+        _renderers[key] = HistogramRenderer(**options)
+    renderer = _renderers[key]
+    if kind == 'grid':
+        return renderer.render_grid(payload, img_path, output_format, columns)
+    title, time_freq = payload
+    renderer.title = f"{options['title']}: {title}"
+    return renderer.render(time_freq, img_path, output_format)
+
+def _render_shared(table, task):
+    """
+    Counts and renders the facets of one task from the shared rows; runs in a worker process.
+
+    The rows of table are sorted by facet, so every facet is the slice
+    [start, end) of its seconds column.
+    """
+    options, kind, facets, bin_minutes, present, img_path, output_format, columns = task
+    bin_seconds = int(bin_minutes) * 60
+    labels = format_hhmm(present * bin_seconds)
+    panels = []
+    for title, start, end in facets:
+        counts = np.bincount(table.seconds[start:end] // bin_seconds, minlength=present[-1] + 1)
+        panels.append((title, pd.DataFrame({'time_grouped': labels, 'count': counts[present]})))
+    return _render_task(options, kind, panels if kind == 'grid' else panels[0], img_path, output_format, columns)
 
 class TimeHistogram:
-    def __init__(self):
+    # Size of the per-facet plots
+    FACET_FIGSIZE = (10, 4)
+
+    def __init__(self, output_format='png'):
         self.img_path = Path(__file__).parent.parent / 'img' / 'histograma.png'
+        self.output_format = output_format
+        self.renderer = HistogramRenderer()
         self.logger = Logger("TimeHistogram")
 
     def minutes_002040(self, time_str):
         """
         Groups time into 20-minute intervals.
+
+        Scalar reference for bucket_times, which handles whole columns.
         
         Args:
             time_str (str): Time in format 'HH:MM:SS'
@@ -43,43 +284,197 @@ class TimeHistogram:
             self.logger.error(f"Invalid time format: {time_str}. Expected HH:MM:SS")
             raise ValueError(f"Invalid time format: {time_str}. Expected HH:MM:SS") from e
 
-    def create_time_histogram(self, df):
+    def bucket_times(self, df, bin_minutes=20):
+        """
+        Groups all times of the dataframe into fixed-width intervals at once.
+
+        Uses the 'seconds' column when present and parses 'time' otherwise.
+        Times over 24h get their own buckets ('24:00', '25:20', ...).
+
+        Args:
+            df (pd.DataFrame): DataFrame with race data
+            bin_minutes (int): Width of the intervals in minutes
+
+        Returns:
+            tuple: (buckets, counts)
+                - buckets: np.ndarray with the interval index of every row
+                - counts: np.ndarray with the number of rows per interval
+
+        Raises:
+            ValueError: If bin_minutes is not a positive integer or a time is malformed
+        """
+        if int(bin_minutes) != bin_minutes or bin_minutes <= 0:
+            raise ValueError(f"Invalid bin width: {bin_minutes}. Expected a positive number of minutes")
+
+        buckets = frame_seconds(df).astype(np.int64) // (int(bin_minutes) * 60)
+        counts = np.bincount(buckets)
+        return buckets, counts
+
+    def time_frequencies(self, df, bin_minutes=20):
+        """
+        Frequency table of the times grouped in fixed-width intervals.
+
+        Args:
+            df (pd.DataFrame): DataFrame with race data
+            bin_minutes (int): Width of the intervals in minutes
+
+        Returns:
+            pd.DataFrame: Non-empty intervals with columns time_grouped and count
+        """
+        _, counts = self.bucket_times(df, bin_minutes)
+        present = np.flatnonzero(counts)
+        return pd.DataFrame({
+            'time_grouped': format_hhmm(present * bin_minutes * 60),
+            'count': counts[present],
+        })
+
+    def facet_counts(self, df, facet='club_clean', bin_minutes=20):
+        """
+        Interval counts of every facet in one grouped pass.
+
+        Rows are mapped to (facet code, interval) cells and counted with a
+        single np.bincount. All facets share the intervals that are
+        non-empty for at least one of them, so their histograms are comparable.
+
+        Args:
+            df (pd.DataFrame): DataFrame with race data and the facet column
+            facet (str): Column to group by, e.g. 'club_clean' or 'edition'
+            bin_minutes (int): Width of the intervals in minutes
+
+        Returns:
+            tuple: (keys, labels, counts)
+                - keys: np.ndarray with the facet values, most rows first
+                - labels: list with the 'HH:MM' label of every interval
+                - counts: np.ndarray of shape (facets, intervals)
+        """
+        buckets, _ = self.bucket_times(df, bin_minutes)
+        codes, keys = pd.factorize(df[facet])
+        kept = codes >= 0
+        codes, buckets = codes[kept], buckets[kept]
+        width = int(buckets.max()) + 1 if len(buckets) else 0
+        counts = np.bincount(codes * width + buckets, minlength=len(keys) * width).reshape(len(keys), width)
+
+        present = np.flatnonzero(counts.sum(axis=0))
+        totals = counts.sum(axis=1)
+        order = np.lexsort((np.arange(len(keys)), -totals))
+        labels = format_hhmm(present * int(bin_minutes) * 60)
+        return np.asarray(keys, dtype=object)[order], labels, counts[order][:, present]
+
+    @timed
+    def render_facets(self, df, facet='club_clean', bin_minutes=20, output_dir=None, min_count=1,
+                      grid_columns=0, grid_panels=12, jobs=1):
         """
-        Creates a histogram of completion times grouped in 20-minute intervals.
+        Renders one histogram per facet (club, edition, category...), or grids of them.
+
+        The rows are sorted by facet and published once with map_shared;
+        each worker process attaches to them as read-only views and only
+        receives the row range of its facets, which it counts (on the same
+        intervals as facet_counts) and renders in parallel. Outputs whose
+        counts did not change are not redrawn.
+
+        Args:
+            df (pd.DataFrame): DataFrame with race data and the facet column
+            facet (str): Column to group by
+            bin_minutes (int): Width of the intervals in minutes
+            output_dir (Path): Output directory, img/<facet> if None
+            min_count (int): Facets with fewer rows are skipped
+            grid_columns (int): Panels per row of the small multiples; one
+                file per facet if 0
+            grid_panels (int): Panels per grid file
+            jobs (int): Number of rendering processes (in process if 1)
+
+        Returns:
+            pd.DataFrame: facet, count, path and rendered for every facet
+        """
+        output_dir = Path(output_dir) if output_dir is not None else self.img_path.parent / facet_slug(facet)
+        buckets, _ = self.bucket_times(df, bin_minutes)
+        codes, keys = pd.factorize(df[facet])
+        kept = codes >= 0
+        codes = codes[kept]
+        # Intervals shared by all facets, as in facet_counts
+        present = np.flatnonzero(np.bincount(buckets[kept]))
+        totals = np.bincount(codes, minlength=len(keys))
+        starts = np.cumsum(totals) - totals
+        rows = radix_argsort(codes)
+        dorsals = df['dorsal'].to_numpy()[kept] if 'dorsal' in df.columns else np.zeros(len(codes), np.uint16)
+        table = RaceTable(dorsals[rows], frame_seconds(df)[kept][rows], codes[rows], np.asarray(keys, dtype=object))
+
+        # Most rows first, ties by first appearance
+        order = np.lexsort((np.arange(len(keys)), -totals))
+        order = order[totals[order] >= min_count]
+        keys, totals = np.asarray(keys, dtype=object)[order], totals[order]
+        facets = [(str(key), int(starts[code]), int(starts[code] + totals[i]))
+                  for i, (key, code) in enumerate(zip(keys, order))]
+
+        slugs, paths = {}, []
+        for key in keys:
+            slug = facet_slug(key)
+            slugs[slug] = slugs.get(slug, 0) + 1
+            # Keys that differ only in accents or punctuation get a numbered suffix
+            name = slug if slugs[slug] == 1 else f"{slug}_{slugs[slug]}"
+            paths.append(output_dir / f"histograma_{name}.{self.output_format}")
+
+        # Facet plots are smaller and use fixed margins: no extra layout pass
+        options = dict(self.renderer.options(), figsize=self.FACET_FIGSIZE, tight=False)
+        if grid_columns:
+            tasks = []
+            for page, start in enumerate(range(0, len(keys), grid_panels)):
+                panels = facets[start:start + grid_panels]
+                path = output_dir / f"histograma_{facet_slug(facet)}_{page + 1:03d}.{self.output_format}"
+                tasks.append((options, 'grid', panels, bin_minutes, present, path, self.output_format,
+                              grid_columns))
+                paths[start:start + grid_panels] = [path] * len(panels)
+        else:
+            tasks = [(options, 'single', [panel], bin_minutes, present, path, self.output_format, 0)
+                     for panel, path in zip(facets, paths)]
+
+        self.logger.info(f"Rendering {len(tasks)} histograms for {len(keys)} values of '{facet}'...")
+        outputs = map_shared(_render_shared, table, tasks, jobs=jobs if len(tasks) > 1 else 1)
+
+        rendered = dict((str(path), done) for path, done in outputs)
+        return pd.DataFrame({
+            'facet': keys,
+            'count': totals,
+            'path': [str(path) for path in paths],
+            'rendered': [rendered[str(path)] for path in paths],
+        })
+
+    @timed
+    def create_time_histogram(self, df, bin_minutes=20):
+        """
+        Creates a histogram of completion times grouped in fixed-width intervals.
         
         Args:
             df (pd.DataFrame): DataFrame with race data
+            bin_minutes (int): Width of the intervals in minutes (20 by default)
             
         Returns:
             pd.DataFrame: DataFrame with added time_grouped column
         """
         self.logger.info("Creating time histogram...")
-        df_hist = df.copy()
-        df_hist['time_grouped'] = df_hist['time'].apply(self.minutes_002040)
+        df_hist = df.copy(deep=False)
+        buckets, counts = self.bucket_times(df_hist, bin_minutes)
+
+        # Label only the non-empty intervals and map rows to them by code
+        present = np.flatnonzero(counts)
+        codes = np.cumsum(counts > 0) - 1
+        labels = format_hhmm(present * bin_minutes * 60)
+        df_hist['time_grouped'] = pd.Categorical.from_codes(codes[buckets], categories=labels, ordered=True)
         
         self.logger.info("First 15 rows with grouped times:")
-        print(df_hist[['time', 'time_grouped']].head(15))
+        self.logger.preview(lambda: df_hist[['time', 'time_grouped']].head(15))
         
-        time_freq = df_hist.groupby('time_grouped').size().reset_index(name='count')
-        time_freq = time_freq.sort_values('time_grouped')
+        time_freq = pd.DataFrame({'time_grouped': labels, 'count': counts[present]})
         
         self.logger.info("Frequency table of grouped times:")
-        print(time_freq)
+        self.logger.preview(time_freq)
         
         self.logger.info("Generating histogram plot...")
-        plt.figure(figsize=(15, 6))
-        plt.bar(range(len(time_freq)), time_freq['count'])
-        plt.xticks(range(len(time_freq)), time_freq['time_grouped'], rotation=45)
-        plt.title('Distribution of Race Completion Times')
-        plt.xlabel('Time (HH:MM)')
-        plt.ylabel('Number of Cyclists')
-        plt.grid(True, alpha=0.3)
-        
-        self.img_path.parent.mkdir(exist_ok=True)
-        plt.savefig(self.img_path, bbox_inches='tight')
-        plt.close()
-        
-        self.logger.info(f"Histogram saved to {self.img_path}")
+        path, rendered = self.renderer.render(time_freq, self.img_path, self.output_format)
+        if rendered:
+            self.logger.info(f"Histogram saved to {path}")
+        else:
+            self.logger.info(f"Histogram unchanged, keeping {path}")
         
         return df_hist
 
@@ -1,10 +1,24 @@
+import numpy as np
 import pandas as pd
 import re
-from monegros.utils.logger import Logger
+from functools import lru_cache
+from monegros.src.race_table import RaceTable
+from monegros.src.ranking import counting_sort, radix_argsort
+from monegros.utils.logger import Logger, timed
+from monegros.utils.times import frame_seconds, is_finisher, seconds_to_strings
 
 class ClubAnalyzer:
-    def __init__(self):
+    # Maximum number of distinct club spellings memoized by clean_club
+    CACHE_SIZE = 65536
+
+    def __init__(self, canonical_names=None):
+        """
+        Args:
+            canonical_names (dict): Cleaned club name -> canonical name, applied
+                after cleaning to merge spelling variants (see club_dedup)
+        """
         self.logger = Logger("ClubAnalyzer")
+        self.canonical_names = dict(canonical_names or {})
         self.prefixes = [
             'PEÑA CICLISTA ', 'PENYA CICLISTA ',
             'AGRUPACIÓN CICLISTA ', 'AGRUPACION CICLISTA ',
@@ -29,10 +43,28 @@ class ClubAnalyzer:
             r' A\.D\.$', r' A\.D$', r' AD$',
             r' A\.C\.$', r' A\.C$', r' AC$'
         ]
+        self._compile_patterns()
+
+    def _compile_patterns(self):
+        """
+        Compiles the club patterns once.
+
+        Each pattern list is merged into a single regex used to skip names
+        that match none of its patterns, which is the common case. Names that
+        do match still go through the compiled patterns in order, because
+        removing one affix can expose another ('CC AC X' -> 'AC X' -> 'X').
+        """
+        self._start_regex = re.compile('|'.join(f'(?:{p})' for p in self.start_patterns))
+        self._end_regex = re.compile('|'.join(f'(?:{p})' for p in self.end_patterns))
+        self._start_compiled = [re.compile(p) for p in self.start_patterns]
+        self._end_compiled = [re.compile(p) for p in self.end_patterns]
+        self._clean_cached = lru_cache(maxsize=self.CACHE_SIZE)(self._clean_club)
 
     def clean_club(self, club_name):
         """
         Cleans and standardizes cycling club names.
+
+        Results are memoized, so repeated spellings are only cleaned once.
         
         Args:
             club_name (str): Original club name
@@ -44,6 +76,10 @@ class ClubAnalyzer:
             'C.C. Huesca' -> 'HUESCA'
             'Club Ciclista Oscense' -> 'OSCENSE'
         """
+        return self._clean_cached(club_name)
+
+    def _clean_club(self, club_name):
+        """Uncached implementation of clean_club"""
         if not isinstance(club_name, str):
             return 'INDEPENDIENTE'
         
@@ -52,15 +88,161 @@ class ClubAnalyzer:
         for prefix in self.prefixes:
             cleaned = cleaned.replace(prefix, '')
         
-        for pattern in self.start_patterns:
-            cleaned = re.sub(pattern, '', cleaned)
+        if self._start_regex.search(cleaned):
+            for pattern in self._start_compiled:
+                cleaned = pattern.sub('', cleaned)
         
-        for pattern in self.end_patterns:
-            cleaned = re.sub(pattern, '', cleaned)
+        if self._end_regex.search(cleaned):
+            for pattern in self._end_compiled:
+                cleaned = pattern.sub('', cleaned)
         
         cleaned = cleaned.strip()
         return cleaned if cleaned else 'INDEPENDIENTE'
 
+    def clean_clubs(self, clubs):
+        """
+        Cleans a whole column of club names.
+
+        Only the distinct spellings are cleaned; rows are mapped back to them
+        by their factorized codes. Cleaned names listed in canonical_names are
+        replaced by their canonical name.
+
+        Args:
+            clubs (pd.Series): Original club names
+
+        Returns:
+            pd.Series: Cleaned club names, aligned with clubs
+        """
+        codes, uniques = pd.factorize(clubs)
+        # Missing values get code -1, which picks the trailing INDEPENDIENTE
+        cleaned = np.array([self._clean_canonical(club) for club in uniques] + ['INDEPENDIENTE'], dtype=object)
+        return pd.Series(cleaned[codes], index=clubs.index, name=clubs.name)
+
+    def _clean_canonical(self, club_name):
+        """Cleaned club name, replaced by its canonical name if it has one"""
+        cleaned = self.clean_club(club_name)
+        return self.canonical_names.get(cleaned, cleaned)
+
+    def clean_table(self, table):
+        """
+        Cleans the club name table of a RaceTable.
+
+        Each distinct spelling is cleaned once and spellings that clean to the
+        same name share one entry; the per-row codes are only remapped.
+
+        Args:
+            table (RaceTable): Race results
+
+        Returns:
+            RaceTable: Table whose club names are the cleaned names
+        """
+        return table.map_clubs(self._clean_canonical)
+
+    def club_statistics(self, data, club_column='club_clean'):
+        """
+        Statistics of every club in one grouped pass.
+
+        Rows are ordered once by (club, non-finisher, time) with two radix
+        sorts (time, then club and finisher flag), so each club is a
+        contiguous run whose first row is its best rider and whose middle row
+        is its median; counts and sums come from np.bincount over the codes.
+        Overall positions are computed among all finishers (ties share the
+        best position).
+
+        Args:
+            data (pd.DataFrame or RaceTable): Race data with cleaned clubs
+                (club_column of a dataframe, or a table from clean_table)
+            club_column (str): Column with the cleaned club names
+
+        Returns:
+            pd.DataFrame: One row per club, most participants first, with
+            club, participants, finishers, best_seconds, best_time,
+            median_seconds, mean_seconds, best_dorsal, best_biker (if the
+            data has names) and best_position. Time and best rider columns
+            are missing for clubs without finishers.
+        """
+        seconds = frame_seconds(data).astype(np.int64)
+        if isinstance(data, RaceTable):
+            codes, names = data.club_codes.astype(np.int64), data.club_names
+            dorsals, bikers = data.dorsal, data.biker
+            # Riders without club are grouped under an extra INDEPENDIENTE entry
+            if (codes < 0).any():
+                codes = np.where(codes < 0, len(names), codes)
+                names = np.append(names, 'INDEPENDIENTE')
+            # The name table may hold clubs without riders (a row subset, or
+            # the entry map_clubs adds for riders without club): drop them
+            used = np.bincount(codes, minlength=len(names)) > 0
+            if not used.all():
+                codes = (np.cumsum(used) - 1)[codes]
+                names = np.asarray(names)[used]
+        else:
+            codes, names = pd.factorize(data[club_column])
+            dorsals = data['dorsal'].to_numpy()
+            bikers = data['biker'].to_numpy() if 'biker' in data.columns else None
+        n_clubs = len(names)
+
+        finished = is_finisher(seconds)
+        participants = np.bincount(codes, minlength=n_clubs)
+        finishers = np.bincount(codes, weights=finished, minlength=n_clubs).astype(np.int64)
+        totals = np.bincount(codes, weights=seconds, minlength=n_clubs)
+
+        order = radix_argsort(codes * 2 + ~finished, radix_argsort(seconds))
+        starts = np.concatenate(([0], np.cumsum(participants)[:-1]))
+        has_time = finishers > 0
+        sorted_seconds = seconds[order]
+        low = sorted_seconds[starts + np.maximum(finishers - 1, 0) // 2]
+        high = sorted_seconds[starts + finishers // 2]
+        best_rows = order[starts]
+
+        finisher_seconds = counting_sort(seconds[finished])
+        best_seconds = sorted_seconds[starts]
+        stats = pd.DataFrame({
+            'club': names,
+            'participants': participants,
+            'finishers': finishers,
+            'best_seconds': pd.array(np.where(has_time, best_seconds, np.nan), dtype='Int64'),
+            'best_time': np.where(has_time, seconds_to_strings(best_seconds).astype(object), None),
+            'median_seconds': np.where(has_time, (low + high) / 2, np.nan),
+            'mean_seconds': np.where(has_time, totals / np.maximum(finishers, 1), np.nan),
+            # The first row of a club without finishers is a non-finisher, not its best
+            'best_dorsal': pd.array(np.where(has_time, dorsals[best_rows], np.nan), dtype='Int64'),
+        })
+        if bikers is not None:
+            stats['best_biker'] = np.where(has_time, bikers[best_rows], None)
+        positions = np.searchsorted(finisher_seconds, best_seconds, side='left') + 1
+        stats['best_position'] = pd.array(np.where(has_time, positions, np.nan), dtype='Int64')
+
+        # Most participants first, ties by name, like value_counts
+        stats = stats.iloc[np.lexsort((stats['club'].to_numpy(dtype=str), -participants))]
+        return stats.reset_index(drop=True)
+
+    @staticmethod
+    def top_clubs(stats, k=10, by='participants', ascending=False):
+        """
+        The k best clubs by one statistic, selected without sorting every club.
+
+        np.argpartition picks the k candidates in linear time; only those k
+        rows are then sorted.
+
+        Args:
+            stats (pd.DataFrame): Output of club_statistics
+            k (int): Number of clubs
+            by (str): Statistic to rank by
+            ascending (bool): Smallest values first (e.g. best_position)
+
+        Returns:
+            pd.DataFrame: The k clubs, ranked (clubs with NaN go last)
+        """
+        values = stats[by].to_numpy(dtype=float, na_value=np.nan)
+        values = np.where(np.isnan(values), np.inf, values if ascending else -values)
+        k = min(k, len(values))
+        if k == 0:
+            return stats.iloc[:0]
+        candidates = np.argpartition(values, k - 1)[:k] if k < len(values) else np.arange(len(values))
+        ranked = candidates[np.lexsort((candidates, values[candidates]))]
+        return stats.iloc[ranked].reset_index(drop=True)
+
+    @timed
     def analyze_clubs(self, df):
         """
         Analyzes cycling clubs participation.
@@ -72,17 +254,20 @@ class ClubAnalyzer:
             pd.DataFrame: DataFrame with added club_clean column
         """
         self.logger.info("Starting club analysis...")
-        df_clubs = df.copy()
-        df_clubs['club_clean'] = df_clubs['club'].apply(self.clean_club)
+        df_clubs = df.copy(deep=False)
+        df_clubs['club_clean'] = self.clean_clubs(df_clubs['club'])
         
         self.logger.info("First 15 rows with cleaned club names:")
-        print(df_clubs[['club', 'club_clean']].head(15))
-        
-        club_summary = df_clubs['club_clean'].value_counts().reset_index()
-        club_summary.columns = ['club', 'participants']
+        self.logger.preview(lambda: df_clubs[['club', 'club_clean']].head(15))
         
         self.logger.info("Club participation summary (top 10):")
-        print(club_summary.head(10))
+        self.logger.preview(lambda: df_clubs['club_clean'].value_counts()
+                            .rename_axis('club').reset_index(name='participants').head(10))
+
+        self.logger.info("Fastest clubs (best rider position, top 10):")
+        self.logger.preview(lambda: self.top_clubs(self.club_statistics(df_clubs), 10, by='best_position',
+                                                   ascending=True)[['club', 'participants', 'best_time',
+                                                                    'median_seconds', 'best_position']])
         
         return df_clubs
 
@@ -1,16 +1,25 @@
-import pandas as pd
-from monegros.utils.logger import Logger
+import numpy as np
+from monegros.src.ranking import RankIndex
+from monegros.utils.logger import Logger, timed
+from monegros.utils.times import frame_seconds
 
 class UCSCAnalyzer:
     def __init__(self):
+        self.rank_index = None
         self.logger = Logger("UCSCAnalyzer")
 
-    def analyze_ucsc(self, df):
+    @timed
+    def analyze_ucsc(self, df, club='UCSC', rank_index=None):
         """
-        Analyzes the performance of UCSC (Unió Ciclista Sant Cugat) cyclists.
+        Analyzes the performance of UCSC (Unió Ciclista Sant Cugat) cyclists,
+        or of any other club.
         
         Args:
             df (pd.DataFrame): DataFrame with race data including club_clean column
+            club (str): Cleaned club name to analyze
+            rank_index (RankIndex or KLLSketch): Prebuilt rank index of df,
+                built if None. A KLLSketch gives approximate positions
+                without sorting, e.g. against a whole archive
             
         Returns:
             tuple: (ucsc_df, best_time_df, position_info)
@@ -23,22 +32,27 @@ class UCSCAnalyzer:
             self.logger.error(error_msg)
             raise ValueError(error_msg)
         
-        self.logger.info("Analyzing UCSC cyclists...")
-        ucsc_df = df[df['club_clean'] == 'UCSC'].copy()
+        self.logger.info(f"Analyzing {club} cyclists...")
+        mask = (df['club_clean'] == club).to_numpy()
+        ucsc_df = df[mask]
         
-        self.logger.info("UCSC cyclists:")
-        print(ucsc_df[['dorsal', 'biker', 'time']])
+        self.logger.info(f"{club} cyclists:")
+        self.logger.preview(lambda: ucsc_df[['dorsal', 'biker', 'time']])
         
-        best_time_df = ucsc_df.loc[ucsc_df['time'].idxmin()] if not ucsc_df.empty else None
-        
-        if best_time_df is not None:
-            self.logger.info("Best time for UCSC:")
-            print(f"Biker: {best_time_df['biker']}")
-            print(f"Time: {best_time_df['time']}")
+        if not ucsc_df.empty:
+            seconds = frame_seconds(df)
+            best_time_df = ucsc_df.iloc[int(np.argmin(seconds[mask]))]
+
+            self.logger.info(f"Best time for {club}:")
+            self.logger.preview(f"Biker: {best_time_df['biker']}")
+            self.logger.preview(f"Time: {best_time_df['time']}")
             
-            total_participants = len(df)
-            df_sorted = df.sort_values('time')
-            position = df_sorted.index.get_loc(best_time_df.name) + 1
+            if rank_index is None:
+                rank_index = RankIndex(seconds)
+            self.rank_index = rank_index
+
+            total_participants = rank_index.total
+            position = int(rank_index.position(seconds[mask].min()))
             percentage = (position / total_participants) * 100
             
             position_info = {
@@ -50,7 +64,8 @@ class UCSCAnalyzer:
             self.logger.info(f"Position: {position} out of {total_participants}")
             self.logger.info(f"Top {percentage:.2f}%")
         else:
-            self.logger.warning("No UCSC cyclists found in the dataset")
+            self.logger.warning(f"No {club} cyclists found in the dataset")
+            best_time_df = None
             position_info = None
             
         return ucsc_df, best_time_df, position_info
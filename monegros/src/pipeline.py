@@ -0,0 +1,155 @@
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import pandas as pd
+from monegros.utils.logger import Logger
+
+class Stage:
+    def __init__(self, name, func, depends=(), reads=(), adds=(), title=None):
+        """
+        A step of the analysis pipeline.
+
+        Args:
+            name (str): Unique stage name
+            func (callable): Receives the outputs of the stages in depends,
+                in the same order, and returns the stage output
+            depends (tuple): Names of the stages whose outputs func needs
+            reads (tuple): Columns the stage reads from its input dataframe
+            adds (tuple): Columns the stage adds to its output dataframe
+            title (str): Header printed before the stage runs
+        """
+        self.name = name
+        self.func = func
+        self.depends = tuple(depends)
+        self.reads = tuple(reads)
+        self.adds = tuple(adds)
+        self.title = title
+
+class Pipeline:
+    def __init__(self, stages, max_workers=1):
+        """
+        Runs stages in dependency order and memoizes their outputs.
+
+        Args:
+            stages (list): Stage objects, dependencies first
+            max_workers (int): Number of independent stages run concurrently
+        """
+        self.stages = {}
+        for stage in stages:
+            missing = [dep for dep in stage.depends if dep not in self.stages]
+            if missing:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stages {missing}")
+            self.stages[stage.name] = stage
+        self.max_workers = max_workers
+        self.results = {}
+        self.logger = Logger("Pipeline")
+
+    def resolve(self, targets):
+        """
+        Returns the stages needed for targets, dependencies first.
+
+        Args:
+            targets (list): Names of the stages to run
+
+        Returns:
+            list: Stage names in a valid execution order
+        """
+        order = []
+
+        def visit(name):
+            if name not in self.stages:
+                raise ValueError(f"Unknown stage '{name}'. Expected one of {list(self.stages)}")
+            if name in order:
+                return
+            for dep in self.stages[name].depends:
+                visit(dep)
+            order.append(name)
+
+        for target in targets:
+            visit(target)
+        return order
+
+    def _run_stage(self, stage):
+        """Runs one stage, checking the columns it declares"""
+        inputs = [self.results[dep] for dep in stage.depends]
+        frames = [value for value in inputs if isinstance(value, pd.DataFrame)]
+        if stage.reads and frames:
+            missing = [col for col in stage.reads if col not in frames[0].columns]
+            if missing:
+                raise ValueError(f"Stage '{stage.name}' needs columns {missing}")
+
+        if stage.title:
+            self.logger.preview(f"\n=== {stage.title} ===")
+        output = stage.func(*inputs)
+
+        if stage.adds and isinstance(output, pd.DataFrame):
+            missing = [col for col in stage.adds if col not in output.columns]
+            if missing:
+                raise ValueError(f"Stage '{stage.name}' did not add columns {missing}")
+        return output
+
+    def run(self, targets=None):
+        """
+        Runs the stages needed for targets, skipping memoized ones.
+
+        Stages whose dependencies are done are submitted together, so
+        independent stages run concurrently when max_workers > 1.
+
+        Args:
+            targets (list): Names of the stages to run, all stages if None
+
+        Returns:
+            dict: Outputs of the requested stages by name
+        """
+        targets = list(self.stages) if targets is None else list(targets)
+        pending = [name for name in self.resolve(targets) if name not in self.results]
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            running = {}
+            while pending or running:
+                ready = [name for name in pending
+                         if all(dep in self.results for dep in self.stages[name].depends)]
+                for name in ready[:max(self.max_workers - len(running), 0)]:
+                    pending.remove(name)
+                    running[executor.submit(self._run_stage, self.stages[name])] = name
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    self.results[name] = future.result()
+
+        return {name: self.results[name] for name in targets}
+
+def build_pipeline(loader, anonymizer, histogram, club_analyzer, ucsc_analyzer,
+                   bin_minutes=20, club='UCSC', max_workers=1):
+    """
+    Builds the pipeline of the five exercises.
+
+    Args:
+        loader (DataLoader): Exercise 1
+        anonymizer (DataAnonymizer): Exercise 2
+        histogram (TimeHistogram): Exercise 3
+        club_analyzer (ClubAnalyzer): Exercise 4
+        ucsc_analyzer (UCSCAnalyzer): Exercise 5
+        bin_minutes (int): Width of the histogram intervals in minutes
+        club (str): Club analyzed in exercise 5
+        max_workers (int): Number of independent stages run concurrently
+
+    Returns:
+        Pipeline: Pipeline with stages 'load', 'anonymize', 'histogram',
+        'clubs' and 'ucsc'
+    """
+    return Pipeline([
+        Stage('load', loader.load_and_analyze_data,
+              title="Exercise 1: Data Loading and EDA"),
+        Stage('anonymize', anonymizer.anonymize_and_clean_data, depends=('load',),
+              reads=('biker', 'time'),
+              title="Exercise 2: Data Anonymization and Cleaning"),
+        Stage('histogram', lambda df: histogram.create_time_histogram(df, bin_minutes), depends=('anonymize',),
+              reads=('time',), adds=('time_grouped',),
+              title="Exercise 3: Time Histogram"),
+        Stage('clubs', club_analyzer.analyze_clubs, depends=('anonymize',),
+              reads=('club',), adds=('club_clean',),
+              title="Exercise 4: Cycling Clubs Analysis"),
+        Stage('ucsc', lambda df: ucsc_analyzer.analyze_ucsc(df, club), depends=('clubs',),
+              reads=('club_clean', 'time'),
+              title="Exercise 5: UCSC Analysis"),
+    ], max_workers=max_workers)
@@ -0,0 +1,190 @@
+import sys
+import numpy as np
+import pandas as pd
+from monegros.utils.times import frame_seconds, is_finisher, seconds_to_strings
+
+class RaceTable:
+    def __init__(self, dorsal, seconds, club_codes, club_names, biker=None):
+        """
+        Compact, column-oriented race results.
+
+        Clubs are dictionary encoded: club_codes holds, for every row, the
+        index of its club in club_names (-1 for riders without club), so each
+        spelling is stored once however many riders share it. Without names a
+        row takes 8 to 12 bytes.
+
+        Args:
+            dorsal (array-like): Dorsal of every rider, stored as uint16 when
+                they fit and uint32 otherwise
+            seconds (array-like): Finish time of every rider in seconds (0 for
+                non-finishers), stored as uint32
+            club_codes (array-like): Index into club_names of every rider
+            club_names (array-like): Shared table of club names
+            biker (array-like): Optional rider names (an object or fixed-width
+                unicode array is kept as is)
+        """
+        dorsal = np.asarray(dorsal)
+        dorsal_dtype = np.uint16 if len(dorsal) == 0 or dorsal.max() <= np.iinfo(np.uint16).max else np.uint32
+        self.dorsal = dorsal.astype(dorsal_dtype, copy=False)
+        self.seconds = np.asarray(seconds).astype(np.uint32, copy=False)
+        self.club_names = np.asarray(club_names, dtype=object)
+        code_dtype = np.int16 if len(self.club_names) < np.iinfo(np.int16).max else np.int32
+        self.club_codes = np.asarray(club_codes).astype(code_dtype, copy=False)
+        if biker is not None and not (isinstance(biker, np.ndarray) and biker.dtype.kind in 'OU'):
+            biker = np.asarray(biker, dtype=object)
+        self.biker = biker
+        if not len(self.dorsal) == len(self.seconds) == len(self.club_codes):
+            raise ValueError("RaceTable columns must have the same length")
+        if self.biker is not None and len(self.biker) != len(self.dorsal):
+            raise ValueError("RaceTable columns must have the same length")
+
+    @classmethod
+    def from_frame(cls, df, club_column='club', with_names=False):
+        """
+        Builds a table from a race dataframe.
+
+        A categorical club column (as read by DataLoader) is used as is;
+        other columns are factorized.
+
+        Args:
+            df (pd.DataFrame): DataFrame with dorsal, club_column and
+                'seconds' or 'time'
+            club_column (str): Column with the club of every rider
+            with_names (bool): Keep the 'biker' column
+
+        Returns:
+            RaceTable: The table
+        """
+        clubs = df[club_column]
+        if isinstance(clubs.dtype, pd.CategoricalDtype):
+            codes, names = clubs.cat.codes.to_numpy(), clubs.cat.categories.to_numpy(dtype=object)
+        else:
+            codes, names = pd.factorize(clubs)
+        return cls(
+            df['dorsal'].to_numpy(),
+            frame_seconds(df),
+            codes,
+            names,
+            biker=df['biker'].to_numpy(dtype=object) if with_names else None,
+        )
+
+    def to_frame(self, club_column='club'):
+        """
+        Converts the table to a dataframe with the layout of DataLoader.
+
+        Args:
+            club_column (str): Name of the (categorical) club column
+
+        Returns:
+            pd.DataFrame: dorsal, biker (if kept), club_column, time and seconds
+        """
+        columns = {'dorsal': self.dorsal}
+        if self.biker is not None:
+            columns['biker'] = pd.array(self.biker, dtype='str')
+        columns[club_column] = pd.Categorical.from_codes(self.club_codes, categories=pd.Index(self.club_names))
+        columns['time'] = pd.array(seconds_to_strings(self.seconds), dtype='str')
+        columns['seconds'] = self.seconds
+        return pd.DataFrame(columns)
+
+    def __len__(self):
+        return len(self.dorsal)
+
+    def __getitem__(self, rows):
+        """
+        Selects rows by boolean mask, indices or slice.
+
+        The club name table is shared with the new table, not copied.
+        """
+        return RaceTable(
+            self.dorsal[rows],
+            self.seconds[rows],
+            self.club_codes[rows],
+            self.club_names,
+            biker=None if self.biker is None else self.biker[rows],
+        )
+
+    @property
+    def clubs(self):
+        """Club of every rider as a pd.Categorical (NaN for riders without club)"""
+        return pd.Categorical.from_codes(self.club_codes, categories=pd.Index(self.club_names))
+
+    @property
+    def times(self):
+        """Finish times as 'HH:MM:SS' strings"""
+        return seconds_to_strings(self.seconds)
+
+    def finishers(self):
+        """Table without the non-finishers (DNF_SECONDS)"""
+        return self[is_finisher(self.seconds)]
+
+    def map_clubs(self, func):
+        """
+        Transforms the club names, calling func once per distinct name.
+
+        Names that become equal are merged into one entry of the new table.
+        Riders without club are passed to func as None.
+
+        Args:
+            func (callable): Receives a club name (or None) and returns a name
+
+        Returns:
+            RaceTable: Table with the transformed club names
+        """
+        mapped = [func(name) for name in self.club_names.tolist()] + [func(None)]
+        codes, names = pd.factorize(pd.Series(mapped, dtype=object))
+        codes = codes.astype(np.int32)
+        rows = np.where(self.club_codes < 0, len(self.club_names), self.club_codes)
+        return RaceTable(self.dorsal, self.seconds, codes[rows], names, biker=self.biker)
+
+    def club_counts(self):
+        """
+        Riders per club, like value_counts on the club column.
+
+        Returns:
+            pd.Series: Number of riders by club name, most common first
+        """
+        present = self.club_codes[self.club_codes >= 0]
+        counts = np.bincount(present, minlength=len(self.club_names))
+        order = np.argsort(-counts, kind='stable')
+        order = order[counts[order] > 0]
+        return pd.Series(counts[order], index=pd.Index(self.club_names[order], name='club'), name='count')
+
+    @classmethod
+    def concat(cls, tables):
+        """
+        Concatenates tables, merging their club name tables.
+
+        Args:
+            tables (list): RaceTable objects
+
+        Returns:
+            RaceTable: One table with the rows of all tables in order
+        """
+        tables = list(tables)
+        names, offsets = [], []
+        for table in tables:
+            offsets.append(len(names))
+            names.extend(table.club_names.tolist())
+        merged, uniques = pd.factorize(pd.Series(names, dtype=object))
+        merged = merged.astype(np.int64)
+        codes = [np.where(table.club_codes < 0, -1, merged[np.maximum(table.club_codes, 0) + offset])
+                 for table, offset in zip(tables, offsets)]
+        with_names = tables and all(table.biker is not None for table in tables)
+        return cls(
+            np.concatenate([table.dorsal.astype(np.uint32) for table in tables]) if tables else [],
+            np.concatenate([table.seconds for table in tables]) if tables else [],
+            np.concatenate(codes) if tables else [],
+            uniques,
+            biker=np.concatenate([table.biker for table in tables]) if with_names else None,
+        )
+
+    @property
+    def nbytes(self):
+        """Approximate memory used by the table, including the club name strings"""
+        total = self.dorsal.nbytes + self.seconds.nbytes + self.club_codes.nbytes + self.club_names.nbytes
+        total += sum(sys.getsizeof(name) for name in self.club_names.tolist())
+        if self.biker is not None:
+            total += self.biker.nbytes
+            if self.biker.dtype == object:
+                total += sum(sys.getsizeof(name) for name in self.biker.tolist())
+        return total
@@ -0,0 +1,240 @@
+import numpy as np
+import pandas as pd
+from monegros.utils.times import frame_seconds
+
+# Largest value ordered with a counting sort; finish times (under 48h) are
+# far below it, larger values fall back to np.sort
+COUNTING_LIMIT = 1 << 24
+# Bits sorted per radix pass: NumPy's stable sort is a radix sort on 16 bit keys
+RADIX_BITS = 16
+
+def counting_sort(values):
+    """
+    Sorts non-negative integers in O(n + max) with one np.bincount.
+
+    Args:
+        values (array-like): Non-negative integers, e.g. finish seconds
+
+    Returns:
+        np.ndarray: The values in ascending order, with their dtype
+    """
+    values = np.asarray(values)
+    if len(values) == 0 or values.max() >= COUNTING_LIMIT or values.min() < 0:
+        return np.sort(values)
+    counts = np.bincount(values)
+    return np.repeat(np.arange(len(counts), dtype=values.dtype), counts)
+
+def radix_argsort(values, order=None):
+    """
+    Stable argsort of integers, 16 bits per pass.
+
+    Each pass is a stable sort of uint16 digits, which NumPy runs as a
+    radix sort, so the whole sort is O(n) for bounded values (two passes
+    for finish seconds). Passing the result of a previous sort as order
+    sorts by several keys, the last one sorted being the primary key, like
+    np.lexsort. Negative or non-integer values use NumPy's stable sort.
+
+    Args:
+        values (array-like): Values to sort, ideally non-negative integers
+        order (np.ndarray): Initial permutation of the rows, identity if None
+
+    Returns:
+        np.ndarray: Row indices that sort values, ties kept in order
+    """
+    values = np.asarray(values)
+    order = np.arange(len(values)) if order is None else np.asarray(order)
+    if len(values) == 0:
+        return order
+    if values.dtype.kind not in 'ui' or values.min() < 0:
+        return order[np.argsort(values[order], kind='stable')]
+    high = int(values.max())
+    shift = 0
+    while True:
+        digits = ((values[order] >> shift) & ((1 << RADIX_BITS) - 1)).astype(np.uint16)
+        order = order[np.argsort(digits, kind='stable')]
+        shift += RADIX_BITS
+        if high >> shift == 0:
+            return order
+
+def rank_positions(values, ties='min'):
+    """
+    Position of every value in the ranking, without sorting.
+
+    Counts per value are accumulated once, so the position of a value is
+    the number of lower values (plus one, or plus its ties for 'max').
+
+    Args:
+        values (array-like): Non-negative integers, e.g. finish seconds
+        ties (str): 'min' or 'max', as in RankIndex
+
+    Returns:
+        np.ndarray: Position of every value, 1 being the lowest
+    """
+    values = np.asarray(values)
+    if len(values) == 0:
+        return np.zeros(0, dtype=np.int64)
+    if values.max() >= COUNTING_LIMIT or values.min() < 0:
+        sorted_values = np.sort(values)
+        side = 'left' if ties == 'min' else 'right'
+        return np.searchsorted(sorted_values, values, side=side) + (1 if ties == 'min' else 0)
+    counts = np.bincount(values)
+    cumulative = np.cumsum(counts)
+    return (cumulative - counts + 1)[values] if ties == 'min' else cumulative[values]
+
+class RankIndex:
+    # 'min': tied riders share the best position (1, 2, 2, 4)
+    # 'max': tied riders share the worst position (1, 3, 3, 4)
+    TIES = ('min', 'max')
+
+    def __init__(self, seconds, dorsals=None, clubs=None, ties='min'):
+        """
+        Finish-time rank index built once and queried with binary search.
+
+        Finish seconds are bounded, so the index is built with a counting
+        sort in O(n) instead of a comparison sort.
+
+        Args:
+            seconds (array-like): Finish time of every rider in seconds
+            dorsals (array-like): Dorsal of every rider, for dorsal queries
+            clubs (array-like): Club of every rider, for club queries
+            ties (str): How tied times are ranked, 'min' or 'max'
+        """
+        if ties not in self.TIES:
+            raise ValueError(f"Unknown tie rule '{ties}'. Expected one of {self.TIES}")
+        seconds = np.asarray(seconds, dtype=np.int64)
+        self.ties = ties
+        self.total = len(seconds)
+        self.sorted_seconds = counting_sort(seconds)
+
+        self._dorsals = None
+        if dorsals is not None:
+            dorsals = np.asarray(dorsals)
+            order = radix_argsort(dorsals)
+            self._dorsals = dorsals[order]
+            self._dorsal_seconds = seconds[order]
+
+        self._club_best = None
+        if clubs is not None:
+            if not isinstance(clubs, pd.Categorical):
+                clubs = np.asarray(clubs)
+            self._club_best = pd.Series(seconds).groupby(clubs, observed=True).min()
+
+    @classmethod
+    def from_frame(cls, df, club_column='club_clean', ties='min'):
+        """
+        Builds the index from a race dataframe.
+
+        Args:
+            df (pd.DataFrame): DataFrame with 'seconds' or 'time' and optionally
+                'dorsal' and club_column
+            club_column (str): Column with the club of every rider
+            ties (str): How tied times are ranked, 'min' or 'max'
+
+        Returns:
+            RankIndex: The rank index
+        """
+        return cls(
+            frame_seconds(df),
+            dorsals=df['dorsal'].to_numpy() if 'dorsal' in df.columns else None,
+            clubs=df[club_column].to_numpy() if club_column in df.columns else None,
+            ties=ties,
+        )
+
+    @classmethod
+    def from_table(cls, table, ties='min'):
+        """
+        Builds the index from a RaceTable, grouping clubs by their codes.
+
+        Args:
+            table (RaceTable): Race results
+            ties (str): How tied times are ranked, 'min' or 'max'
+
+        Returns:
+            RankIndex: The rank index
+        """
+        return cls(table.seconds, dorsals=table.dorsal, clubs=table.clubs, ties=ties)
+
+    def position(self, seconds):
+        """
+        Position of a finish time, 1 being the fastest.
+
+        Args:
+            seconds (int or array-like): Finish time(s) in seconds
+
+        Returns:
+            int or np.ndarray: Position(s) in the ranking
+        """
+        side = 'left' if self.ties == 'min' else 'right'
+        offset = 1 if self.ties == 'min' else 0
+        return np.searchsorted(self.sorted_seconds, seconds, side=side) + offset
+
+    def percentage(self, seconds):
+        """
+        Position of a finish time as a percentage of all riders ('top X%').
+
+        Args:
+            seconds (int or array-like): Finish time(s) in seconds
+
+        Returns:
+            float or np.ndarray: Position / total * 100
+        """
+        return self.position(seconds) / self.total * 100
+
+    def dorsal_seconds(self, dorsals):
+        """
+        Finish time of one or more dorsals.
+
+        Args:
+            dorsals (int or array-like): Dorsal(s) to look up
+
+        Returns:
+            int or np.ndarray: Finish time(s) in seconds
+
+        Raises:
+            ValueError: If the index has no dorsals
+            KeyError: If a dorsal is not in the index
+        """
+        if self._dorsals is None:
+            raise ValueError("Rank index was built without dorsals")
+        dorsals = np.asarray(dorsals)
+        loc = np.minimum(np.searchsorted(self._dorsals, dorsals), max(len(self._dorsals) - 1, 0))
+        found = self._dorsals[loc] == dorsals if len(self._dorsals) else np.zeros(dorsals.shape, dtype=bool)
+        if not np.all(found):
+            raise KeyError(f"Unknown dorsal(s): {np.atleast_1d(dorsals)[~np.atleast_1d(found)].tolist()}")
+        return self._dorsal_seconds[loc]
+
+    def dorsal_position(self, dorsals):
+        """
+        Position of one or more dorsals.
+
+        Args:
+            dorsals (int or array-like): Dorsal(s) to look up
+
+        Returns:
+            int or np.ndarray: Position(s) in the ranking
+        """
+        return self.position(self.dorsal_seconds(dorsals))
+
+    def club_best(self, club):
+        """
+        Best finish time and position of a club.
+
+        Args:
+            club (str): Club name as stored in the index
+
+        Returns:
+            dict: seconds, position, total and percentage of the club's best
+            rider, or None if the club is not in the index
+        """
+        if self._club_best is None:
+            raise ValueError("Rank index was built without clubs")
+        if club not in self._club_best.index:
+            return None
+        seconds = int(self._club_best[club])
+        position = int(self.position(seconds))
+        return {
+            'seconds': seconds,
+            'position': position,
+            'total': self.total,
+            'percentage': position / self.total * 100,
+        }
@@ -0,0 +1,291 @@
+import asyncio
+import json
+from urllib.parse import urlsplit, parse_qs, unquote
+from monegros.src.ex1_data import DataLoader
+from monegros.src.ex2_anonymize import DataAnonymizer
+from monegros.src.ex3_histogram import TimeHistogram
+from monegros.src.ex4_clubs import ClubAnalyzer
+from monegros.src.ex5_ucsc import UCSCAnalyzer
+from monegros.src.pipeline import build_pipeline
+from monegros.src.ranking import RankIndex, radix_argsort, rank_positions
+from monegros.utils.logger import Logger
+from monegros.utils.times import frame_seconds, parse_time
+
+class RaceIndex:
+    def __init__(self, df, bin_minutes=20, featured=None):
+        """
+        In-memory indexes over the analyzed race data, built once.
+
+        Riders are sorted by finish time, so a club leaderboard is a list of
+        row numbers into the same arrays. Rows are ordered with radix sorts and
+        positions come from counts per finish second, in linear time.
+        Queries never touch the dataframe.
+
+        Args:
+            df (pd.DataFrame): Output of the clubs stage (dorsal, biker,
+                club_clean, time and optionally seconds)
+            bin_minutes (int): Width of the histogram intervals in minutes
+            featured (dict): Club result of UCSCAnalyzer (club, position,
+                total, percentage), if any
+        """
+        seconds = frame_seconds(df)
+        dorsals = df['dorsal'].to_numpy()
+        order = radix_argsort(seconds, radix_argsort(dorsals))
+        self.rank_index = RankIndex(seconds, dorsals, df['club_clean'].to_numpy())
+        self.total = len(order)
+        self.featured = featured
+
+        # Plain Python values, ready to be serialized
+        self.seconds = seconds[order].tolist()
+        self.positions = rank_positions(seconds)[order].tolist()
+        self.dorsals = dorsals[order].tolist()
+        self.bikers = df['biker'].to_numpy()[order].tolist()
+        self.clubs = df['club_clean'].to_numpy()[order].tolist()
+        self.times = df['time'].to_numpy()[order].tolist()
+
+        self._by_dorsal = {dorsal: row for row, dorsal in enumerate(self.dorsals)}
+        self._club_rows = {}
+        for row, club in enumerate(self.clubs):
+            self._club_rows.setdefault(club, []).append(row)
+        self._club_table = sorted(((club, len(rows)) for club, rows in self._club_rows.items()),
+                                  key=lambda item: (-item[1], item[0]))
+
+        frequencies = TimeHistogram().time_frequencies(df, bin_minutes)
+        self._histogram = [{'time_grouped': interval, 'count': count} for interval, count in
+                           zip(frequencies['time_grouped'].tolist(), frequencies['count'].tolist())]
+
+    def _rider(self, row):
+        """JSON-ready record of a rider by row number"""
+        return {
+            'dorsal': self.dorsals[row],
+            'biker': self.bikers[row],
+            'club': self.clubs[row],
+            'time': self.times[row],
+            'seconds': self.seconds[row],
+            'position': self.positions[row],
+            'percentage': self.positions[row] / self.total * 100,
+        }
+
+    def rider(self, dorsal):
+        """
+        Rider lookup by dorsal.
+
+        Raises:
+            KeyError: If no finisher has the dorsal
+        """
+        return self._rider(self._by_dorsal[dorsal])
+
+    def club(self, club, limit=10):
+        """
+        Leaderboard of a club.
+
+        Args:
+            club (str): Cleaned club name
+            limit (int): Number of riders returned
+
+        Returns:
+            dict: club, participants, best (position info) and riders
+
+        Raises:
+            KeyError: If the club has no finishers
+        """
+        rows = self._club_rows[club]
+        return {
+            'club': club,
+            'participants': len(rows),
+            'best': self.rank_index.club_best(club),
+            'riders': [self._rider(row) for row in rows[:limit]],
+        }
+
+    def clubs_table(self, limit=10):
+        """Clubs with the most participants"""
+        return [{'club': club, 'participants': count} for club, count in self._club_table[:limit]]
+
+    def histogram(self):
+        """Non-empty histogram intervals with their number of riders"""
+        return self._histogram
+
+    def position(self, seconds):
+        """Position, total and percentage a finish time would get"""
+        position = int(self.rank_index.position(seconds))
+        return {'seconds': seconds, 'position': position, 'total': self.total,
+                'percentage': position / self.total * 100}
+
+def build_index(data_path=None, engine='c', use_cache=True, bin_minutes=20, club='UCSC',
+                pseudonym_key=None, canonical_names=None, validator=None):
+    """
+    Runs the pipeline once (without rendering the histogram) and indexes its output.
+
+    Args:
+        data_path (Path): Race CSV, the package dataset if None
+        engine (str): CSV parser engine
+        use_cache (bool): Use the typed dataset cache
+        bin_minutes (int): Width of the histogram intervals in minutes
+        club (str): Club analyzed by UCSCAnalyzer, served at /summary
+        pseudonym_key (str): Key for hash-based pseudonyms, random names if None
+        canonical_names (dict): Club name mapping applied by ClubAnalyzer
+        validator (DataValidator): Checks the dataset after reading it
+
+    Returns:
+        RaceIndex: Indexes of the analyzed data
+    """
+    pipeline = build_pipeline(
+        DataLoader(data_path, engine=engine, use_cache=use_cache, validator=validator),
+        DataAnonymizer(mode='hash', key=pseudonym_key) if pseudonym_key else DataAnonymizer(),
+        TimeHistogram(),
+        ClubAnalyzer(canonical_names),
+        UCSCAnalyzer(),
+        bin_minutes=bin_minutes,
+        club=club,
+    )
+    results = pipeline.run(['clubs', 'ucsc'])
+    _, _, position_info = results['ucsc']
+    return RaceIndex(results['clubs'], bin_minutes, dict(position_info or {}, club=club))
+
+class QueryService:
+    # Largest request head accepted, and largest body discarded on a kept-alive connection, in bytes
+    MAX_HEAD = 8192
+
+    def __init__(self, index, host='127.0.0.1', port=8080):
+        """
+        Asyncio HTTP/1.1 service answering JSON queries from a RaceIndex.
+
+        Every query is answered from memory without blocking, so a single
+        event loop serves many concurrent keep-alive clients.
+
+        Routes (GET only):
+            /health, /summary, /histogram
+            /riders/{dorsal}
+            /clubs?limit=N
+            /clubs/{club}?limit=N
+            /position?time=HH:MM:SS or /position?seconds=N
+
+        Args:
+            index (RaceIndex): Indexed race data
+            host (str): Interface to listen on
+            port (int): Port to listen on, 0 for any free port
+        """
+        self.index = index
+        self.host = host
+        self.port = port
+        self.server = None
+        self.logger = Logger("QueryService")
+
+    def route(self, path, query):
+        """
+        Answers one query.
+
+        Args:
+            path (str): Decoded URL path
+            query (dict): Query string parameters (first value of each)
+
+        Returns:
+            tuple: (HTTP status, JSON-ready body)
+        """
+        parts = [part for part in path.split('/') if part]
+        limit = query.get('limit', '10')
+        if not limit.isdecimal():
+            return 400, {'error': f"Expected a non-negative integer limit, got '{limit}'"}
+        limit = int(limit)
+        try:
+            if parts == ['health']:
+                return 200, {'status': 'ok', 'riders': self.index.total}
+            if parts == ['summary']:
+                return 200, self.index.featured
+            if parts == ['histogram']:
+                return 200, self.index.histogram()
+            if parts == ['clubs']:
+                return 200, self.index.clubs_table(limit)
+            if len(parts) == 2 and parts[0] == 'clubs':
+                return 200, self.index.club(parts[1], limit)
+            if len(parts) == 2 and parts[0] == 'riders':
+                return 200, self.index.rider(int(parts[1]))
+            if parts == ['position']:
+                if 'time' in query:
+                    return 200, self.index.position(parse_time(query['time']))
+                if 'seconds' in query:
+                    return 200, self.index.position(int(query['seconds']))
+                return 400, {'error': "Expected a 'time' or 'seconds' parameter"}
+        except KeyError as e:
+            return 404, {'error': f"Not found: {e}"}
+        except ValueError as e:
+            return 400, {'error': str(e)}
+        return 404, {'error': f"Unknown route '{path}'"}
+
+    async def handle(self, reader, writer):
+        """Serves the requests of one connection until the client closes it"""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                lines = head.decode('latin-1').split('\r\n')
+                try:
+                    method, target, version = lines[0].split(' ')
+                except ValueError:
+                    await self._respond(writer, 400, {'error': 'Malformed request line'}, False)
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                keep_alive = (headers.get('connection', '').lower() != 'close'
+                              and version == 'HTTP/1.1')
+
+                # Request bodies are never used, but must not be parsed as the
+                # next request: small ones are discarded, otherwise the
+                # connection is closed after the response
+                length = headers.get('content-length', '0')
+                if 'transfer-encoding' in headers or not length.isdecimal() or int(length) > self.MAX_HEAD:
+                    keep_alive = False
+                elif int(length):
+                    try:
+                        await reader.readexactly(int(length))
+                    except asyncio.IncompleteReadError:
+                        break
+
+                if method != 'GET':
+                    status, body = 405, {'error': f"Method {method} not allowed"}
+                else:
+                    url = urlsplit(target)
+                    query = {key: values[0] for key, values in parse_qs(url.query).items()}
+                    status, body = self.route(unquote(url.path), query)
+                await self._respond(writer, status, body, keep_alive)
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, body, keep_alive):
+        """Writes a JSON response"""
+        reasons = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed'}
+        payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        writer.write(
+            f"HTTP/1.1 {status} {reasons[status]}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + payload
+        )
+        await writer.drain()
+
+    async def start(self):
+        """Starts listening; the bound port is stored in self.port"""
+        self.server = await asyncio.start_server(self.handle, self.host, self.port, limit=self.MAX_HEAD)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.logger.info(f"Serving {self.index.total} riders on http://{self.host}:{self.port}")
+        return self.server
+
+    async def serve_forever(self):
+        """Starts the service and serves until cancelled"""
+        await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def stop(self):
+        """Stops listening and waits for the server to close"""
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
@@ -0,0 +1,217 @@
+import atexit
+import os
+import sys
+import tempfile
+import uuid
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from pathlib import Path
+import numpy as np
+from monegros.src.race_table import RaceTable
+from monegros.utils.logger import Logger
+
+# Numeric columns of a RaceTable published into the shared buffer
+COLUMNS = ('dorsal', 'seconds', 'club_codes', 'biker')
+# Column offsets are aligned so every view is properly aligned
+ALIGNMENT = 64
+
+# Segments attached by this process, by name: (buffer owner, table)
+_attached = {}
+# Attachments that could not be closed because views were still in use
+_lingering = []
+
+def _layout(table):
+    """
+    Offsets of the table columns inside one buffer.
+
+    Returns:
+        tuple: (list of (column, dtype, length, offset), total size in bytes)
+    """
+    layout, offset = [], 0
+    for column in COLUMNS:
+        values = getattr(table, column)
+        if values is None:
+            continue
+        if values.dtype == object:
+            # Names are stored as fixed-width unicode, which can be shared
+            values = values.astype(str)
+        layout.append((column, values.dtype.str, len(values), offset))
+        offset += -(-values.nbytes // ALIGNMENT) * ALIGNMENT
+    return layout, max(offset, 1)
+
+def _views(buffer, handle):
+    """Read-only RaceTable over a buffer laid out as described by handle"""
+    columns = {}
+    for column, dtype, length, offset in handle['columns']:
+        view = np.ndarray((length,), dtype=np.dtype(dtype), buffer=buffer, offset=offset)
+        view.flags.writeable = False
+        columns[column] = view
+    return RaceTable(columns['dorsal'], columns['seconds'], columns['club_codes'],
+                     handle['club_names'], biker=columns.get('biker'))
+
+def _release(segment, path):
+    """Closes and removes the owner's segment or file (idempotent)"""
+    if segment is not None:
+        try:
+            segment.close()
+        except BufferError:
+            pass
+        try:
+            segment.unlink()
+        except FileNotFoundError:
+            pass
+    if path is not None:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+class SharedTable:
+    BACKENDS = ('shm', 'mmap')
+
+    def __init__(self, table, backend='shm', directory=None):
+        """
+        Publishes the columns of a RaceTable once for worker processes.
+
+        The dorsal, seconds, club code (and name) columns are copied into one
+        shared memory segment ('shm') or one memory-mapped file ('mmap') and
+        workers attach to them as read-only NumPy views, without pickling or
+        copying the rows. Only the small club name table travels with the handle.
+
+        The owner removes the segment when closed, when used as a context
+        manager, when garbage collected or at interpreter exit, so segments
+        are not leaked.
+
+        Args:
+            table (RaceTable): Table to publish
+            backend (str): 'shm' (multiprocessing.shared_memory) or 'mmap'
+            directory (Path): Directory of the mapped file, the system temporary
+                directory if None (mmap backend only)
+        """
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}'. Expected one of {self.BACKENDS}")
+        self.logger = Logger("SharedTable")
+        layout, size = _layout(table)
+        self.segment = None
+        self.path = None
+
+        if backend == 'shm':
+            self.segment = shared_memory.SharedMemory(create=True, size=size)
+            buffer, name = self.segment.buf, self.segment.name
+        else:
+            directory = Path(directory) if directory is not None else Path(tempfile.gettempdir())
+            self.path = directory / f"monegros_{uuid.uuid4().hex}.bin"
+            with open(self.path, 'wb') as f:
+                f.truncate(size)
+            buffer = np.memmap(self.path, dtype=np.uint8, mode='r+', shape=(size,))
+            name = str(self.path)
+
+        for column, dtype, length, offset in layout:
+            target = np.ndarray((length,), dtype=np.dtype(dtype), buffer=buffer, offset=offset)
+            target[:] = getattr(table, column)
+        del target
+        if backend == 'mmap':
+            buffer.flush()
+            del buffer
+
+        self.handle = {
+            'backend': backend,
+            'name': name,
+            'size': size,
+            'columns': layout,
+            'club_names': table.club_names.tolist(),
+        }
+        self._finalizer = weakref.finalize(self, _release, self.segment, self.path)
+        self.logger.debug("Published %d rows (%.1f MB) to %s '%s'", len(table), size / 1024 ** 2, backend, name)
+
+    def close(self):
+        """Removes the shared segment or file; attached workers keep their mapping"""
+        self._finalizer()
+
+    @property
+    def closed(self):
+        return not self._finalizer.alive
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def attach(handle):
+    """
+    Read-only RaceTable over a published table, without copying.
+
+    Attachments are kept per process, so every task of a worker reuses the
+    same mapping; they are closed by detach or at process exit.
+
+    Args:
+        handle (dict): SharedTable.handle
+
+    Returns:
+        RaceTable: Table whose columns are read-only views of the shared buffer
+    """
+    name = handle['name']
+    if name in _attached:
+        return _attached[name][1]
+    if handle['backend'] == 'shm':
+        # Workers started by multiprocessing share the owner's resource
+        # tracker, so attaching does not make them remove the segment
+        kwargs = {'track': False} if sys.version_info >= (3, 13) else {}
+        owner = shared_memory.SharedMemory(name=name, **kwargs)
+        buffer = owner.buf
+    else:
+        owner = np.memmap(name, dtype=np.uint8, mode='r', shape=(handle['size'],))
+        buffer = owner
+    table = _views(buffer, handle)
+    _attached[name] = (owner, table)
+    return table
+
+def detach(name=None):
+    """
+    Closes the attachments of this process.
+
+    Args:
+        name (str): Segment to close, all of them if None
+    """
+    names = list(_attached) if name is None else [name]
+    for key in names:
+        owner = _attached.pop(key, (None, None))[0]
+        if isinstance(owner, shared_memory.SharedMemory):
+            try:
+                owner.close()
+            except BufferError:
+                # Views are still referenced; the mapping goes away with the process
+                _lingering.append(owner)
+
+atexit.register(detach)
+
+def _run_task(handle, func, arg):
+    """Worker side of map_shared"""
+    return func(attach(handle), arg)
+
+def map_shared(func, table, args, jobs=1, backend='shm'):
+    """
+    Runs func(table, arg) for every arg in worker processes sharing the table.
+
+    The table is published once; each task only sends the handle, func and
+    its argument to the workers.
+
+    Args:
+        func (callable): Picklable function receiving a read-only RaceTable
+            and one argument
+        table (RaceTable): Table shared with the workers
+        args (iterable): One argument per task
+        jobs (int): Number of worker processes (in process if 1)
+        backend (str): 'shm' or 'mmap'
+
+    Returns:
+        list: Results of func, in the order of args
+    """
+    args = list(args)
+    if jobs <= 1:
+        return [func(table, arg) for arg in args]
+    with SharedTable(table, backend=backend) as shared:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            return list(executor.map(_run_task, [shared.handle] * len(args), [func] * len(args), args))
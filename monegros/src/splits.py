@@ -0,0 +1,316 @@
+import numpy as np
+import pandas as pd
+from monegros.src.ex3_histogram import TimeHistogram
+from monegros.utils.logger import Logger, timed
+from monegros.utils.times import DNF_SECONDS, parse_seconds, seconds_to_strings
+
+# Rider columns of a split-time file; every other column of a wide file is a checkpoint
+RIDER_COLUMNS = ('dorsal', 'biker', 'club')
+
+def _parse_splits(values):
+    """
+    Parses split times at once, missing and DNF ('00:00:00') times as NaN.
+
+    Args:
+        values (pd.Series): 'HH:MM:SS' strings, possibly missing or empty
+
+    Returns:
+        np.ndarray: Seconds as float64
+    """
+    values = values.astype(object)
+    present = (values.notna() & (values.astype(str).str.strip() != '')).to_numpy()
+    seconds = np.full(len(values), np.nan)
+    seconds[present] = parse_seconds(values[present].astype(str).str.strip())
+    seconds[seconds == DNF_SECONDS] = np.nan
+    return seconds
+
+class SplitTimes:
+    def __init__(self, dorsal, checkpoints, elapsed, distances=None, riders=None):
+        """
+        Elapsed times of every rider at every checkpoint.
+
+        Times are a riders x checkpoints float matrix of seconds since the
+        start, NaN where a checkpoint was not recorded (or the rider did not
+        get there), so every computation is a 2-D array operation.
+
+        Args:
+            dorsal (array-like): Dorsal of every rider
+            checkpoints (list): Checkpoint names, in course order
+            elapsed (array-like): Seconds since the start, shape (riders, checkpoints)
+            distances (array-like): Distance of every checkpoint from the start
+                in km, needed for paces
+            riders (pd.DataFrame): Other rider columns (biker, club), one row per rider
+        """
+        self.dorsal = np.asarray(dorsal)
+        self.checkpoints = list(checkpoints)
+        self.elapsed = np.asarray(elapsed, dtype=np.float64).reshape(len(self.dorsal), len(self.checkpoints))
+        self.distances = None if distances is None else np.asarray(distances, dtype=np.float64)
+        if self.distances is not None and len(self.distances) != len(self.checkpoints):
+            raise ValueError("There must be one distance per checkpoint")
+        self.riders = riders.reset_index(drop=True) if riders is not None else None
+
+    @classmethod
+    def from_wide(cls, df, distances=None):
+        """
+        Builds the splits from one row per rider and one column per checkpoint.
+
+        Columns other than dorsal, biker and club are checkpoints, in file
+        order; the 'time' column (total time) is the 'finish' checkpoint.
+
+        Args:
+            df (pd.DataFrame): Wide split-time data
+            distances (array-like): Distance of every checkpoint in km
+
+        Returns:
+            SplitTimes: The split times
+        """
+        columns = [col for col in df.columns if col not in RIDER_COLUMNS]
+        elapsed = _parse_splits(pd.Series(df[columns].to_numpy().ravel())).reshape(len(df), len(columns))
+        checkpoints = ['finish' if col == 'time' else col for col in columns]
+        riders = df[[col for col in RIDER_COLUMNS[1:] if col in df.columns]]
+        return cls(df['dorsal'].to_numpy(), checkpoints, elapsed, distances, riders)
+
+    @classmethod
+    def from_long(cls, df, checkpoints=None, distances=None):
+        """
+        Builds the splits from one row per rider and checkpoint.
+
+        Args:
+            df (pd.DataFrame): dorsal, checkpoint and time columns (biker and
+                club optional, taken from the first row of every rider)
+            checkpoints (list): Checkpoint order; if None, checkpoints are
+                ordered by their median elapsed time
+            distances (array-like): Distance of every checkpoint in km, in
+                the same order
+
+        Returns:
+            SplitTimes: The split times, riders in order of first appearance
+
+        Raises:
+            ValueError: If a row names a checkpoint missing from checkpoints
+        """
+        rider_codes, dorsals = pd.factorize(df['dorsal'])
+        if checkpoints is None:
+            point_codes, names = pd.factorize(df['checkpoint'])
+            names = list(names)
+        else:
+            names = list(checkpoints)
+            point_codes = pd.Index(names).get_indexer(df['checkpoint'])
+            if (point_codes < 0).any():
+                unknown = df['checkpoint'][point_codes < 0].unique().tolist()
+                raise ValueError(f"Unknown checkpoints {unknown}. Expected one of {names}")
+
+        elapsed = np.full((len(dorsals), len(names)), np.nan)
+        elapsed[rider_codes, point_codes] = _parse_splits(df['time'])
+        if checkpoints is None:
+            with np.errstate(all='ignore'):
+                order = np.argsort(np.nanmedian(np.where(np.isnan(elapsed).all(axis=0), np.inf, elapsed), axis=0),
+                                   kind='stable')
+            elapsed, names = elapsed[:, order], [names[i] for i in order]
+
+        rider_columns = [col for col in RIDER_COLUMNS[1:] if col in df.columns]
+        first_rows = np.unique(rider_codes, return_index=True)[1]
+        riders = df[rider_columns].iloc[first_rows] if rider_columns else None
+        return cls(np.asarray(dorsals), names, elapsed, distances, riders)
+
+    def __len__(self):
+        return len(self.dorsal)
+
+    def to_frame(self, values, as_time=False):
+        """
+        Wide dataframe of a riders x checkpoints matrix.
+
+        Args:
+            values (np.ndarray): Matrix with one column per checkpoint
+            as_time (bool): Format the values as 'HH:MM:SS' (missing as None)
+
+        Returns:
+            pd.DataFrame: dorsal followed by one column per checkpoint
+        """
+        frame = pd.DataFrame({'dorsal': self.dorsal})
+        for column, name in enumerate(self.checkpoints):
+            data = values[:, column]
+            if as_time:
+                missing = np.isnan(data)
+                data = np.where(missing, None, seconds_to_strings(np.where(missing, 0, data)).astype(object))
+            frame[name] = data
+        return frame
+
+    def to_long(self):
+        """
+        One row per recorded split.
+
+        Returns:
+            pd.DataFrame: dorsal, checkpoint (ordered categorical) and seconds
+        """
+        rows, columns = np.nonzero(~np.isnan(self.elapsed))
+        return pd.DataFrame({
+            'dorsal': self.dorsal[rows],
+            'checkpoint': pd.Categorical.from_codes(columns, categories=self.checkpoints, ordered=True),
+            'seconds': self.elapsed[rows, columns].astype(np.int64),
+        })
+
+def column_ranks(values):
+    """
+    Rank of every value within its column, 1 being the lowest ('min' ties).
+
+    All columns are ranked with one sort and one binary search: each
+    column is shifted into its own value range and the matrix is
+    flattened. Missing values (NaN) get rank 0.
+
+    Args:
+        values (np.ndarray): Matrix of shape (rows, columns)
+
+    Returns:
+        np.ndarray: int64 ranks with the shape of values
+    """
+    values = np.asarray(values, dtype=np.float64)
+    rows, columns = values.shape
+    missing = np.isnan(values)
+    if missing.all():
+        return np.zeros(values.shape, dtype=np.int64)
+    low, high = np.nanmin(values), np.nanmax(values)
+    span = high - low + 1
+    # Missing values go after every value of their column
+    shifted = np.where(missing, span, values - low) + np.arange(columns) * (span + 1)
+    flat = np.sort(shifted, axis=None)
+    starts = np.arange(columns) * rows
+    ranks = np.searchsorted(flat, shifted.T.ravel(), side='left').reshape(columns, rows).T - starts + 1
+    return np.where(missing, 0, ranks)
+
+class SplitAnalyzer:
+    def __init__(self, histogram=None):
+        """
+        Segment and checkpoint analysis of split times.
+
+        Every result is computed on the whole riders x checkpoints matrix at
+        once, without looping over riders.
+
+        Args:
+            histogram (TimeHistogram): Buckets the checkpoint times
+        """
+        self.histogram = histogram or TimeHistogram()
+        self.logger = Logger("SplitAnalyzer")
+
+    @staticmethod
+    def segment_durations(splits):
+        """
+        Time spent on every segment (start to first checkpoint, then between checkpoints).
+
+        A segment is missing (NaN) if either of its ends is missing or if
+        the elapsed times go backwards.
+
+        Returns:
+            np.ndarray: Seconds, shape (riders, checkpoints)
+        """
+        elapsed = splits.elapsed
+        durations = np.diff(elapsed, axis=1, prepend=np.zeros((len(elapsed), 1)))
+        return np.where(durations > 0, durations, np.nan)
+
+    def paces(self, splits):
+        """
+        Pace on every segment in seconds per km.
+
+        Returns:
+            np.ndarray: Seconds per km, shape (riders, checkpoints)
+
+        Raises:
+            ValueError: If the splits have no checkpoint distances
+        """
+        if splits.distances is None:
+            raise ValueError("Paces need the distance of every checkpoint")
+        lengths = np.diff(splits.distances, prepend=0.0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(lengths > 0, self.segment_durations(splits) / lengths, np.nan)
+
+    def segment_ranks(self, splits):
+        """Rank of every rider on every segment (0 where the segment is missing)"""
+        return column_ranks(self.segment_durations(splits))
+
+    @staticmethod
+    def positions(splits):
+        """Position of every rider at every checkpoint (0 where not recorded)"""
+        return column_ranks(splits.elapsed)
+
+    @staticmethod
+    def gaps(splits):
+        """
+        Seconds behind the leader of every checkpoint.
+
+        Returns:
+            np.ndarray: Gaps, NaN where the checkpoint was not recorded
+        """
+        elapsed = splits.elapsed
+        recorded = ~np.isnan(elapsed).all(axis=0)
+        leaders = np.full(elapsed.shape[1], np.nan)
+        leaders[recorded] = np.nanmin(elapsed[:, recorded], axis=0)
+        return elapsed - leaders
+
+    def checkpoint_histograms(self, splits, bin_minutes=20):
+        """
+        Histogram of the elapsed times at every checkpoint, with TimeHistogram's buckets.
+
+        Args:
+            splits (SplitTimes): Split times
+            bin_minutes (int): Width of the intervals in minutes
+
+        Returns:
+            pd.DataFrame: time_grouped followed by one count column per checkpoint
+        """
+        keys, labels, counts = self.histogram.facet_counts(splits.to_long(), 'checkpoint', bin_minutes)
+        frame = pd.DataFrame({'time_grouped': labels})
+        by_checkpoint = dict(zip([str(key) for key in keys], counts))
+        for name in splits.checkpoints:
+            frame[name] = by_checkpoint.get(name, np.zeros(len(labels), dtype=np.int64))
+        return frame
+
+    def leaders(self, splits):
+        """
+        Leader of every checkpoint.
+
+        Returns:
+            pd.DataFrame: checkpoint, dorsal, time and riders recorded
+        """
+        elapsed = splits.elapsed
+        recorded = ~np.isnan(elapsed)
+        rows = np.argmin(np.where(recorded, elapsed, np.inf), axis=0)
+        best = elapsed[rows, np.arange(elapsed.shape[1])]
+        has_leader = recorded.any(axis=0)
+        return pd.DataFrame({
+            'checkpoint': splits.checkpoints,
+            'dorsal': np.where(has_leader, splits.dorsal[rows], None),
+            'time': np.where(has_leader, seconds_to_strings(np.where(has_leader, best, 0)).astype(object), None),
+            'recorded': recorded.sum(axis=0),
+        })
+
+    @timed
+    def analyze_splits(self, splits, bin_minutes=20):
+        """
+        Segment durations, paces, ranks, gaps and checkpoint histograms.
+
+        Args:
+            splits (SplitTimes): Split times
+            bin_minutes (int): Width of the histogram intervals in minutes
+
+        Returns:
+            dict: durations, paces (if the distances are known),
+            segment_ranks, positions and gaps as wide dataframes, and the
+            leaders and histograms tables
+        """
+        self.logger.info(f"Analyzing {len(splits)} riders over {len(splits.checkpoints)} checkpoints...")
+        results = {
+            'durations': splits.to_frame(self.segment_durations(splits), as_time=True),
+            'segment_ranks': splits.to_frame(self.segment_ranks(splits)),
+            'positions': splits.to_frame(self.positions(splits)),
+            'gaps': splits.to_frame(self.gaps(splits)),
+            'leaders': self.leaders(splits),
+            'histograms': self.checkpoint_histograms(splits, bin_minutes),
+        }
+        if splits.distances is not None:
+            results['paces'] = splits.to_frame(self.paces(splits))
+
+        self.logger.info("Leader at every checkpoint:")
+        self.logger.preview(results['leaders'])
+        self.logger.info("Checkpoint histograms:")
+        self.logger.preview(results['histograms'])
+        return results
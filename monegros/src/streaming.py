@@ -0,0 +1,257 @@
+import json
+import time
+from collections import Counter
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from monegros.src.ex4_clubs import ClubAnalyzer
+from monegros.utils.logger import Logger
+from monegros.utils.times import DNF_SECONDS, parse_time, format_hhmm
+
+class FenwickTree:
+    def __init__(self, size):
+        """
+        Binary indexed tree of counts over the integers 0..size-1.
+
+        Args:
+            size (int): Number of distinct values
+        """
+        self.size = size
+        self.tree = np.zeros(size + 1, dtype=np.int64)
+        self.total = 0
+
+    def add(self, value, count=1):
+        """Adds count occurrences of value, in O(log size)"""
+        i = value + 1
+        while i <= self.size:
+            self.tree[i] += count
+            i += i & -i
+        self.total += count
+
+    def count_below(self, value):
+        """Number of values strictly lower than value, in O(log size)"""
+        i = min(value, self.size)
+        result = 0
+        while i > 0:
+            result += self.tree[i]
+            i -= i & -i
+        return int(result)
+
+class LiveRace:
+    # Finish times above this are rejected (48h)
+    MAX_SECONDS = 48 * 3600
+
+    def __init__(self, bin_minutes=20, max_seconds=MAX_SECONDS, club_analyzer=None):
+        """
+        Race results maintained incrementally, one finish record at a time.
+
+        Keeps the histogram bucket counts, the participants per cleaned club
+        and a Fenwick tree over finish seconds, so every record is added in
+        O(log max_seconds) and positions are answered without sorting.
+
+        Args:
+            bin_minutes (int): Width of the histogram intervals in minutes
+            max_seconds (int): Largest accepted finish time
+            club_analyzer (ClubAnalyzer): Cleans the club names
+        """
+        self.bin_seconds = int(bin_minutes) * 60
+        self.max_seconds = max_seconds
+        self.club_analyzer = club_analyzer or ClubAnalyzer()
+        self.ranking = FenwickTree(max_seconds + 1)
+        self.bucket_counts = np.zeros(max_seconds // self.bin_seconds + 1, dtype=np.int64)
+        self.club_counts = Counter()
+        self.club_best = {}
+        self.dorsal_seconds = {}
+        self.dnf_dorsals = set()
+        self.non_finishers = 0
+        self.rejected = 0
+        self.logger = Logger("LiveRace")
+
+    def add(self, record):
+        """
+        Adds one finish record.
+
+        Records with time '00:00:00' count as non-finishers, once per
+        dorsal; a later finish record of the same dorsal replaces its DNF.
+        Malformed records are counted as rejected and logged, never raised.
+
+        Args:
+            record (dict): Record with dorsal, club and time
+
+        Returns:
+            bool: Whether the record was added to the results
+        """
+        try:
+            seconds = parse_time(record['time'])
+            dorsal = int(record['dorsal'])
+        except (KeyError, TypeError, ValueError) as e:
+            self.rejected += 1
+            self.logger.warning("Rejected record %s: %s", record, e)
+            return False
+        if seconds > self.max_seconds:
+            self.rejected += 1
+            self.logger.warning("Rejected record %s: time over %d seconds", record, self.max_seconds)
+            return False
+        if dorsal in self.dorsal_seconds:
+            self.rejected += 1
+            self.logger.warning("Rejected record %s: duplicate dorsal", record)
+            return False
+        if seconds == DNF_SECONDS:
+            if dorsal not in self.dnf_dorsals:
+                self.dnf_dorsals.add(dorsal)
+                self.non_finishers += 1
+            return False
+        if dorsal in self.dnf_dorsals:
+            self.dnf_dorsals.remove(dorsal)
+            self.non_finishers -= 1
+
+        club = self.club_analyzer.clean_club(record.get('club') or None)
+        self.ranking.add(seconds)
+        self.bucket_counts[seconds // self.bin_seconds] += 1
+        self.club_counts[club] += 1
+        if seconds < self.club_best.get(club, (self.max_seconds + 1,))[0]:
+            self.club_best[club] = (seconds, dorsal)
+        self.dorsal_seconds[dorsal] = seconds
+        return True
+
+    def add_many(self, records):
+        """Adds several records, returns the number added"""
+        return sum(self.add(record) for record in records)
+
+    @property
+    def finishers(self):
+        return self.ranking.total
+
+    def position(self, seconds):
+        """Position of a finish time among the finishers so far (ties share the best)"""
+        return self.ranking.count_below(seconds) + 1
+
+    def dorsal_position(self, dorsal):
+        """
+        Current position of a rider.
+
+        Raises:
+            KeyError: If the dorsal has not finished
+        """
+        return self.position(self.dorsal_seconds[dorsal])
+
+    def snapshot(self, top_clubs=10):
+        """
+        Current results.
+
+        Args:
+            top_clubs (int): Number of clubs in the participation table
+
+        Returns:
+            dict: finishers, non_finishers, rejected, histogram (time_grouped,
+            count), clubs (club, participants, best_position)
+        """
+        present = np.flatnonzero(self.bucket_counts)
+        histogram = pd.DataFrame({
+            'time_grouped': format_hhmm(present * self.bin_seconds),
+            'count': self.bucket_counts[present],
+        })
+        clubs = pd.DataFrame(
+            [(club, count, self.position(self.club_best[club][0]))
+             for club, count in self.club_counts.most_common(top_clubs)],
+            columns=['club', 'participants', 'best_position'],
+        )
+        return {
+            'finishers': self.finishers,
+            'non_finishers': self.non_finishers,
+            'rejected': self.rejected,
+            'histogram': histogram,
+            'clubs': clubs,
+        }
+
+def _parse_line(line, header, is_json):
+    """Turns one CSV or JSON line into a record, None if it is not valid"""
+    if is_json:
+        try:
+            return json.loads(line)
+        except ValueError:
+            return None
+    values = line.split(';')
+    return dict(zip(header, values)) if len(values) == len(header) else None
+
+def tail_records(path, follow=True, poll_interval=1.0, stop=None):
+    """
+    Yields the finish records of a growing CSV or JSON lines file.
+
+    Only complete lines are decoded and parsed; a partially written last
+    line (possibly ending inside a multibyte UTF-8 character) is kept until
+    its newline arrives. CSV files are ';' separated with a header.
+
+    Args:
+        path (Path): '.csv' or '.jsonl' file
+        follow (bool): Keep waiting for new lines at the end of the file
+        poll_interval (float): Seconds between checks for new lines
+        stop (callable): Stops following when it returns True
+
+    Yields:
+        dict: One record per line
+    """
+    path = Path(path)
+    is_json = path.suffix in ('.jsonl', '.json')
+    header = None
+    pending = b''
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read()
+            if chunk:
+                pending += chunk
+                *lines, pending = pending.split(b'\n')
+                for line in lines:
+                    line = line.rstrip(b'\r').decode('utf-8')
+                    if not line:
+                        continue
+                    if not is_json and header is None:
+                        header = line.split(';')
+                        continue
+                    record = _parse_line(line, header, is_json)
+                    if record is not None:
+                        yield record
+            elif not follow or (stop is not None and stop()):
+                return
+            else:
+                time.sleep(poll_interval)
+
+def follow_race(path, race=None, snapshot_interval=60.0, on_snapshot=None, follow=True, poll_interval=1.0,
+                stop=None):
+    """
+    Tails a results file into a LiveRace and publishes periodic snapshots.
+
+    Args:
+        path (Path): '.csv' or '.jsonl' file with finish records
+        race (LiveRace): Race to update, a new one if None
+        snapshot_interval (float): Seconds between snapshots
+        on_snapshot (callable): Receives every snapshot
+        follow (bool): Keep waiting for new records at the end of the file
+        poll_interval (float): Seconds between checks for new lines
+        stop (callable): Stops following when it returns True
+
+    Returns:
+        LiveRace: The updated race
+    """
+    race = race or LiveRace()
+    last_snapshot = [time.monotonic()]
+    published = [0]
+
+    def maybe_publish():
+        if on_snapshot is not None and time.monotonic() - last_snapshot[0] >= snapshot_interval:
+            on_snapshot(race.snapshot())
+            last_snapshot[0] = time.monotonic()
+            published[0] = race.finishers + race.non_finishers + race.rejected
+
+    def idle():
+        # Called while waiting for new lines: publish pending changes too
+        if published[0] != race.finishers + race.non_finishers + race.rejected:
+            maybe_publish()
+        return stop is not None and stop()
+
+    for record in tail_records(path, follow=follow, poll_interval=poll_interval, stop=idle):
+        race.add(record)
+        maybe_publish()
+    if on_snapshot is not None:
+        on_snapshot(race.snapshot())
+    return race
@@ -0,0 +1,127 @@
+import re
+import numpy as np
+import pandas as pd
+from monegros.src.ex4_clubs import ClubAnalyzer
+from monegros.utils.times import seconds_to_strings
+
+TOWNS = [
+    'Huesca', 'Zaragoza', 'Barbastro', 'Monzon', 'Fraga', 'Sariñena', 'Jaca', 'Teruel',
+    'Lleida', 'Sant Cugat', 'Binefar', 'Tamarite', 'Alcañiz', 'Calatayud', 'Ejea',
+    'Tarazona', 'Caspe', 'Graus', 'Sabiñanigo', 'Almudevar', 'Grañen', 'Bujaraloz',
+    'Candasnos', 'Peñalba', 'Lanaja', 'Castejon', 'Tardienta', 'Zuera', 'Villanueva',
+    'Balaguer', 'Tarrega', 'Mollerussa', 'Igualada', 'Manresa', 'Terrassa', 'Sabadell',
+    'Reus', 'Tortosa', 'Logroño', 'Pamplona', 'Tudela', 'Soria', 'Vitoria', 'Bilbao',
+]
+TEAM_SUFFIXES = ['', ' Bike', ' Team', ' Racing', ' BTT', ' Sport']
+FIRST_NAMES = [
+    'Antonio', 'Manuel', 'Jose', 'Francisco', 'David', 'Juan', 'Javier', 'Daniel',
+    'Carlos', 'Jesus', 'Alejandro', 'Miguel', 'Rafael', 'Pablo', 'Sergio', 'Fernando',
+    'Maria', 'Carmen', 'Ana', 'Laura', 'Marta', 'Elena', 'Lucia', 'Cristina', 'Paula',
+    'Sara', 'Andrea', 'Raquel', 'Silvia', 'Nuria',
+]
+LAST_NAMES = [
+    'Garcia', 'Rodriguez', 'Gonzalez', 'Fernandez', 'Lopez', 'Martinez', 'Sanchez',
+    'Perez', 'Gomez', 'Martin', 'Jimenez', 'Ruiz', 'Hernandez', 'Diaz', 'Moreno',
+    'Muñoz', 'Alvarez', 'Romero', 'Alonso', 'Gutierrez', 'Navarro', 'Torres',
+    'Dominguez', 'Vazquez', 'Ramos', 'Gil', 'Ramirez', 'Serrano', 'Blanco', 'Molina',
+]
+SIZES = {'10k': 10_000, '1M': 1_000_000, '10M': 10_000_000}
+
+
+def _literal(pattern):
+    """Turns a ClubAnalyzer pattern such as r'^C\\.C\\. ' into the text it matches"""
+    return re.sub(r'\\(.)', r'\1', pattern.strip('^$'))
+
+
+def club_affixes():
+    """
+    Returns the club name prefixes and suffixes that ClubAnalyzer strips.
+
+    Returns:
+        tuple: (prefixes, suffixes) as lists of literal strings
+    """
+    analyzer = ClubAnalyzer()
+    prefixes = list(analyzer.prefixes) + [_literal(p) for p in analyzer.start_patterns]
+    prefixes += [prefix.title() for prefix in analyzer.prefixes]
+    suffixes = [_literal(p) for p in analyzer.end_patterns]
+    return prefixes, suffixes
+
+
+def generate_race(n_rows, seed=0, dnf_share=0.03, independent_share=0.35, n_clubs=250,
+                  affix_share=0.5, dorsal_offset=0):
+    """
+    Generates synthetic race results with the layout of dataset.csv.
+
+    Clubs follow a Zipf-like popularity and are written with the same prefix
+    and suffix variants that ClubAnalyzer strips, so club cleaning does real
+    work. Non-finishers have time '00:00:00'.
+
+    Args:
+        n_rows (int): Number of riders
+        seed (int): Seed of the random generator
+        dnf_share (float): Share of riders with time '00:00:00'
+        independent_share (float): Share of riders without club
+        n_clubs (int): Number of distinct clubs before spelling variants
+        affix_share (float): Share of club entries written with a prefix or suffix
+        dorsal_offset (int): Added to the dorsals, to build disjoint chunks
+
+    Returns:
+        pd.DataFrame: Columns dorsal, biker, club and time
+    """
+    rng = np.random.default_rng(seed)
+    prefixes, suffixes = club_affixes()
+
+    bases = [f"{town}{suffix}" for suffix in TEAM_SUFFIXES for town in TOWNS][:n_clubs - 1] + ['UCSC']
+    popularity = 1.0 / np.arange(1, len(bases) + 1)
+    base = rng.choice(len(bases), size=n_rows, p=popularity / popularity.sum())
+    prefix = np.where(rng.random(n_rows) < affix_share, rng.integers(1, len(prefixes) + 1, n_rows), 0)
+    suffix = np.where(rng.random(n_rows) < affix_share / 3, rng.integers(1, len(suffixes) + 1, n_rows), 0)
+
+    # Build each distinct spelling once and map the rows to it
+    code = (base * (len(prefixes) + 1) + prefix) * (len(suffixes) + 1) + suffix
+    uniques, inverse = np.unique(code, return_inverse=True)
+    spellings = []
+    for value in uniques.tolist():
+        rest, s = divmod(value, len(suffixes) + 1)
+        b, p = divmod(rest, len(prefixes) + 1)
+        spellings.append(('' if p == 0 else prefixes[p - 1]) + bases[b] + ('' if s == 0 else suffixes[s - 1]))
+    clubs = np.array(spellings + ['Independiente', ''], dtype=object)
+
+    independent = rng.random(n_rows) < independent_share
+    inverse = np.where(independent, len(spellings) + (rng.random(n_rows) < 0.2), inverse)
+
+    seconds = np.clip(rng.lognormal(np.log(6.5 * 3600), 0.18, n_rows), 3 * 3600, 15 * 3600).astype(np.int64)
+    seconds[rng.random(n_rows) < dnf_share] = 0
+
+    names = (np.array(FIRST_NAMES, dtype=object)[rng.integers(0, len(FIRST_NAMES), n_rows)] + ' '
+             + np.array(LAST_NAMES, dtype=object)[rng.integers(0, len(LAST_NAMES), n_rows)])
+
+    return pd.DataFrame({
+        'dorsal': (rng.permutation(n_rows) + 1 + dorsal_offset).astype(np.uint32),
+        'biker': names,
+        'club': clubs[inverse],
+        'time': seconds_to_strings(seconds),
+    })
+
+
+def write_race_csv(path, n_rows, seed=0, chunk_rows=1_000_000, **kwargs):
+    """
+    Writes synthetic race results to a ';' separated CSV, chunk by chunk.
+
+    Args:
+        path (Path): Output file
+        n_rows (int): Number of riders
+        seed (int): Seed of the random generator
+        chunk_rows (int): Rows generated and written at a time
+        **kwargs: Forwarded to generate_race
+
+    Returns:
+        Path: The output file
+    """
+    seeds = np.random.SeedSequence(seed).spawn(max(1, -(-n_rows // chunk_rows)))
+    for i, chunk_seed in enumerate(seeds):
+        start = i * chunk_rows
+        rows = min(chunk_rows, n_rows - start)
+        chunk = generate_race(rows, seed=chunk_seed, dorsal_offset=start, **kwargs)
+        chunk.to_csv(path, sep=';', index=False, header=(i == 0), mode='w' if i == 0 else 'a')
+    return path
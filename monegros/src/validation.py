@@ -0,0 +1,201 @@
+import numpy as np
+import pandas as pd
+from monegros.utils.logger import Logger, timed
+from monegros.utils.times import parse_seconds
+
+class ValidationReport:
+    # Row positions listed per check in summary()
+    SHOWN_ROWS = 5
+
+    def __init__(self, total, issues):
+        """
+        Offending rows of a dataset, by check.
+
+        Args:
+            total (int): Number of rows validated
+            issues (dict): Sorted row positions (np.ndarray) by check name,
+                only for the checks that failed
+        """
+        self.total = total
+        self.issues = issues
+
+    @property
+    def ok(self):
+        return not self.issues
+
+    @property
+    def invalid(self):
+        """Sorted positions of the rows failing at least one check"""
+        if not self.issues:
+            return np.zeros(0, dtype=np.int64)
+        return np.unique(np.concatenate(list(self.issues.values())))
+
+    def counts(self):
+        """Number of offending rows by check"""
+        return {check: len(rows) for check, rows in self.issues.items()}
+
+    def checks(self):
+        """
+        Failed checks of every invalid row.
+
+        Returns:
+            pd.Series: ';' separated check names indexed by row position
+        """
+        if not self.issues:
+            return pd.Series([], dtype=object, index=pd.Index([], dtype=np.int64, name='row'), name='checks')
+        rows = np.concatenate(list(self.issues.values()))
+        names = np.repeat(np.array(list(self.issues), dtype=object), [len(r) for r in self.issues.values()])
+        frame = pd.DataFrame({'row': rows, 'checks': names}).sort_values('row', kind='stable')
+        return frame.groupby('row', sort=True)['checks'].agg(';'.join)
+
+    def summary(self):
+        """One line per failed check with its count and first row positions"""
+        if not self.issues:
+            return f"All {self.total} rows are valid"
+        lines = [f"{len(self.invalid)} of {self.total} rows are invalid"]
+        for check, rows in self.issues.items():
+            shown = ', '.join(map(str, rows[:self.SHOWN_ROWS].tolist()))
+            more = ', ...' if len(rows) > self.SHOWN_ROWS else ''
+            lines.append(f"  {check}: {len(rows)} rows ({shown}{more})")
+        return '\n'.join(lines)
+
+class DataValidator:
+    POLICIES = ('raise', 'drop', 'quarantine')
+    # Same limit as the live results (48h)
+    MAX_SECONDS = 48 * 3600
+    TIME_PATTERN = r'\d{2,}:[0-5]\d:[0-5]\d'
+    # Dorsals are stored as uint32
+    DORSAL_RANGE = (1, 2 ** 32 - 1)
+
+    def __init__(self, policy='raise', max_seconds=MAX_SECONDS, dorsal_range=DORSAL_RANGE):
+        """
+        Whole-file checks of a race dataset, run right after it is read.
+
+        Every check is a vectorized column operation, so a file is checked
+        in one pass and all offending rows are reported together instead of
+        failing on the first one:
+
+        - time_format: missing time or not 'HH:MM:SS'
+        - time_range: finish time over max_seconds
+        - dorsal_format: missing or non-integer dorsal
+        - dorsal_range: dorsal outside dorsal_range
+        - dorsal_duplicate: dorsal already used by an earlier row
+        - club_blank: club made only of whitespace (an empty or missing club
+          is valid, it means the rider has no club)
+
+        Args:
+            policy (str): What to do with invalid rows: 'raise' a ValueError
+                with the report, 'drop' them, or 'quarantine' them (drop
+                and write them to a CSV for review)
+            max_seconds (int): Largest accepted finish time
+            dorsal_range (tuple): Smallest and largest accepted dorsal
+        """
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown validation policy '{policy}'. Expected one of {self.POLICIES}")
+        self.policy = policy
+        self.max_seconds = max_seconds
+        self.dorsal_range = tuple(dorsal_range)
+        self.logger = Logger("DataValidator")
+
+    def settings(self):
+        """Options that change the validated dataset, part of the loader cache key"""
+        return {'policy': self.policy, 'max_seconds': self.max_seconds, 'dorsal_range': list(self.dorsal_range)}
+
+    def validate(self, df):
+        """
+        Checks the columns of df that are present.
+
+        Args:
+            df (pd.DataFrame): Dataset as read from the CSV; dorsal may be
+                numeric or text
+
+        Returns:
+            ValidationReport: Offending row positions by check
+        """
+        masks = {}
+        if 'time' in df.columns:
+            times = df['time'].astype(object)
+            well_formed = times.where(times.notna(), '').astype(str).str.fullmatch(self.TIME_PATTERN).to_numpy(bool)
+            masks['time_format'] = ~well_formed
+            too_long = np.zeros(len(df), dtype=bool)
+            if well_formed.any():
+                too_long[well_formed] = parse_seconds(times[well_formed].astype(str)) > self.max_seconds
+            masks['time_range'] = too_long
+
+        if 'dorsal' in df.columns:
+            numbers = pd.to_numeric(df['dorsal'], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+            integral = np.isfinite(numbers) & (numbers == np.floor(numbers))
+            masks['dorsal_format'] = ~integral
+            low, high = self.dorsal_range
+            masks['dorsal_range'] = integral & ((numbers < low) | (numbers > high))
+            masks['dorsal_duplicate'] = integral & pd.Series(numbers).duplicated(keep='first').to_numpy()
+
+        if 'club' in df.columns:
+            clubs = df['club']
+            if isinstance(clubs.dtype, pd.CategoricalDtype):
+                # Check the categories once, then map the result to the rows
+                categories = clubs.cat.categories.astype(str)
+                blank = np.append((categories.str.strip() == '') & (categories.str.len() > 0), False)
+                masks['club_blank'] = blank[clubs.cat.codes.to_numpy()]
+            else:
+                text = clubs.astype(object).where(clubs.notna(), '').astype(str)
+                masks['club_blank'] = ((text.str.strip() == '') & (text.str.len() > 0)).to_numpy()
+
+        issues = {check: np.flatnonzero(mask) for check, mask in masks.items() if mask.any()}
+        return ValidationReport(len(df), issues)
+
+    def quarantine(self, df, report, path):
+        """
+        Writes the invalid rows, with their failed checks, to a ';' CSV.
+
+        Args:
+            df (pd.DataFrame): Validated dataset
+            report (ValidationReport): Its report
+            path (Path): Output CSV
+
+        Returns:
+            pd.DataFrame: The quarantined rows, with 'row' and 'checks' columns
+        """
+        checks = report.checks()
+        rows = df.iloc[checks.index.to_numpy()].copy()
+        rows.insert(0, 'row', checks.index.to_numpy())
+        rows['checks'] = checks.to_numpy()
+        rows.to_csv(path, sep=';', index=False)
+        return rows
+
+    @timed
+    def validate_data(self, df, quarantine_path=None):
+        """
+        Validates the dataset and applies the policy to the invalid rows.
+
+        Args:
+            df (pd.DataFrame): Dataset as read from the CSV
+            quarantine_path (Path): CSV for the invalid rows ('quarantine' policy)
+
+        Returns:
+            tuple: (valid rows of df, ValidationReport)
+
+        Raises:
+            ValueError: With the whole report, if rows are invalid and the
+                policy is 'raise'
+        """
+        report = self.validate(df)
+        if report.ok:
+            self.logger.debug(report.summary)
+            return df, report
+
+        if self.policy == 'raise':
+            self.logger.error(report.summary())
+            raise ValueError(f"Invalid dataset. {report.summary()}")
+
+        if self.policy == 'quarantine':
+            if quarantine_path is None:
+                raise ValueError("The 'quarantine' validation policy requires a quarantine path")
+            self.quarantine(df, report, quarantine_path)
+            self.logger.warning(f"{report.summary()}\nInvalid rows written to {quarantine_path}")
+        else:
+            self.logger.warning(f"{report.summary()}\nInvalid rows dropped")
+
+        keep = np.ones(len(df), dtype=bool)
+        keep[report.invalid] = False
+        return df[keep], report
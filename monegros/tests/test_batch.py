@@ -0,0 +1,55 @@
+import pytest
+import pandas as pd
+from pathlib import Path
+from monegros.src.ex1_data import DataLoader
+from monegros.src.batch import expand_inputs, edition_names, run_batch
+
+@pytest.fixture
+def editions_dir(tmp_path):
+    """Write two small editions built from the dataset"""
+    lines = DataLoader().data_path.read_text().splitlines()
+    header, rows = lines[0], lines[1:]
+    (tmp_path / 'monegros_2023.csv').write_text('\n'.join([header] + rows[:1500]) + '\n')
+    (tmp_path / 'monegros_2024.csv').write_text('\n'.join([header] + rows[-1200:]) + '\n')
+    return tmp_path
+
+def test_expand_inputs(editions_dir):
+    """Test expansion of directories and glob patterns"""
+    by_dir = expand_inputs([editions_dir])
+    by_glob = expand_inputs([str(editions_dir / '*.csv'), str(editions_dir / 'monegros_2023.csv')])
+
+    assert by_dir == by_glob
+    assert [path.name for path in by_dir] == ['monegros_2023.csv', 'monegros_2024.csv']
+
+    with pytest.raises(FileNotFoundError):
+        expand_inputs([str(editions_dir / '*.json')])
+
+def test_edition_names():
+    """Test that editions with the same file name are told apart"""
+    assert edition_names([Path('a/2023.csv'), Path('b/2024.csv')]) == ['2023', '2024']
+    assert edition_names([Path('a/data.csv'), Path('b/data.csv')]) == ['a/data', 'b/data']
+
+def test_run_batch(editions_dir):
+    """Test that parallel and sequential runs give the same combined results"""
+    options = {'img_dir': editions_dir / 'img'}
+    sequential = run_batch([editions_dir], jobs=1, **options)
+    parallel = run_batch([editions_dir], jobs=2, **options)
+
+    for name in ('riders', 'histogram', 'clubs', 'ranking'):
+        pd.testing.assert_frame_equal(sequential[name], parallel[name])
+
+    riders = sequential['riders']
+    assert riders.columns[0] == 'edition'
+    assert set(riders['edition']) == {'monegros_2023', 'monegros_2024'}
+    assert sequential['histogram'].groupby('edition')['count'].sum().to_dict() == \
+        riders.groupby('edition').size().to_dict()
+    assert (editions_dir / 'img' / 'histograma_monegros_2023.png').exists()
+
+    percentiles = sequential['percentiles'].set_index('edition')
+    assert percentiles.index.tolist() == ['monegros_2023', 'monegros_2024', 'ALL']
+    assert percentiles['count'].tolist() == riders.groupby('edition').size().tolist() + [len(riders)]
+    assert percentiles.loc['ALL', 'min'] == riders['seconds'].min()
+    pd.testing.assert_frame_equal(sequential['percentiles'], parallel['percentiles'])
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,114 @@
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+import numpy as np
+import pandas as pd
+from monegros.src.chunked import ChunkedPipeline, RaceAggregate
+from monegros.src.ex1_data import DataLoader
+from monegros.src.ex2_anonymize import DataAnonymizer
+from monegros.src.ex3_histogram import TimeHistogram
+from monegros.src.ex4_clubs import ClubAnalyzer
+from monegros.src.ex5_ucsc import UCSCAnalyzer
+from monegros.src.synthetic import generate_race
+
+KEY = 'chunked-test-key'
+
+@pytest.fixture
+def riders():
+    """In-memory pipeline output: anonymized finishers with cleaned clubs"""
+    anonymizer = DataAnonymizer(mode='hash', key=KEY)
+    df = anonymizer.clean_dataset(anonymizer.name_surname(DataLoader().read_data()))
+    return ClubAnalyzer().analyze_clubs(df)
+
+@pytest.fixture
+def chunked():
+    """Chunked pipeline output over the dataset, in chunks of 700 rows"""
+    pipeline = ChunkedPipeline(DataAnonymizer(mode='hash', key=KEY), chunk_rows=700, top=15)
+    return pipeline.run(DataLoader().data_path)
+
+def test_matches_in_memory(riders, chunked):
+    """Test that histogram, club results and the club ranking match the in-memory mode"""
+    pd.testing.assert_frame_equal(chunked['histogram'], TimeHistogram().time_frequencies(riders))
+
+    columns = ['club', 'participants', 'best_seconds', 'best_time', 'mean_seconds',
+               'best_dorsal', 'best_biker', 'best_position']
+    expected = ClubAnalyzer().club_statistics(riders)[columns]
+    expected = expected.astype({'best_seconds': np.int64, 'best_position': np.int64})
+    pd.testing.assert_frame_equal(chunked['clubs'][columns], expected, check_dtype=False)
+
+    _, best, position_info = UCSCAnalyzer().analyze_ucsc(riders)
+    ranking = chunked['ranking']
+    assert {key: ranking[key] for key in position_info} == position_info
+    assert (ranking['dorsal'], ranking['biker'], ranking['time']) == (best['dorsal'], best['biker'], best['time'])
+    assert chunked['finishers'] == len(riders)
+
+def test_leaders(riders, chunked):
+    """Test the leading riders against a full sort"""
+    expected = riders.sort_values('seconds', kind='stable').head(15)
+    leaders = chunked['leaders']
+
+    assert leaders['dorsal'].tolist() == expected['dorsal'].tolist()
+    assert leaders['biker'].tolist() == expected['biker'].tolist()
+    assert leaders['position'].tolist() == expected['seconds'].rank(method='min').astype(int).tolist()
+
+def test_one_pseudonym_per_dorsal():
+    """Test that a rider reported in several outputs gets the same random pseudonym in all of them"""
+    pipeline = ChunkedPipeline(DataAnonymizer(), chunk_rows=700, top=15)
+    results = pipeline.run(DataLoader().data_path)
+    ranking = results['ranking']
+    reported = pd.concat([
+        results['clubs'][['best_dorsal', 'best_biker']].set_axis(['dorsal', 'biker'], axis=1),
+        results['leaders'][['dorsal', 'biker']],
+        pd.DataFrame({'dorsal': [ranking['dorsal']], 'biker': [ranking['biker']]}),
+    ])
+
+    assert (reported.groupby('dorsal')['biker'].nunique() == 1).all()
+    assert reported['dorsal'].duplicated().any()
+
+def test_merge_is_order_independent():
+    """Test that merging partial aggregates in any grouping gives the same results"""
+    race = generate_race(6000, seed=4)
+    race = race.assign(seconds=pd.to_timedelta(race['time']).dt.total_seconds().astype(np.int64))
+    race = race[race['seconds'] > 0].reset_index(drop=True)
+    race['club_clean'] = ClubAnalyzer().clean_clubs(race['club'])
+
+    whole = RaceAggregate(top=5).update(race)
+    parts = [RaceAggregate(top=5).update(race.iloc[start:start + 1000], start) for start in range(0, 6000, 1000)]
+    left = RaceAggregate(top=5)
+    for part in parts:
+        left.merge(part)
+    right = RaceAggregate(top=5)
+    for part in reversed(parts):
+        right.merge(part)
+
+    for merged in (left, right):
+        pd.testing.assert_frame_equal(merged.histogram(), whole.histogram())
+        pd.testing.assert_frame_equal(merged.clubs(), whole.clubs(), check_dtype=False)
+        pd.testing.assert_frame_equal(merged.leaderboard(), whole.leaderboard(), check_dtype=False)
+    with pytest.raises(ValueError):
+        left.merge(RaceAggregate(bin_minutes=10))
+
+@pytest.mark.parametrize('option', [['--validation', 'drop'], ['--engine', 'pyarrow']])
+def test_cli_rejects_unsupported_options(option):
+    """Test that chunked runs reject the options they cannot honour instead of ignoring them"""
+    result = subprocess.run([sys.executable, 'main.py', '--chunk-rows', '1000', *option],
+                            cwd=Path(__file__).parent.parent.parent, capture_output=True, text=True)
+
+    assert result.returncode == 2
+    assert '--chunk-rows' in result.stderr
+
+def test_chunk_size_does_not_change_results(tmp_path):
+    """Test a synthetic file with one chunk and with many chunks"""
+    path = tmp_path / 'race.csv'
+    generate_race(20000, seed=5).to_csv(path, sep=';', index=False)
+
+    single = ChunkedPipeline(chunk_rows=50000).run(path)
+    many = ChunkedPipeline(chunk_rows=1500).run(path)
+    for key in ('histogram', 'clubs', 'leaders'):
+        pd.testing.assert_frame_equal(single[key], many[key], check_dtype=False)
+    assert single['ranking'] == many['ranking']
+    assert single['non_finishers'] == many['non_finishers'] > 0
+
+if __name__ == "__main__":
+    pytest.main([__file__])
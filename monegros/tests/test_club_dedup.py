@@ -0,0 +1,116 @@
+import itertools
+import time
+import pytest
+import pandas as pd
+from monegros.src.ex1_data import DataLoader
+from monegros.src.ex4_clubs import ClubAnalyzer
+from monegros.src.club_dedup import ClubDeduplicator, UnionFind, save_mapping, load_mapping
+
+@pytest.fixture
+def deduplicator():
+    """Fixture to create a ClubDeduplicator instance"""
+    return ClubDeduplicator()
+
+def canonical_of(mapping):
+    """Club -> canonical dict of a mapping dataframe"""
+    return dict(zip(mapping['club'], mapping['canonical']))
+
+def test_union_find():
+    """Test that unions are transitive"""
+    sets = UnionFind(5)
+    sets.union(0, 3)
+    sets.union(3, 4)
+
+    assert sets.find(4) == sets.find(0)
+    assert sets.find(1) != sets.find(0)
+
+def test_normalize_and_phonetic_key(deduplicator):
+    """Test accent, punctuation and spelling normalization"""
+    assert deduplicator.normalize('C.C.Tàrrega') == 'TARREGA'
+    assert deduplicator.normalize('Almorzar.as') == 'ALMORZARAS'
+    assert deduplicator.normalize('CC/HUARTE') == 'HUARTE'
+    assert deduplicator.phonetic_key('PEÑA GUARA') == deduplicator.phonetic_key('PENYA GUARA')
+    assert deduplicator.phonetic_key('EDELWEISS') == deduplicator.phonetic_key('EDELWEIS')
+    assert deduplicator.phonetic_key('SIGENENSE') == deduplicator.phonetic_key('SIJENENSE')
+    assert deduplicator.phonetic_key('HUARTE') != deduplicator.phonetic_key('CUARTE')
+
+def test_build_mapping(deduplicator):
+    """Test clustering of variants and choice of the canonical name"""
+    names = ['GARRIBIKES', 'GARRI BIKES', 'SÁSTAGO', 'SASTAGO', 'ADDICT BIKES', 'ADDICT BIKE',
+             'UCSC', 'UNIÓ CICLISTA SANT CUGAT', 'FRAGA', 'CC.FRAGA', 'BTT EJEA', 'BTT ZARAGOZA']
+    counts = [5, 4, 3, 1, 4, 2, 19, 2, 8, 2, 3, 3]
+    mapping = canonical_of(deduplicator.build_mapping(names, counts))
+
+    assert mapping['GARRI BIKES'] == 'GARRIBIKES'
+    assert mapping['SASTAGO'] == 'SÁSTAGO'
+    assert mapping['ADDICT BIKE'] == 'ADDICT BIKES'
+    assert mapping['UNIÓ CICLISTA SANT CUGAT'] == 'UCSC'
+    assert mapping['CC.FRAGA'] == 'FRAGA'
+    assert 'BTT EJEA' not in mapping and 'BTT ZARAGOZA' not in mapping
+
+def test_acronyms_optional():
+    """Test that acronyms are only merged when enabled"""
+    names = ['UCSC', 'UNIÓ CICLISTA SANT CUGAT']
+
+    assert ClubDeduplicator(acronyms=False).build_mapping(names).empty
+    assert len(ClubDeduplicator().build_mapping(names)) == 2
+
+def test_candidate_pairs_match_all_pairs(deduplicator):
+    """Test that blocking finds the same pairs as comparing every pair"""
+    df = DataLoader().read_data()
+    names = ClubAnalyzer().clean_clubs(df['club']).unique().tolist()
+    keys = sorted({deduplicator.phonetic_key(name) for name in names})[:400]
+
+    blocked = {(i, j) for i, j, _ in ClubDeduplicator(max_block_size=len(keys)).candidate_pairs(keys)}
+    expected = set()
+    for i, j in itertools.combinations(range(len(keys)), 2):
+        if min(len(keys[i]), len(keys[j])) < deduplicator.min_length:
+            continue
+        a, b = deduplicator._ngrams(keys[i]), deduplicator._ngrams(keys[j])
+        if 2 * len(a & b) / (len(a) + len(b)) >= deduplicator.threshold:
+            expected.add((i, j))
+    assert blocked == expected
+
+def test_deduplicate_scales(deduplicator):
+    """Test that tens of thousands of spellings are clustered quickly"""
+    towns = [''.join(syllables) for syllables in itertools.product(
+        ['BA', 'CE', 'DO', 'FU', 'GA', 'LI', 'MO', 'PE', 'RU', 'TA'], repeat=3)]
+    teams = ['BIKE', 'TEAM', 'BTT', 'RACING', 'SPORT']
+    names = []
+    for town, team in itertools.product(towns, teams):
+        names += [f"{town} {team}", f"{town}{team}S", f"{town} {team} CLUB",
+                  f"{team} {town}ES", f"{town}Á {team}", f"{team}{town}"]
+
+    start = time.perf_counter()
+    mapping = deduplicator.build_mapping(names)
+    assert len(names) == 30000
+    assert time.perf_counter() - start < 30
+    assert mapping['canonical'].nunique() < len(names) / 2
+
+def test_mapping_round_trip(deduplicator, tmp_path):
+    """Test that a saved (and edited) mapping is loaded back"""
+    mapping = deduplicator.build_mapping(['GARRIBIKES', 'GARRI BIKES', 'EDELWEISS', 'EDELWEIS'], [5, 4, 5, 2])
+    path = save_mapping(mapping, tmp_path / 'clubs.csv')
+
+    edited = pd.read_csv(path, sep=';')
+    edited.loc[edited['club'] == 'EDELWEIS', 'canonical'] = ''
+    edited.to_csv(path, sep=';', index=False)
+
+    assert load_mapping(path) == {'GARRI BIKES': 'GARRIBIKES'}
+
+def test_load_mapping_invalid(tmp_path):
+    """Test that a file without the mapping columns is rejected"""
+    path = tmp_path / 'clubs.csv'
+    path.write_text('a;b\n1;2\n')
+    with pytest.raises(ValueError):
+        load_mapping(path)
+
+def test_club_analyzer_canonical_names():
+    """Test that ClubAnalyzer applies the canonical names after cleaning"""
+    clubs = pd.Series(['Garri Bikes', 'C.C. GarriBikes', None, 'Club Fraga'])
+    cleaned = ClubAnalyzer({'GARRI BIKES': 'GARRIBIKES'}).clean_clubs(clubs)
+
+    assert cleaned.tolist() == ['GARRIBIKES', 'GARRIBIKES', 'INDEPENDIENTE', 'FRAGA']
+
+if __name__ == "__main__":
+    pytest.main([__file__])
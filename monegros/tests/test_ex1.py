@@ -1,7 +1,11 @@
+import os
+import shutil
 import pytest
+import numpy as np
 import pandas as pd
 from pathlib import Path
 from monegros.src.ex1_data import DataLoader
+from monegros.utils.times import parse_seconds
 
 @pytest.fixture
 def data_loader():
@@ -51,5 +55,94 @@ def test_file_not_found(data_loader):
         # Restore the file
         temp_path.rename(original_path)
 
+def test_schema(data_loader):
+    """Test that the declared schema is applied at load time"""
+    df = data_loader.load_and_analyze_data()
+
+    assert pd.api.types.is_unsigned_integer_dtype(df['dorsal'])
+    assert isinstance(df['club'].dtype, pd.CategoricalDtype)
+    assert df['seconds'].dtype == np.uint32
+
+    # Seconds must match the original time strings
+    first = df.iloc[0]
+    hours, minutes, seconds = map(int, first['time'].split(':'))
+    assert first['seconds'] == hours * 3600 + minutes * 60 + seconds
+
+    assert data_loader.memory_usage > 0
+
+def test_usecols():
+    """Test column projection"""
+    loader = DataLoader(usecols=['dorsal', 'time'])
+    df = loader.load_and_analyze_data()
+
+    assert list(df.columns) == ['dorsal', 'time', 'seconds']
+
+def test_invalid_engine():
+    """Test that an unknown parser engine is rejected"""
+    with pytest.raises(ValueError):
+        DataLoader(engine='python-slow')
+
+def test_negative_dorsal(tmp_path):
+    """Test that a negative dorsal is rejected instead of wrapping around"""
+    path = tmp_path / 'negative.csv'
+    path.write_text("dorsal;biker;club;time\n1;A;X;04:00:00\n-3;B;Y;05:00:00\n")
+
+    with pytest.raises(ValueError, match='negative dorsals'):
+        DataLoader(path).read_data()
+
+@pytest.fixture
+def cached_loader(data_loader, tmp_path):
+    """Fixture with a cache-enabled DataLoader over a copy of the dataset"""
+    data_path = tmp_path / 'dataset.csv'
+    shutil.copy(data_loader.data_path, data_path)
+    return DataLoader(data_path=data_path, use_cache=True)
+
+def test_cache_round_trip(cached_loader, monkeypatch):
+    """Test that a warm load comes from the cache and matches the CSV"""
+    df_cold = cached_loader.load_data()
+    assert cached_loader.cache_path.exists()
+
+    # A warm load must not parse the CSV again
+    monkeypatch.setattr(cached_loader, 'read_data', lambda: pytest.fail("CSV was re-parsed"))
+    df_warm = cached_loader.load_data()
+
+    pd.testing.assert_frame_equal(df_cold, df_warm)
+
+def test_cache_invalidation(cached_loader):
+    """Test that a stale cache is rebuilt and a touched file is not"""
+    df_cold = cached_loader.load_data()
+
+    # Same content, new mtime: still served from the cache
+    stat = cached_loader.data_path.stat()
+    os.utime(cached_loader.data_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    pd.testing.assert_frame_equal(cached_loader.load_data(), df_cold)
+
+    # Changed content: cache is rebuilt
+    lines = cached_loader.data_path.read_text().splitlines()
+    cached_loader.data_path.write_text('\n'.join(lines[:11]) + '\n')
+    assert len(cached_loader.load_data()) == 10
+
+def test_clear_cache(cached_loader):
+    """Test that the cache can be cleared"""
+    cached_loader.load_data()
+    cached_loader.clear_cache()
+
+    assert not cached_loader.cache_path.exists()
+    assert not cached_loader.cache_meta_path.exists()
+
+def test_parse_seconds():
+    """Test vectorized time parsing, including times over 24h"""
+    times = pd.Series(['00:00:00', '06:19:40', '23:59:59', '25:01:02', '100:00:00'])
+    expected = [0, 6 * 3600 + 19 * 60 + 40, 86399, 25 * 3600 + 62, 360000]
+
+    assert parse_seconds(times).tolist() == expected
+
+def test_parse_seconds_invalid():
+    """Test that malformed times are rejected"""
+    with pytest.raises(ValueError):
+        parse_seconds(pd.Series(['06:19:40', '06:61:00']))
+    with pytest.raises(ValueError):
+        parse_seconds(pd.Series(['06:19:40', None]))
+
 if __name__ == "__main__":
     pytest.main([__file__])
\ No newline at end of file
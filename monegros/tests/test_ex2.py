@@ -1,6 +1,7 @@
 import pytest
 import pandas as pd
 from monegros.src.ex2_anonymize import DataAnonymizer
+from monegros.utils.times import DNF_SECONDS, parse_seconds
 
 @pytest.fixture
 def anonymizer():
@@ -48,6 +49,14 @@ def test_clean_dataset(anonymizer, sample_df):
     expected_times = ['05:30:00', '06:15:00']
     assert all(time in expected_times for time in df_clean['time'])
 
+def test_clean_dataset_uses_seconds(anonymizer, sample_df):
+    """Test that non-finishers are found by the DNF sentinel of the seconds column"""
+    typed = sample_df.assign(seconds=parse_seconds(sample_df['time']))
+    df_clean = anonymizer.clean_dataset(typed)
+
+    assert (df_clean['seconds'] != DNF_SECONDS).all()
+    assert df_clean['time'].tolist() == anonymizer.clean_dataset(sample_df)['time'].tolist()
+
 def test_anonymize_and_clean_data(anonymizer, sample_df):
     """Test the complete anonymization and cleaning process"""
     df_processed = anonymizer.anonymize_and_clean_data(sample_df)
@@ -63,5 +72,43 @@ def test_anonymize_and_clean_data(anonymizer, sample_df):
     assert not any(df_processed['time'] == '00:00:00')
 
 
+def test_name_surname_deterministic(sample_df):
+    """Test that the same seed gives the same names"""
+    first = DataAnonymizer(seed=7).name_surname(sample_df)
+    second = DataAnonymizer(seed=7).name_surname(sample_df)
+
+    assert first['biker'].tolist() == second['biker'].tolist()
+
+def test_name_surname_hash_mode(sample_df):
+    """Test that hash mode is stable across row order and datasets"""
+    anonymizer = DataAnonymizer(mode='hash', key='secret')
+    df_anon = anonymizer.name_surname(sample_df)
+
+    # Same dorsal, same pseudonym, whatever the order or the other rows
+    shuffled = anonymizer.name_surname(sample_df.iloc[::-1].head(2))
+    expected = df_anon.set_index('dorsal')['biker']
+    assert all(shuffled['biker'] == expected[shuffled['dorsal']].to_numpy())
+
+    # A different key gives different pseudonyms
+    other = DataAnonymizer(mode='hash', key='other').name_surname(sample_df)
+    assert other['biker'].tolist() != df_anon['biker'].tolist()
+
+def test_hash_mode_long_key(sample_df):
+    """Test that keys longer than BLAKE2b's 64 bytes are accepted and still select the pseudonyms"""
+    long_key = 'k' * 100
+    df_anon = DataAnonymizer(mode='hash', key=long_key).name_surname(sample_df)
+    again = DataAnonymizer(mode='hash', key=long_key.encode()).name_surname(sample_df)
+    other = DataAnonymizer(mode='hash', key='k' * 99 + 'j').name_surname(sample_df)
+
+    assert df_anon['biker'].tolist() == again['biker'].tolist()
+    assert df_anon['biker'].tolist() != other['biker'].tolist()
+
+def test_invalid_mode():
+    """Test that invalid modes and missing keys are rejected"""
+    with pytest.raises(ValueError):
+        DataAnonymizer(mode='faker')
+    with pytest.raises(ValueError):
+        DataAnonymizer(mode='hash')
+
 if __name__ == "__main__":
     pytest.main([__file__])
\ No newline at end of file
@@ -1,8 +1,12 @@
+import json
+import subprocess
+import sys
 import pytest
 import pandas as pd
 import matplotlib.pyplot as plt
 from pathlib import Path
-from monegros.src.ex3_histogram import TimeHistogram
+import numpy as np
+from monegros.src.ex3_histogram import HistogramRenderer, TimeHistogram, facet_slug
 
 @pytest.fixture
 def histogram_analyzer():
@@ -89,5 +93,151 @@ def test_time_grouping_consistency(histogram_analyzer, sample_df):
         assert 0 <= hours <= 23
         assert minutes in [0, 20, 40]
 
+def test_bucket_times_matches_scalar(histogram_analyzer):
+    """Test that the vectorized path matches minutes_002040"""
+    times = [f"{h:02d}:{m:02d}:{sec:02d}" for h in range(0, 24, 5) for m in range(60) for sec in (0, 59)]
+    df = pd.DataFrame({'time': times})
+
+    freq = histogram_analyzer.time_frequencies(df)
+    expected = pd.Series([histogram_analyzer.minutes_002040(t) for t in times]).value_counts().sort_index()
+
+    assert freq['time_grouped'].tolist() == expected.index.tolist()
+    assert freq['count'].tolist() == expected.tolist()
+
+def test_bucket_times_bin_width(histogram_analyzer, sample_df):
+    """Test configurable bin widths"""
+    freq_5 = histogram_analyzer.time_frequencies(sample_df, bin_minutes=5)
+    assert freq_5['time_grouped'].tolist() == ['05:15', '05:25', '05:55', '06:05', '06:25']
+
+    freq_60 = histogram_analyzer.time_frequencies(sample_df, bin_minutes=60)
+    assert freq_60['time_grouped'].tolist() == ['05:00', '06:00']
+    assert freq_60['count'].tolist() == [3, 2]
+
+    with pytest.raises(ValueError):
+        histogram_analyzer.bucket_times(sample_df, bin_minutes=0)
+
+def test_bucket_times_over_24h(histogram_analyzer):
+    """Test that times over 24h are bucketed instead of rejected"""
+    df = pd.DataFrame({'time': ['23:59:59', '24:10:00', '26:45:00']})
+    freq = histogram_analyzer.time_frequencies(df)
+
+    assert freq['time_grouped'].tolist() == ['23:40', '24:00', '26:40']
+
+def test_render_skips_unchanged(histogram_analyzer, sample_df, tmp_path):
+    """Test that an identical histogram is not rendered again"""
+    histogram_analyzer.img_path = tmp_path / 'histograma.png'
+    renderer = histogram_analyzer.renderer
+    time_freq = histogram_analyzer.time_frequencies(sample_df)
+
+    path, rendered = renderer.render(time_freq, histogram_analyzer.img_path)
+    assert rendered and path.exists()
+
+    _, rendered = renderer.render(time_freq, histogram_analyzer.img_path)
+    assert not rendered
+
+    # Different counts or options are rendered again
+    _, rendered = renderer.render(time_freq.iloc[:2], histogram_analyzer.img_path)
+    assert rendered
+    renderer.title = 'Another title'
+    _, rendered = renderer.render(time_freq.iloc[:2], histogram_analyzer.img_path)
+    assert rendered
+    renderer.tight = not renderer.tight
+    _, rendered = renderer.render(time_freq.iloc[:2], histogram_analyzer.img_path)
+    assert rendered
+
+def test_render_formats(histogram_analyzer, sample_df, tmp_path):
+    """Test the svg, csv and json outputs"""
+    time_freq = histogram_analyzer.time_frequencies(sample_df)
+    img_path = tmp_path / 'histograma.png'
+
+    svg_path, _ = histogram_analyzer.renderer.render(time_freq, img_path, 'svg')
+    assert svg_path.read_text().lstrip().startswith('<?xml')
+
+    csv_path, _ = histogram_analyzer.renderer.render(time_freq, img_path, 'csv')
+    assert pd.read_csv(csv_path, sep=';')['count'].tolist() == time_freq['count'].tolist()
+
+    json_path, _ = histogram_analyzer.renderer.render(time_freq, img_path, 'json')
+    assert json.loads(json_path.read_text()) == {'05:00': 1, '05:20': 1, '05:40': 1, '06:00': 1, '06:20': 1}
+
+    with pytest.raises(ValueError):
+        histogram_analyzer.renderer.render(time_freq, img_path, 'gif')
+
+@pytest.fixture
+def faceted_df():
+    """Riders of three clubs, one of them with a single rider"""
+    return pd.DataFrame({
+        'club_clean': ['UCSC', 'SÁSTAGO', 'UCSC', 'SÁSTAGO', 'UCSC', 'SOLO'],
+        'time': ['05:19:40', '05:29:40', '05:59:40', '06:05:00', '06:25:00', '07:00:00'],
+    })
+
+def test_facet_counts(histogram_analyzer, faceted_df):
+    """Test that grouped counts match one histogram per facet"""
+    keys, labels, counts = histogram_analyzer.facet_counts(faceted_df)
+
+    assert keys.tolist() == ['UCSC', 'SÁSTAGO', 'SOLO']
+    assert labels == histogram_analyzer.time_frequencies(faceted_df)['time_grouped'].tolist()
+    for key, row in zip(keys, counts):
+        expected = histogram_analyzer.time_frequencies(faceted_df[faceted_df['club_clean'] == key])
+        assert dict(zip(labels, row.tolist())) == dict(dict.fromkeys(labels, 0),
+                                                       **dict(zip(expected['time_grouped'], expected['count'])))
+    assert counts.sum() == len(faceted_df)
+
+def test_render_facets(histogram_analyzer, faceted_df, tmp_path):
+    """Test one file per facet, skipped facets and unchanged outputs"""
+    facets = histogram_analyzer.render_facets(faceted_df, output_dir=tmp_path, min_count=2)
+
+    assert facets['facet'].tolist() == ['UCSC', 'SÁSTAGO']
+    assert [Path(path).name for path in facets['path']] == ['histograma_ucsc.png', 'histograma_sastago.png']
+    assert all(Path(path).exists() for path in facets['path']) and facets['rendered'].all()
+
+    again = histogram_analyzer.render_facets(faceted_df, output_dir=tmp_path, min_count=2)
+    assert not again['rendered'].any()
+    assert facet_slug('C.C. Unió / Sant Cugat') == 'c_c_unio_sant_cugat'
+
+def test_render_facet_grids_in_processes(histogram_analyzer, tmp_path):
+    """Test small multiples rendered by a process pool"""
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'edition': np.repeat([f"monegros_{year}" for year in range(2015, 2025)], 50),
+        'seconds': rng.integers(4 * 3600, 9 * 3600, size=500),
+    })
+    facets = histogram_analyzer.render_facets(df, facet='edition', output_dir=tmp_path,
+                                              grid_columns=2, grid_panels=4, jobs=2)
+
+    assert len(facets) == 10
+    assert [Path(path).name for path in facets['path'].unique()] == [
+        'histograma_edition_001.png', 'histograma_edition_002.png', 'histograma_edition_003.png']
+    assert all(Path(path).exists() for path in facets['path'].unique())
+    with pytest.raises(ValueError):
+        histogram_analyzer.renderer.render_grid([], tmp_path / 'grid.png', 'csv')
+
+def test_render_facets_shared_rows(histogram_analyzer, tmp_path):
+    """Test that workers counting from the shared rows render the same histograms as in process"""
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({
+        'dorsal': np.arange(1, 601),
+        'club_clean': rng.choice(['UCSC', 'SÁSTAGO', 'FRAGA', 'HUESCA'], size=600),
+        'seconds': rng.integers(4 * 3600, 9 * 3600, size=600),
+    })
+    keys, labels, counts = histogram_analyzer.facet_counts(df)
+    serial = histogram_analyzer.render_facets(df, output_dir=tmp_path / 'serial')
+    shared = histogram_analyzer.render_facets(df, output_dir=tmp_path / 'shared', jobs=2)
+
+    assert serial['facet'].tolist() == shared['facet'].tolist() == keys.tolist()
+    assert shared['count'].tolist() == counts.sum(axis=1).tolist()
+    for path, other in zip(serial['path'], shared['path']):
+        assert Path(f"{path}.sha256").read_text() == Path(f"{other}.sha256").read_text()
+
+    renderer = HistogramRenderer(**dict(histogram_analyzer.renderer.options(), figsize=(10, 4), tight=False))
+    renderer.title = f"{renderer.title}: {keys[0]}"
+    expected = renderer.content_hash(pd.DataFrame({'time_grouped': labels, 'count': counts[0]}), 'png')
+    assert Path(f"{shared['path'].iloc[0]}.sha256").read_text() == expected
+
+def test_matplotlib_not_imported_on_import():
+    """Test that importing the module does not import matplotlib"""
+    code = "import sys, monegros.src.ex3_histogram; print('matplotlib' in sys.modules)"
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == 'False'
+
 if __name__ == "__main__":
     pytest.main([__file__])
\ No newline at end of file
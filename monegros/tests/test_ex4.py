@@ -1,6 +1,10 @@
 import pytest
+import re
+import numpy as np
 import pandas as pd
+from monegros.src.ex1_data import DataLoader
 from monegros.src.ex4_clubs import ClubAnalyzer
+from monegros.src.ranking import RankIndex
 
 @pytest.fixture
 def club_analyzer():
@@ -95,5 +99,106 @@ def test_club_summary_structure(club_analyzer, sample_df):
     # Check that INDEPENDIENTE exists (due to None/empty values in sample)
     assert 'INDEPENDIENTE' in unique_clubs.index
 
+def reference_clean_club(analyzer, club_name):
+    """Original per-pattern implementation of clean_club"""
+    if not isinstance(club_name, str):
+        return 'INDEPENDIENTE'
+    cleaned = club_name.upper()
+    for prefix in analyzer.prefixes:
+        cleaned = cleaned.replace(prefix, '')
+    for pattern in analyzer.start_patterns:
+        cleaned = re.sub(pattern, '', cleaned)
+    for pattern in analyzer.end_patterns:
+        cleaned = re.sub(pattern, '', cleaned)
+    cleaned = cleaned.strip()
+    return cleaned if cleaned else 'INDEPENDIENTE'
+
+def test_clean_club_matches_reference(club_analyzer):
+    """Test that the compiled cleaner is identical to the per-pattern one"""
+    starts = ['', 'C.C. ', 'CC ', 'A.C ', 'SD ', 'CC AC ', 'AC CC ']
+    ends = ['', ' T.T.', ' TT', ' C.D', ' AD AC', ' AC AD']
+    names = [f"{prefix}{start}Test{end}"
+             for prefix in ['', 'Club ', 'Peña Ciclista ', 'club club ciclista ']
+             for start in starts for end in ends]
+    names += DataLoader().read_data()['club'].dropna().unique().tolist()
+
+    for name in names:
+        assert club_analyzer.clean_club(name) == reference_clean_club(club_analyzer, name)
+
+def test_clean_clubs_column(club_analyzer, sample_df):
+    """Test that the column cleaner matches clean_club row by row"""
+    clubs = pd.concat([sample_df['club']] * 3, ignore_index=True)
+    cleaned = club_analyzer.clean_clubs(clubs)
+
+    assert cleaned.tolist() == [club_analyzer.clean_club(club) for club in clubs]
+    assert cleaned.index.equals(clubs.index)
+
+@pytest.fixture
+def race_df(club_analyzer):
+    """The dataset with cleaned clubs, non-finishers included"""
+    df = DataLoader().read_data()
+    return df.assign(club_clean=club_analyzer.clean_clubs(df['club']))
+
+def test_club_statistics_match_groupby(club_analyzer, race_df):
+    """Test the single-pass statistics against per-club pandas aggregations"""
+    stats = club_analyzer.club_statistics(race_df).set_index('club')
+    finishers = race_df[race_df['seconds'] > 0]
+    expected = finishers.groupby('club_clean')['seconds'].agg(['min', 'median', 'mean', 'count'])
+    matched = stats.loc[expected.index]
+
+    assert stats['participants'].to_dict() == race_df['club_clean'].value_counts().to_dict()
+    assert (matched['finishers'] == expected['count']).all()
+    assert (matched['best_seconds'] == expected['min']).all()
+    assert np.allclose(matched['median_seconds'], expected['median'])
+    assert np.allclose(matched['mean_seconds'], expected['mean'])
+
+    index = RankIndex.from_frame(finishers)
+    for club in ['UCSC', 'SARIÑENA', 'OSCENSE']:
+        assert stats.loc[club, 'best_position'] == index.club_best(club)['position']
+        best = finishers[finishers['club_clean'] == club].sort_values(['seconds', 'dorsal'], kind='stable')
+        assert stats.loc[club, 'best_dorsal'] == best['dorsal'].iloc[0]
+        assert stats.loc[club, 'best_biker'] == best['biker'].iloc[0]
+        assert stats.loc[club, 'best_time'] == best['time'].iloc[0]
+
+def test_club_statistics_without_finishers(club_analyzer):
+    """Test a club whose riders all have time 00:00:00"""
+    df = pd.DataFrame({
+        'dorsal': [1, 2, 3],
+        'biker': ['A', 'B', 'C'],
+        'club_clean': ['X', 'Y', 'Y'],
+        'time': ['00:00:00', '05:00:00', '04:00:00'],
+    })
+    stats = club_analyzer.club_statistics(df).set_index('club')
+
+    assert stats.loc['X', 'finishers'] == 0
+    assert pd.isna(stats.loc['X', 'best_position']) and pd.isna(stats.loc['X', 'best_time'])
+    assert pd.isna(stats.loc['X', 'best_dorsal']) and pd.isna(stats.loc['X', 'best_biker'])
+    assert stats.loc['Y', 'best_biker'] == 'C'
+    assert stats.loc['Y', 'best_dorsal'] == 3
+    assert stats.loc['Y', 'best_position'] == 1
+    assert stats.loc['Y', 'median_seconds'] == 4.5 * 3600
+
+def test_club_statistics_on_table(club_analyzer, race_df):
+    """Test that a cleaned RaceTable gives the same statistics"""
+    table = club_analyzer.clean_table(DataLoader().load_table(with_names=True))
+    from_table = club_analyzer.club_statistics(table)
+    from_frame = club_analyzer.club_statistics(race_df)
+
+    pd.testing.assert_frame_equal(from_table.drop(columns='best_dorsal'), from_frame.drop(columns='best_dorsal'))
+    assert from_table['best_dorsal'].tolist() == from_frame['best_dorsal'].tolist()
+
+def test_top_clubs(club_analyzer, race_df):
+    """Test top-k selection against a full sort"""
+    stats = club_analyzer.club_statistics(race_df)
+
+    fastest = club_analyzer.top_clubs(stats, 10, by='best_position', ascending=True)
+    expected = stats.sort_values(['best_position'], kind='stable').head(10)
+    assert fastest['best_position'].tolist() == expected['best_position'].tolist()
+
+    largest = club_analyzer.top_clubs(stats, 3, by='participants')
+    assert largest['club'].tolist() == race_df['club_clean'].value_counts().index[:3].tolist()
+    assert len(club_analyzer.top_clubs(stats, 10 ** 6)) == len(stats)
+    assert club_analyzer.top_clubs(stats, 0).empty
+
 if __name__ == "__main__":
     pytest.main([__file__])
\ No newline at end of file
@@ -1,6 +1,8 @@
 import pytest
 import pandas as pd
 from monegros.src.ex5_ucsc import UCSCAnalyzer
+from monegros.src.sketch import KLLSketch
+from monegros.utils.times import parse_seconds
 
 @pytest.fixture
 def ucsc_analyzer():
@@ -89,5 +91,22 @@ def test_analyze_ucsc_tied_times(ucsc_analyzer):
     assert best_time_df['time'] == '05:00:00'
     assert position_info['position'] in [1, 2]  # Could be either position due to tie
 
+def test_analyze_other_club(ucsc_analyzer, sample_df):
+    """Test analysis of a club other than UCSC"""
+    club_df, best_time_df, position_info = ucsc_analyzer.analyze_ucsc(sample_df, club='OTHER')
+
+    assert len(club_df) == 3
+    assert best_time_df['biker'] == 'Biker2'
+    assert position_info['position'] == 2
+
+def test_analyze_ucsc_with_sketch(ucsc_analyzer, sample_df):
+    """Test that a KLL sketch can stand in for the rank index"""
+    sketch = KLLSketch().update(parse_seconds(sample_df['time']))
+    _, _, exact = UCSCAnalyzer().analyze_ucsc(sample_df)
+    _, _, approximate = ucsc_analyzer.analyze_ucsc(sample_df, rank_index=sketch)
+
+    # Sketches of fewer than k values are exact
+    assert approximate == exact
+
 if __name__ == "__main__":
     pytest.main([__file__])
\ No newline at end of file
@@ -0,0 +1,154 @@
+import json
+import tracemalloc
+import pytest
+import pandas as pd
+from monegros.utils.logger import Logger, Metrics
+
+@pytest.fixture
+def recorder():
+    """Fixture to create an empty Metrics recorder"""
+    return Metrics()
+
+def test_span(recorder):
+    """Test that a span records times and rows"""
+    with recorder.span('stage', rows_in=10) as record:
+        sum(range(10000))
+        record['rows_out'] = 5
+
+    record = recorder.records[0]
+    assert record['stage'] == 'stage'
+    assert record['rows_in'] == 10
+    assert record['rows_out'] == 5
+    assert record['wall_s'] >= 0
+    assert record['cpu_s'] >= 0
+
+def test_span_records_on_error(recorder):
+    """Test that a failing stage is still recorded"""
+    with pytest.raises(RuntimeError):
+        with recorder.span('failing'):
+            raise RuntimeError("boom")
+
+    assert recorder.records[0]['stage'] == 'failing'
+
+def test_timed(recorder):
+    """Test that the decorator takes rows from the dataframes"""
+    class Analyzer:
+        @recorder.timed
+        def analyze(self, df):
+            return df[df['x'] > 1], None
+
+    Analyzer().analyze(pd.DataFrame({'x': [1, 2, 3]}))
+
+    record = recorder.records[0]
+    assert record['stage'].endswith('Analyzer.analyze')
+    assert (record['rows_in'], record['rows_out']) == (3, 2)
+
+def test_trace_memory_and_profile(recorder, tmp_path):
+    """Test peak memory tracking and cProfile dumps"""
+    recorder.configure(trace_memory=True, profile_dir=tmp_path)
+    with recorder.span('alloc'):
+        data = [0] * 1_000_000
+        del data
+
+    assert recorder.records[0]['peak_mb'] > 5
+    assert (tmp_path / 'alloc.prof').exists()
+
+    # Repeated stages keep every dump
+    with recorder.span('alloc'):
+        pass
+    assert (tmp_path / 'alloc.prof').exists() and (tmp_path / 'alloc.2.prof').exists()
+
+def test_overlapping_spans_keep_tracing(recorder):
+    """Test that a span ending while another is open, as with concurrent stages, does not stop its tracing"""
+    recorder.configure(trace_memory=True)
+    first, second = recorder.span('first'), recorder.span('second')
+    first.__enter__()
+    second.__enter__()
+    first.__exit__(None, None, None)
+    assert tracemalloc.is_tracing()
+    data = [0] * 1_000_000
+    del data
+    second.__exit__(None, None, None)
+
+    assert not tracemalloc.is_tracing()
+    assert recorder.records[1]['stage'] == 'second'
+    assert recorder.records[1]['peak_mb'] > 5
+
+def test_trace_memory_without_reset_peak(recorder, monkeypatch):
+    """Test memory spans on Python 3.8, whose tracemalloc has no reset_peak"""
+    monkeypatch.delattr(tracemalloc, 'reset_peak')
+    recorder.configure(trace_memory=True)
+    tracemalloc.start()
+    try:
+        with recorder.span('stage'):
+            pass
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+    assert recorder.records[0]['peak_mb'] >= 0
+
+def test_outputs(recorder):
+    """Test JSON lines and summary outputs"""
+    with recorder.span('first', rows_in=1):
+        pass
+    with recorder.span('second'):
+        pass
+
+    lines = recorder.to_json_lines().splitlines()
+    assert [json.loads(line)['stage'] for line in lines] == ['first', 'second']
+    assert 'second' in recorder.summary()
+
+@pytest.fixture
+def logger():
+    """Fixture with a logger whose configuration is restored afterwards"""
+    level, handler = Logger.level, Logger.handler
+    yield Logger("TestLogger")
+    Logger.handler.close()
+    Logger.level, Logger.handler = level, handler
+
+def test_log_levels(logger, capsys):
+    """Test that messages below the threshold are dropped"""
+    Logger.configure(level='WARNING')
+    logger.info("hidden")
+    logger.warning("shown %d", 1)
+    logger.error("failed")
+
+    captured = capsys.readouterr()
+    assert "hidden" not in captured.out
+    assert "WARNING - TestLogger: shown 1" in captured.out
+    assert "ERROR - TestLogger: failed" in captured.err
+
+    with pytest.raises(ValueError):
+        Logger.configure(level='VERBOSE')
+    with pytest.raises(ValueError, match='Expected one of'):
+        logger.log("message", "VERBOSE")
+    with pytest.raises(ValueError):
+        logger.preview("content", level="info")
+
+def test_lazy_preview(logger, capsys):
+    """Test that previews are only rendered for enabled levels"""
+    rendered = []
+
+    def render():
+        rendered.append(True)
+        return "preview"
+
+    logger.preview(render, level='DEBUG')
+    assert rendered == []
+
+    logger.preview(render)
+    assert rendered == [True]
+    assert capsys.readouterr().out == "preview\n"
+
+def test_buffered_handler(logger, capsys):
+    """Test that the background writer keeps the order of the lines"""
+    Logger.configure(buffered=True)
+    for i in range(100):
+        logger.info("line %d", i)
+    Logger.flush()
+
+    lines = capsys.readouterr().out.splitlines()
+    assert [line.rsplit(' ', 1)[1] for line in lines] == [str(i) for i in range(100)]
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,88 @@
+import pytest
+import pandas as pd
+from monegros.src.pipeline import Stage, Pipeline
+
+@pytest.fixture
+def sample_df():
+    """Create a sample DataFrame for testing"""
+    return pd.DataFrame({
+        'dorsal': [1, 2, 3],
+        'time': ['05:30:00', '00:00:00', '06:15:00']
+    })
+
+@pytest.fixture
+def calls():
+    """Records the stages that actually ran"""
+    return []
+
+@pytest.fixture
+def pipeline(sample_df, calls):
+    """Fixture with a small diamond-shaped pipeline"""
+    def stage(name, func):
+        def run(*args):
+            calls.append(name)
+            return func(*args)
+        return run
+
+    def add_column(column, value):
+        def add(df):
+            df_out = df.copy(deep=False)
+            df_out[column] = value
+            return df_out
+        return add
+
+    return Pipeline([
+        Stage('load', stage('load', lambda: sample_df)),
+        Stage('left', stage('left', add_column('left', 1)), depends=('load',),
+              reads=('time',), adds=('left',)),
+        Stage('right', stage('right', add_column('right', 2)), depends=('load',),
+              reads=('time',), adds=('right',)),
+        Stage('join', stage('join', lambda a, b: a.join(b[['right']])), depends=('left', 'right'),
+              reads=('left',)),
+    ])
+
+def test_resolve(pipeline):
+    """Test that only the needed stages are resolved, dependencies first"""
+    assert pipeline.resolve(['left']) == ['load', 'left']
+    assert pipeline.resolve(['join']) == ['load', 'left', 'right', 'join']
+
+    with pytest.raises(ValueError):
+        pipeline.resolve(['unknown'])
+
+def test_run_memoizes(pipeline, calls, sample_df):
+    """Test that stages run once and inputs are not modified"""
+    result = pipeline.run(['left'])
+    assert calls == ['load', 'left']
+    assert 'left' in result['left'].columns
+
+    result = pipeline.run(['join'])
+    assert calls == ['load', 'left', 'right', 'join']
+    assert list(result['join'].columns) == ['dorsal', 'time', 'left', 'right']
+
+    assert list(sample_df.columns) == ['dorsal', 'time']
+
+def test_run_concurrent(pipeline, calls):
+    """Test that independent stages give the same result concurrently"""
+    pipeline.max_workers = 2
+    result = pipeline.run(['join'])
+
+    assert sorted(calls) == ['join', 'left', 'load', 'right']
+    assert list(result['join'].columns) == ['dorsal', 'time', 'left', 'right']
+
+def test_missing_columns(sample_df):
+    """Test that a stage reading a missing column fails early"""
+    pipeline = Pipeline([
+        Stage('load', lambda: sample_df),
+        Stage('clubs', lambda df: df, depends=('load',), reads=('club',)),
+    ])
+
+    with pytest.raises(ValueError, match="needs columns"):
+        pipeline.run(['clubs'])
+
+def test_unknown_dependency():
+    """Test that stages must be declared after their dependencies"""
+    with pytest.raises(ValueError):
+        Pipeline([Stage('clubs', lambda df: df, depends=('load',))])
+
+if __name__ == "__main__":
+    pytest.main([__file__])
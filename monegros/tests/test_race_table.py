@@ -0,0 +1,127 @@
+import pytest
+import numpy as np
+import pandas as pd
+from monegros.src.ex1_data import DataLoader
+from monegros.src.ex3_histogram import TimeHistogram
+from monegros.src.ex4_clubs import ClubAnalyzer
+from monegros.src.race_table import RaceTable
+from monegros.src.ranking import RankIndex
+from monegros.src.synthetic import generate_race
+
+@pytest.fixture
+def dataset():
+    """The typed dataset"""
+    return DataLoader().read_data()
+
+@pytest.fixture
+def sample_table():
+    """Small table with a rider without club and a non-finisher"""
+    return RaceTable.from_frame(pd.DataFrame({
+        'dorsal': [1, 2, 3, 4],
+        'biker': ['A', 'B', 'C', 'D'],
+        'club': ['C.C. Huesca', None, 'Huesca', 'Club Fraga'],
+        'time': ['05:00:00', '06:00:00', '00:00:00', '04:30:00'],
+    }), with_names=True)
+
+def test_round_trip(dataset):
+    """Test that a table converts back to the loader layout"""
+    table = RaceTable.from_frame(dataset, with_names=True)
+    frame = table.to_frame()
+
+    assert frame.columns.tolist() == dataset.columns.tolist()
+    assert frame['dorsal'].tolist() == dataset['dorsal'].tolist()
+    assert frame['time'].tolist() == dataset['time'].tolist()
+    assert frame['biker'].tolist() == dataset['biker'].tolist()
+    assert frame['club'].astype(object).tolist() == dataset['club'].astype(object).tolist()
+    assert np.array_equal(frame['seconds'], dataset['seconds'])
+
+def test_compact_dtypes(dataset):
+    """Test column dtypes and the memory used per row"""
+    table = DataLoader().load_table()
+
+    assert table.dorsal.dtype == np.uint16
+    assert table.seconds.dtype == np.uint32
+    assert table.club_codes.dtype == np.int16
+    assert table.biker is None
+    row_bytes = table.dorsal.itemsize + table.seconds.itemsize + table.club_codes.itemsize
+    assert row_bytes == 8
+    assert table.nbytes < dataset.memory_usage(deep=True).sum() / 4
+
+def test_large_dorsals():
+    """Test that dorsals over 65535 are kept as uint32"""
+    table = RaceTable([1, 70000], [10, 20], [0, 0], ['X'])
+    assert table.dorsal.dtype == np.uint32
+    assert table.dorsal.tolist() == [1, 70000]
+
+def test_length_mismatch():
+    """Test that columns of different lengths are rejected"""
+    with pytest.raises(ValueError):
+        RaceTable([1, 2], [10], [0, 0], ['X'])
+
+def test_selection_shares_names(sample_table):
+    """Test row selection and finishers"""
+    finishers = sample_table.finishers()
+
+    assert finishers.dorsal.tolist() == [1, 2, 4]
+    assert finishers.biker.tolist() == ['A', 'B', 'D']
+    assert finishers.club_names is sample_table.club_names
+    assert sample_table[[3]].times.tolist() == ['04:30:00']
+
+def test_map_clubs_merges_names(sample_table):
+    """Test that cleaned names that become equal share one entry"""
+    cleaned = ClubAnalyzer().clean_table(sample_table)
+
+    assert sorted(cleaned.club_names.tolist()) == ['FRAGA', 'HUESCA', 'INDEPENDIENTE']
+    assert cleaned.clubs.astype(object).tolist() == ['HUESCA', 'INDEPENDIENTE', 'HUESCA', 'FRAGA']
+    assert cleaned.club_counts().to_dict() == {'HUESCA': 2, 'INDEPENDIENTE': 1, 'FRAGA': 1}
+
+def test_club_statistics_skips_empty_clubs(sample_table):
+    """Test club statistics when the name table has clubs without riders"""
+    analyzer = ClubAnalyzer()
+    clubbed = analyzer.clean_table(sample_table[[0, 2, 3]])
+    stats = analyzer.club_statistics(clubbed)
+    assert stats['club'].tolist() == ['HUESCA', 'FRAGA']
+    assert stats['participants'].tolist() == [2, 1]
+    assert stats['best_biker'].tolist() == ['A', 'D']
+
+    subset = analyzer.clean_table(sample_table)[[1, 3]]
+    stats = analyzer.club_statistics(subset)
+    assert stats['club'].tolist() == ['FRAGA', 'INDEPENDIENTE']
+    assert (stats['participants'] > 0).all()
+    assert stats['best_biker'].tolist() == ['D', 'B']
+
+def test_analyzers_on_table(dataset):
+    """Test that histogram, clubs and ranking match the dataframe results"""
+    finishers = dataset[dataset['seconds'] > 0]
+    table = DataLoader().load_table().finishers()
+    analyzer = ClubAnalyzer()
+
+    pd.testing.assert_frame_equal(TimeHistogram().time_frequencies(table),
+                                  TimeHistogram().time_frequencies(finishers))
+
+    cleaned = analyzer.clean_table(table)
+    club_clean = analyzer.clean_clubs(finishers['club'])
+    expected = club_clean.value_counts()
+    counts = cleaned.club_counts()
+    assert counts.to_dict() == expected.to_dict()
+    assert counts.tolist() == expected.tolist()
+
+    index = RankIndex.from_table(cleaned)
+    reference = RankIndex.from_frame(finishers.assign(club_clean=club_clean))
+    assert index.club_best('UCSC') == reference.club_best('UCSC')
+    assert index.club_best('NO EXISTE') is None
+    assert index.dorsal_position(5) == reference.dorsal_position(5)
+
+def test_concat_merges_club_tables():
+    """Test concatenating editions with different club tables"""
+    first = RaceTable.from_frame(generate_race(500, seed=1))
+    second = RaceTable.from_frame(generate_race(500, seed=2, dorsal_offset=500))
+    combined = RaceTable.concat([first, second])
+
+    assert len(combined) == 1000
+    assert len(set(combined.club_names.tolist())) == len(combined.club_names)
+    expected = first.clubs.astype(object).tolist() + second.clubs.astype(object).tolist()
+    assert combined.clubs.astype(object).tolist() == expected
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,93 @@
+import pytest
+import numpy as np
+import pandas as pd
+from monegros.src.ranking import RankIndex, counting_sort, radix_argsort, rank_positions
+
+@pytest.fixture
+def sample_df():
+    """Create a sample DataFrame for testing"""
+    return pd.DataFrame({
+        'dorsal': [10, 20, 30, 40, 50],
+        'club_clean': ['UCSC', 'OTHER', 'UCSC', 'OTHER', 'THIRD'],
+        'time': ['05:30:00', '05:00:00', '05:00:00', '06:00:00', '05:45:00']
+    })
+
+@pytest.fixture
+def rank_index(sample_df):
+    """Fixture to create a RankIndex from the sample"""
+    return RankIndex.from_frame(sample_df)
+
+def test_position_ties(sample_df):
+    """Test both tie rules"""
+    index_min = RankIndex.from_frame(sample_df, ties='min')
+    index_max = RankIndex.from_frame(sample_df, ties='max')
+
+    assert index_min.position(5 * 3600).tolist() == 1
+    assert index_max.position(5 * 3600).tolist() == 2
+    assert index_min.position([5 * 3600 + 1800, 6 * 3600]).tolist() == [3, 5]
+
+    with pytest.raises(ValueError):
+        RankIndex.from_frame(sample_df, ties='average')
+
+def test_position_matches_sort(rank_index, sample_df):
+    """Test that positions match a full sort for untied times"""
+    seconds = pd.to_timedelta(sample_df['time']).dt.total_seconds().astype(int)
+    expected = seconds.rank(method='min').astype(int)
+
+    assert rank_index.position(seconds.to_numpy()).tolist() == expected.tolist()
+
+def test_dorsal_queries(rank_index):
+    """Test position and percentage lookups by dorsal"""
+    assert rank_index.dorsal_position(10) == 3
+    assert rank_index.dorsal_position([50, 20, 40]).tolist() == [4, 1, 5]
+    assert rank_index.percentage(rank_index.dorsal_seconds(40)) == pytest.approx(100.0)
+
+    with pytest.raises(KeyError):
+        rank_index.dorsal_position(99)
+
+def test_club_best(rank_index):
+    """Test the best position of a club"""
+    best = rank_index.club_best('UCSC')
+
+    assert best['seconds'] == 5 * 3600
+    assert best['position'] == 1
+    assert best['percentage'] == pytest.approx(20.0)
+    assert rank_index.club_best('MISSING') is None
+
+def test_batch_queries():
+    """Test a large batch of queries against a full sort"""
+    rng = np.random.default_rng(0)
+    seconds = rng.integers(4 * 3600, 12 * 3600, size=10000)
+    index = RankIndex(seconds)
+
+    queries = rng.integers(4 * 3600, 12 * 3600, size=1000)
+    expected = [(seconds < q).sum() + 1 for q in queries]
+    assert index.position(queries).tolist() == expected
+
+def test_linear_sorts():
+    """Test counting and radix sorts against NumPy's comparison sorts"""
+    rng = np.random.default_rng(1)
+    seconds = rng.integers(0, 48 * 3600, size=50000).astype(np.uint32)
+    dorsals = rng.permutation(50000).astype(np.uint32)
+
+    sorted_seconds = counting_sort(seconds)
+    assert sorted_seconds.dtype == np.uint32
+    assert np.array_equal(sorted_seconds, np.sort(seconds))
+    assert np.array_equal(radix_argsort(seconds), np.argsort(seconds, kind='stable'))
+    assert np.array_equal(radix_argsort(seconds, radix_argsort(dorsals)), np.lexsort((dorsals, seconds)))
+    assert np.array_equal(radix_argsort(np.array([3, -1, 2])), [1, 2, 0])
+    assert counting_sort(np.array([2 ** 30, 5])).tolist() == [5, 2 ** 30]
+
+def test_rank_positions():
+    """Test that positions from counts match ranks and the rank index"""
+    rng = np.random.default_rng(2)
+    seconds = rng.integers(4 * 3600, 5 * 3600, size=20000)
+
+    for ties in RankIndex.TIES:
+        expected = pd.Series(seconds).rank(method=ties).astype(int).tolist()
+        assert rank_positions(seconds, ties).tolist() == expected
+        assert RankIndex(seconds, ties=ties).position(seconds).tolist() == expected
+    assert rank_positions(np.array([2 ** 40, 7])).tolist() == [2, 1]
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,126 @@
+import asyncio
+import json
+import pytest
+import pandas as pd
+from urllib.parse import quote
+from monegros.src.service import RaceIndex, QueryService, build_index
+
+@pytest.fixture(scope='module')
+def index():
+    """Index of the analyzed dataset, built once for the module"""
+    return build_index(use_cache=False)
+
+@pytest.fixture
+def service(index):
+    """Fixture to create a QueryService on a free port"""
+    return QueryService(index, port=0)
+
+@pytest.fixture
+def sample_frame():
+    """Small analyzed frame with a tie"""
+    return pd.DataFrame({
+        'dorsal': [3, 1, 2, 4],
+        'biker': ['C', 'A', 'B', 'D'],
+        'club_clean': ['A', 'A', 'B', 'A'],
+        'time': ['05:00:00', '04:00:00', '05:00:00', '06:00:00'],
+    })
+
+async def fetch(reader, writer, path, method='GET', body=b''):
+    """Sends one request over an open connection and returns (status, json body)"""
+    length = f"Content-Length: {len(body)}\r\n" if body else ''
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: test\r\n{length}\r\n".encode('latin-1') + body)
+    await writer.drain()
+    head = (await reader.readuntil(b'\r\n\r\n')).decode('latin-1').split('\r\n')
+    length = next(int(line.split(':', 1)[1]) for line in head if line.lower().startswith('content-length'))
+    return int(head[0].split(' ')[1]), json.loads(await reader.readexactly(length))
+
+def test_index_queries(index):
+    """Test rider, club, histogram and position queries against RankIndex"""
+    rider = index.rider(5)
+    assert rider['dorsal'] == 5
+    assert rider['position'] == index.rank_index.dorsal_position(5)
+
+    ucsc = index.club('UCSC', limit=3)
+    assert len(ucsc['riders']) == 3
+    assert ucsc['riders'][0]['position'] == ucsc['best']['position'] == index.featured['position']
+    assert [r['seconds'] for r in ucsc['riders']] == sorted(r['seconds'] for r in ucsc['riders'])
+
+    assert index.clubs_table(1) == [{'club': 'INDEPENDIENTE', 'participants': 2486}]
+    assert sum(bucket['count'] for bucket in index.histogram()) == index.total
+    assert index.position(0)['position'] == 1
+
+    with pytest.raises(KeyError):
+        index.rider(999999)
+    with pytest.raises(KeyError):
+        index.club('NO EXISTE')
+
+def test_index_from_frame(sample_frame):
+    """Test positions with tied times on a small frame"""
+    index = RaceIndex(sample_frame)
+
+    assert [index.rider(d)['position'] for d in (1, 2, 3, 4)] == [1, 2, 2, 4]
+    assert index.club('A')['riders'][0]['dorsal'] == 1
+    assert index.clubs_table() == [{'club': 'A', 'participants': 3}, {'club': 'B', 'participants': 1}]
+
+def test_route_errors(service):
+    """Test status codes of bad queries"""
+    assert service.route('/riders/999999', {})[0] == 404
+    assert service.route('/riders/abc', {})[0] == 400
+    assert service.route('/position', {'time': 'bad'})[0] == 400
+    assert service.route('/position', {})[0] == 400
+    assert service.route('/clubs', {'limit': 'x'})[0] == 400
+    assert service.route('/clubs', {'limit': '-5'})[0] == 400
+    assert service.route('/clubs/UCSC', {'limit': '1.5'})[0] == 400
+    assert service.route('/unknown', {})[0] == 404
+
+def test_http_concurrent_clients(service, index):
+    """Test concurrent keep-alive clients over HTTP"""
+    async def client(i):
+        reader, writer = await asyncio.open_connection(service.host, service.port)
+        results = []
+        for dorsal in index.dorsals[i::50][:5]:
+            results.append(await fetch(reader, writer, f"/riders/{dorsal}"))
+        results.append(await fetch(reader, writer, f"/clubs/{quote('SARIÑENA')}?limit=2"))
+        writer.close()
+        return results
+
+    async def scenario():
+        await service.start()
+        try:
+            responses = await asyncio.gather(*(client(i) for i in range(20)))
+            reader, writer = await asyncio.open_connection(service.host, service.port)
+            not_allowed = await fetch(reader, writer, '/health', method='POST')
+            writer.close()
+            return responses, not_allowed
+        finally:
+            await service.stop()
+
+    responses, not_allowed = asyncio.run(scenario())
+    for i, results in enumerate(responses):
+        assert all(status == 200 for status, _ in results)
+        assert [body['dorsal'] for _, body in results[:-1]] == index.dorsals[i::50][:5]
+        assert results[-1][1]['club'] == 'SARIÑENA'
+    assert not_allowed[0] == 405
+
+def test_http_request_bodies(service):
+    """Test that request bodies are discarded instead of being read as the next request"""
+    async def scenario():
+        await service.start()
+        try:
+            reader, writer = await asyncio.open_connection(service.host, service.port)
+            posted = await fetch(reader, writer, '/health', method='POST', body=b'GET /riders/1 HTTP/1.1\r\n\r\n')
+            after = await fetch(reader, writer, '/health')
+            large = await fetch(reader, writer, '/health', method='POST', body=b'x' * (service.MAX_HEAD + 1))
+            closed = await reader.read()
+            writer.close()
+            return posted, after, large, closed
+        finally:
+            await service.stop()
+
+    posted, after, large, closed = asyncio.run(asyncio.wait_for(scenario(), timeout=10))
+    assert posted[0] == 405
+    assert after == (200, {'status': 'ok', 'riders': service.index.total})
+    assert large[0] == 405 and closed == b''
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,94 @@
+import gc
+import os
+import pytest
+import numpy as np
+from multiprocessing import shared_memory
+from monegros.src.ex1_data import DataLoader
+from monegros.src.ex3_histogram import TimeHistogram
+from monegros.src.shared import SharedTable, attach, detach, map_shared
+
+@pytest.fixture
+def table():
+    """The dataset as a RaceTable with names"""
+    return DataLoader().load_table(with_names=True)
+
+def segment_exists(name):
+    """Whether a shared memory segment can still be opened"""
+    try:
+        segment = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return False
+    segment.close()
+    return True
+
+def club_histogram(table, club_code):
+    """Histogram counts of one club, run in the workers"""
+    return np.bincount(table.seconds[table.club_codes == club_code] // 1200, minlength=50)
+
+def column_info(table, _):
+    """Whether the worker got read-only views"""
+    return table.seconds.flags.writeable, table.seconds.flags.owndata
+
+@pytest.mark.parametrize('backend', ['shm', 'mmap'])
+def test_attach_views(table, backend, tmp_path):
+    """Test that attached columns are read-only views equal to the table"""
+    with SharedTable(table, backend=backend, directory=tmp_path) as shared:
+        view = attach(shared.handle)
+        assert not view.seconds.flags.writeable
+        assert not view.seconds.flags.owndata
+        assert attach(shared.handle) is view
+        for column in ('dorsal', 'seconds', 'club_codes'):
+            assert np.array_equal(getattr(view, column), getattr(table, column))
+            assert getattr(view, column).dtype == getattr(table, column).dtype
+        assert view.biker.tolist() == table.biker.tolist()
+        assert view.club_names.tolist() == table.club_names.tolist()
+        assert view.to_frame()['time'].tolist() == table.to_frame()['time'].tolist()
+        with pytest.raises(ValueError):
+            view.seconds[0] = 1
+        del view
+        detach(shared.handle['name'])
+
+def test_close_removes_segment(table):
+    """Test that segments are removed on close and on garbage collection"""
+    with SharedTable(table) as shared:
+        name = shared.handle['name']
+        assert segment_exists(name)
+    assert shared.closed
+    assert not segment_exists(name)
+
+    shared = SharedTable(table)
+    name = shared.handle['name']
+    del shared
+    gc.collect()
+    assert not segment_exists(name)
+
+def test_mmap_file_removed(table, tmp_path):
+    """Test that the mapped file is removed on close"""
+    shared = SharedTable(table, backend='mmap', directory=tmp_path)
+    assert os.path.exists(shared.handle['name'])
+    shared.close()
+    assert not os.path.exists(shared.handle['name'])
+
+def test_invalid_backend(table):
+    """Test that unknown backends are rejected"""
+    with pytest.raises(ValueError):
+        SharedTable(table, backend='pickle')
+
+@pytest.mark.parametrize('backend', ['shm', 'mmap'])
+def test_map_shared_workers(table, backend):
+    """Test that worker processes compute on the shared table"""
+    codes = list(range(5))
+    results = map_shared(club_histogram, table, codes, jobs=2, backend=backend)
+    expected = [club_histogram(table, code) for code in codes]
+
+    for result, reference in zip(results, expected):
+        assert np.array_equal(result, reference)
+    assert map_shared(column_info, table, [0], jobs=2, backend=backend) == [(False, False)]
+
+def test_map_shared_in_process(table):
+    """Test that a single job runs in process on the table itself"""
+    counts = map_shared(lambda t, _: TimeHistogram().bucket_times(t)[1], table, [None])[0]
+    assert counts.sum() == len(table)
+
+if __name__ == "__main__":
+    pytest.main([__file__])
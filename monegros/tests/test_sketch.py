@@ -0,0 +1,87 @@
+import pytest
+import numpy as np
+from monegros.src.sketch import KLLSketch, sketch_csv
+from monegros.src.ex1_data import DataLoader
+from monegros.src.synthetic import write_race_csv
+
+@pytest.fixture
+def finish_seconds():
+    """Synthetic finish times of 300k riders"""
+    rng = np.random.default_rng(0)
+    return np.clip(rng.lognormal(np.log(6.5 * 3600), 0.18, 300_000), 3 * 3600, 15 * 3600).astype(np.int64)
+
+def max_rank_error(sketch, values):
+    """Largest rank error of the sketch over a grid of queries, normalized by n"""
+    ordered = np.sort(values)
+    queries = np.linspace(ordered[0], ordered[-1], 400)
+    return np.abs(sketch.rank(queries) - np.searchsorted(ordered, queries)).max() / len(values)
+
+def test_small_sketch_is_exact():
+    """Test that fewer than k values are kept exactly"""
+    values = [30, 10, 20, 20, 40]
+    sketch = KLLSketch().update(values)
+
+    assert len(sketch) == 5
+    assert sketch.rank(20) == 1 and sketch.rank(20, inclusive=True) == 3
+    assert sketch.position(20) == 2
+    assert sketch.percentage(30) == 80
+    assert sketch.quantile([0, 0.5, 1]).tolist() == [10, 20, 40]
+
+def test_rank_error_bound(finish_seconds):
+    """Test that rank errors stay within the documented bound"""
+    sketch = KLLSketch(seed=1).update(finish_seconds)
+
+    assert sketch.n == len(finish_seconds)
+    assert len(sketch) < 3 * sketch.k
+    assert max_rank_error(sketch, finish_seconds) <= KLLSketch.rank_error(sketch.k)
+    assert abs(sketch.quantile(0.5) - np.median(finish_seconds)) < 300
+    assert sketch.quantile(0) == finish_seconds.min() and sketch.quantile(1) == finish_seconds.max()
+
+def test_merge_chunks(finish_seconds):
+    """Test that merged chunk sketches keep the error bound"""
+    chunks = np.array_split(finish_seconds, 23)
+    merged = KLLSketch.merged(KLLSketch(seed=i).update(chunk) for i, chunk in enumerate(chunks))
+
+    assert merged.n == len(finish_seconds)
+    assert merged.min == finish_seconds.min() and merged.max == finish_seconds.max()
+    assert max_rank_error(merged, finish_seconds) <= KLLSketch.rank_error(merged.k)
+
+    with pytest.raises(ValueError):
+        KLLSketch(100).merge(KLLSketch(200))
+
+def test_serialization(finish_seconds):
+    """Test that a sketch survives to_bytes / from_bytes"""
+    sketch = KLLSketch(seed=2).update(finish_seconds)
+    restored = KLLSketch.from_bytes(sketch.to_bytes())
+
+    assert restored.n == sketch.n and restored.k == sketch.k
+    assert restored.summary() == sketch.summary()
+    assert np.array_equal(restored.rank([20000, 25000]), sketch.rank([20000, 25000]))
+    assert KLLSketch.from_bytes(KLLSketch().to_bytes()).n == 0
+
+    with pytest.raises(ValueError):
+        KLLSketch.from_bytes(b'not a sketch')
+    with pytest.raises(ValueError):
+        KLLSketch.from_bytes(sketch.to_bytes()[:-8])
+
+def test_invalid_queries():
+    """Test errors of invalid parameters and queries"""
+    with pytest.raises(ValueError):
+        KLLSketch(k=2)
+    with pytest.raises(ValueError):
+        KLLSketch().quantile(0.5)
+    with pytest.raises(ValueError):
+        KLLSketch().update([1, 2]).quantile(1.5)
+
+def test_sketch_csv(tmp_path):
+    """Test chunked sketching of a race file against the loaded dataset"""
+    path = write_race_csv(tmp_path / 'race.csv', 50_000, seed=3)
+    sketch = sketch_csv(path, chunk_rows=7_000, seed=0)
+    seconds = DataLoader(path).read_data()['seconds'].to_numpy()
+    finishers = seconds[seconds > 0]
+
+    assert sketch.n == len(finishers)
+    assert max_rank_error(sketch, finishers) <= KLLSketch.rank_error(sketch.k)
+
+if __name__ == "__main__":
+    pytest.main([__file__])
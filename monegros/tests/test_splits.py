@@ -0,0 +1,84 @@
+import pytest
+import numpy as np
+import pandas as pd
+from monegros.src.ex1_data import DataLoader
+from monegros.src.ex3_histogram import TimeHistogram
+from monegros.src.splits import SplitAnalyzer, SplitTimes, column_ranks
+
+@pytest.fixture
+def wide():
+    """Three riders over two checkpoints and the finish; dorsal 3 abandons after cp1"""
+    return pd.DataFrame({
+        'dorsal': [1, 2, 3],
+        'biker': ['A', 'B', 'C'],
+        'club': ['X', 'Y', None],
+        'cp1': ['01:00:00', '00:50:00', '01:00:00'],
+        'cp2': ['02:00:00', '02:10:00', None],
+        'time': ['03:00:00', '03:05:00', '00:00:00'],
+    })
+
+@pytest.fixture
+def splits(wide):
+    """Split times of the wide fixture, checkpoints at 20, 45 and 70 km"""
+    return SplitTimes.from_wide(wide, distances=[20, 45, 70])
+
+def test_from_wide(splits):
+    """Test that checkpoints keep file order and missing or DNF splits are NaN"""
+    assert splits.checkpoints == ['cp1', 'cp2', 'finish']
+    expected = [[3600, 7200, 10800], [3000, 7800, 11100], [3600, np.nan, np.nan]]
+    np.testing.assert_array_equal(splits.elapsed, expected)
+    assert splits.riders['biker'].tolist() == ['A', 'B', 'C']
+
+def test_long_layout_matches_wide(splits, tmp_path):
+    """Test that a shuffled long file pivots to the same matrix, ordered by median time"""
+    long = splits.to_long().sample(frac=1, random_state=3)
+    long['time'] = pd.to_datetime(long.pop('seconds'), unit='s').dt.strftime('%H:%M:%S')
+    long['checkpoint'] = long['checkpoint'].astype(str)
+    path = tmp_path / 'splits.csv'
+    long.to_csv(path, sep=';', index=False)
+
+    loaded = DataLoader(path).load_splits()
+    order = np.argsort(loaded.dorsal)
+    assert loaded.checkpoints == splits.checkpoints
+    np.testing.assert_array_equal(loaded.elapsed[order], splits.elapsed)
+
+    with pytest.raises(ValueError):
+        SplitTimes.from_long(long, checkpoints=['cp1', 'cp2'])
+    with pytest.raises(ValueError):
+        DataLoader(path).load_splits('diagonal')
+
+def test_segments(splits):
+    """Test segment durations, paces, segment ranks, positions and gaps"""
+    analyzer = SplitAnalyzer()
+    np.testing.assert_array_equal(analyzer.segment_durations(splits),
+                                  [[3600, 3600, 3600], [3000, 4800, 3300], [3600, np.nan, np.nan]])
+    np.testing.assert_array_equal(analyzer.paces(splits),
+                                  [[180, 144, 144], [150, 192, 132], [180, np.nan, np.nan]])
+    np.testing.assert_array_equal(analyzer.segment_ranks(splits), [[2, 1, 2], [1, 2, 1], [2, 0, 0]])
+    np.testing.assert_array_equal(analyzer.positions(splits), [[2, 1, 1], [1, 2, 2], [2, 0, 0]])
+    np.testing.assert_array_equal(analyzer.gaps(splits), [[600, 0, 0], [0, 600, 300], [600, np.nan, np.nan]])
+
+    with pytest.raises(ValueError):
+        analyzer.paces(SplitTimes(splits.dorsal, splits.checkpoints, splits.elapsed))
+
+def test_column_ranks():
+    """Test the one-pass column ranks against pandas' per-column 'min' ranks"""
+    values = np.random.default_rng(7).integers(0, 60, (500, 9)).astype(float)
+    values[values < 6] = np.nan
+    expected = pd.DataFrame(values).rank(method='min').fillna(0).astype(int).to_numpy()
+    np.testing.assert_array_equal(column_ranks(values), expected)
+
+def test_checkpoint_histograms(splits):
+    """Test that every checkpoint column holds the TimeHistogram counts of its times"""
+    histograms = SplitAnalyzer().checkpoint_histograms(splits, bin_minutes=30)
+    assert histograms.columns.tolist() == ['time_grouped', 'cp1', 'cp2', 'finish']
+    assert histograms['cp1'].sum() == 3 and histograms['finish'].sum() == 2
+
+    recorded = ~np.isnan(splits.elapsed[:, 0])
+    times = pd.DataFrame({'seconds': splits.elapsed[recorded, 0].astype(np.int64)})
+    expected = TimeHistogram().time_frequencies(times, bin_minutes=30)
+    counts = histograms.set_index('time_grouped')['cp1']
+    assert counts[counts > 0].to_dict() == dict(zip(expected['time_grouped'], expected['count']))
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,50 @@
+import subprocess
+import sys
+import pytest
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent.parent.parent
+# Cumulative import time allowed for main.py, in microseconds
+STARTUP_BUDGET_US = 200_000
+
+def import_times(*args):
+    """
+    Runs python -X importtime and parses its report.
+
+    Returns:
+        dict: Cumulative import time in microseconds by module name
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', *args], cwd=ROOT_DIR,
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+def test_startup_budget():
+    """Test that importing main.py stays light"""
+    times = import_times('-c', 'import main')
+
+    assert times['main'] < STARTUP_BUDGET_US
+    assert not {'pandas', 'faker', 'matplotlib'} & set(times)
+
+def test_exercise_1_imports():
+    """Test that exercise 1 does not import faker or matplotlib"""
+    times = import_times('main.py', '--exercise', '1', '--no-cache', '--log-level', 'ERROR')
+
+    assert 'pandas' in times
+    assert 'faker' not in times
+    assert 'matplotlib' not in times
+
+def test_exercise_2_imports():
+    """Test that exercise 2 imports faker but not matplotlib"""
+    times = import_times('main.py', '--exercise', '2', '--no-cache', '--log-level', 'ERROR')
+
+    assert 'faker' in times
+    assert 'matplotlib' not in times
+
+if __name__ == "__main__":
+    pytest.main([__file__])
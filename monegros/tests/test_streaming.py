@@ -0,0 +1,117 @@
+import json
+import pytest
+import pandas as pd
+from monegros.src.ex1_data import DataLoader
+from monegros.src.ex3_histogram import TimeHistogram
+from monegros.src.ex4_clubs import ClubAnalyzer
+from monegros.src.ranking import RankIndex
+from monegros.src.streaming import FenwickTree, LiveRace, tail_records, follow_race
+
+@pytest.fixture
+def dataset():
+    """The dataset without non-finishers"""
+    df = DataLoader().read_data()
+    return df[df['seconds'] > 0]
+
+def test_fenwick_tree():
+    """Test counts below a value"""
+    tree = FenwickTree(100)
+    for value in [5, 5, 10, 99, 0]:
+        tree.add(value)
+
+    assert tree.total == 5
+    assert [tree.count_below(v) for v in [0, 1, 5, 6, 11, 100]] == [0, 1, 1, 3, 4, 5]
+
+def test_live_race_matches_batch(dataset):
+    """Test that incremental results match the batch analyzers"""
+    race = LiveRace()
+    race.add_many(DataLoader().read_data().astype({'club': object}).to_dict('records'))
+    snapshot = race.snapshot(top_clubs=5)
+
+    assert snapshot['finishers'] == len(dataset)
+    pd.testing.assert_frame_equal(snapshot['histogram'], TimeHistogram().time_frequencies(dataset))
+
+    expected_clubs = ClubAnalyzer().clean_clubs(dataset['club']).value_counts().head(5)
+    assert snapshot['clubs']['participants'].tolist() == expected_clubs.tolist()
+
+    index = RankIndex.from_frame(dataset)
+    for dorsal in dataset['dorsal'].head(50):
+        assert race.dorsal_position(dorsal) == index.dorsal_position(dorsal)
+
+def test_live_race_rejects_bad_records():
+    """Test that bad records are counted instead of raised"""
+    race = LiveRace()
+    race.add({'dorsal': 1, 'club': 'C.C. Huesca', 'time': '05:00:00'})
+    race.add({'dorsal': 1, 'club': 'C.C. Huesca', 'time': '05:10:00'})
+    race.add({'dorsal': 2, 'club': '', 'time': 'xx'})
+    race.add({'dorsal': 3, 'club': '', 'time': '00:00:00'})
+
+    snapshot = race.snapshot()
+    assert (snapshot['finishers'], snapshot['rejected'], snapshot['non_finishers']) == (1, 2, 1)
+    assert snapshot['clubs'].iloc[0].tolist() == ['HUESCA', 1, 1]
+
+def test_live_race_dnf_then_finish():
+    """Test that a finish record replaces an earlier DNF of the same dorsal"""
+    race = LiveRace()
+    race.add({'dorsal': 1, 'club': 'UCSC', 'time': '00:00:00'})
+    race.add({'dorsal': 1, 'club': 'UCSC', 'time': '00:00:00'})
+    assert race.non_finishers == 1
+
+    assert race.add({'dorsal': 1, 'club': 'UCSC', 'time': '05:00:00'})
+    assert (race.finishers, race.non_finishers, race.rejected) == (1, 0, 0)
+    assert not race.add({'dorsal': 1, 'club': 'UCSC', 'time': '00:00:00'})
+    assert (race.finishers, race.non_finishers, race.rejected) == (1, 0, 1)
+
+def test_tail_records_partial_line(tmp_path):
+    """Test that a partially written line waits for its newline"""
+    path = tmp_path / 'live.csv'
+    path.write_text('dorsal;biker;club;time\n1;A;Club X;05:00:00\n2;B;Club Y;05:')
+
+    assert [r['dorsal'] for r in tail_records(path, follow=False)] == ['1']
+
+    calls = []
+    def stop():
+        # Complete the line on the first poll, stop on the second
+        if not calls:
+            with open(path, 'a') as f:
+                f.write('30:00\n')
+        calls.append(True)
+        return len(calls) > 1
+
+    records = list(tail_records(path, poll_interval=0, stop=stop))
+    assert [r['time'] for r in records] == ['05:00:00', '05:30:00']
+
+def test_tail_records_split_multibyte(tmp_path):
+    """Test that a UTF-8 character split across two writes is decoded once complete"""
+    path = tmp_path / 'live.csv'
+    line = '1;José;Club X;05:00:00\n'.encode('utf-8')
+    cut = line.index('é'.encode('utf-8')) + 1
+    path.write_bytes(b'dorsal;biker;club;time\n' + line[:cut])
+
+    calls = []
+    def stop():
+        # Write the rest of the character on the first poll, stop on the second
+        if not calls:
+            with open(path, 'ab') as f:
+                f.write(line[cut:])
+        calls.append(True)
+        return len(calls) > 1
+
+    records = list(tail_records(path, poll_interval=0, stop=stop))
+    assert [r['biker'] for r in records] == ['José']
+
+def test_follow_race_jsonl(tmp_path):
+    """Test following a JSON lines file with snapshots"""
+    path = tmp_path / 'live.jsonl'
+    records = [{'dorsal': i, 'club': 'UCSC', 'time': f'0{i}:00:00'} for i in range(3, 6)]
+    path.write_text(''.join(json.dumps(record) + '\n' for record in records))
+
+    snapshots = []
+    race = follow_race(path, follow=False, snapshot_interval=0, on_snapshot=snapshots.append)
+
+    assert race.finishers == 3
+    assert race.dorsal_position(5) == 3
+    assert snapshots[-1]['clubs']['club'].tolist() == ['UCSC']
+
+if __name__ == "__main__":
+    pytest.main([__file__])
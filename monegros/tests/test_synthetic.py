@@ -0,0 +1,39 @@
+import pytest
+import numpy as np
+import pandas as pd
+from monegros.src.ex1_data import DataLoader
+from monegros.src.ex4_clubs import ClubAnalyzer
+from monegros.src.synthetic import generate_race, write_race_csv
+
+def test_generate_race():
+    """Test the layout and the share of non-finishers"""
+    df = generate_race(20000, seed=1, dnf_share=0.05)
+
+    assert list(df.columns) == ['dorsal', 'biker', 'club', 'time']
+    assert df['dorsal'].is_unique
+    assert (df['time'] == '00:00:00').mean() == pytest.approx(0.05, abs=0.01)
+
+def test_generate_race_reproducible():
+    """Test that the same seed gives the same data"""
+    pd.testing.assert_frame_equal(generate_race(1000, seed=3), generate_race(1000, seed=3))
+    assert not generate_race(1000, seed=3).equals(generate_race(1000, seed=4))
+
+def test_generate_race_club_variants():
+    """Test that club spelling variants collapse when cleaned"""
+    df = generate_race(20000, seed=2)
+    cleaned = ClubAnalyzer().clean_clubs(df['club'])
+
+    assert cleaned.nunique() < df['club'].nunique() / 10
+    assert 'UCSC' in set(cleaned)
+
+def test_write_race_csv(tmp_path):
+    """Test that chunked files load with DataLoader"""
+    path = write_race_csv(tmp_path / 'race.csv', 2500, seed=0, chunk_rows=1000)
+    df = DataLoader(path).read_data()
+
+    assert len(df) == 2500
+    assert df['dorsal'].is_unique
+    assert np.all(df['seconds'] < 16 * 3600)
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,119 @@
+import pytest
+import numpy as np
+import pandas as pd
+from monegros.src.ex1_data import DataLoader
+from monegros.src.validation import DataValidator
+from monegros.src.synthetic import generate_race
+
+ROWS = [
+    'dorsal;biker;club;time',
+    '1;Ana;C.C. Huesca;05:00:00',
+    '2;Luis;;06:10:00',
+    '3;Eva;Club Fraga;6:10',
+    '2;Pau;UCSC;07:00:00',
+    'x;Iker;UCSC;04:00:00',
+    '0;Marta;UCSC;04:30:00',
+    '7;Jon;   ;05:30:00',
+    '8;Sara;UCSC;50:00:00',
+    '9;Noa;UCSC;',
+    '10;Leo;UCSC;00:00:00',
+]
+
+@pytest.fixture
+def dirty_csv(tmp_path):
+    """Race CSV with one problem per row after the second"""
+    path = tmp_path / 'dirty.csv'
+    path.write_text('\n'.join(ROWS) + '\n')
+    return path
+
+def test_report_lists_every_problem(dirty_csv):
+    """Test that all offending rows are reported, by check"""
+    df = pd.read_csv(dirty_csv, sep=';', dtype=str)
+    report = DataValidator().validate(df)
+
+    assert not report.ok
+    assert {check: rows.tolist() for check, rows in report.issues.items()} == {
+        'time_format': [2, 8],
+        'time_range': [7],
+        'dorsal_format': [4],
+        'dorsal_range': [5],
+        'dorsal_duplicate': [3],
+        'club_blank': [6],
+    }
+    assert report.invalid.tolist() == [2, 3, 4, 5, 6, 7, 8]
+    assert report.checks().to_dict()[2] == 'time_format'
+    assert 'time_format: 2 rows (2, 8)' in report.summary()
+
+def test_raise_policy(dirty_csv):
+    """Test that the 'raise' policy reports the whole file at once"""
+    with pytest.raises(ValueError) as error:
+        DataLoader(dirty_csv, validator=DataValidator('raise')).read_data()
+    message = str(error.value)
+    assert '7 of 10 rows are invalid' in message
+    assert 'dorsal_duplicate' in message and 'club_blank' in message
+
+def test_drop_policy(dirty_csv):
+    """Test that the 'drop' policy keeps the valid rows, typed"""
+    loader = DataLoader(dirty_csv, validator=DataValidator('drop'))
+    df = loader.read_data()
+
+    assert df['dorsal'].tolist() == [1, 2, 10]
+    assert df['seconds'].tolist() == [18000, 22200, 0]
+    assert pd.api.types.is_unsigned_integer_dtype(df['dorsal'])
+    assert isinstance(df['club'].dtype, pd.CategoricalDtype)
+    assert loader.validation_report.counts()['time_format'] == 2
+    assert not loader.quarantine_path.exists()
+
+def test_quarantine_policy(dirty_csv):
+    """Test that quarantined rows are written with their failed checks"""
+    loader = DataLoader(dirty_csv, validator=DataValidator('quarantine'))
+    df = loader.read_data()
+    quarantined = pd.read_csv(loader.quarantine_path, sep=';', dtype=str)
+
+    assert len(df) == 3
+    assert quarantined['row'].astype(int).tolist() == [2, 3, 4, 5, 6, 7, 8]
+    assert quarantined['biker'].tolist() == ['Eva', 'Pau', 'Iker', 'Marta', 'Jon', 'Sara', 'Noa']
+    assert quarantined['checks'].tolist()[0] == 'time_format'
+
+def test_cache_depends_on_policy(dirty_csv):
+    """Test that a cache written with one policy is not used with another"""
+    DataLoader(dirty_csv, use_cache=True, validator=DataValidator('drop')).load_data()
+    with pytest.raises(ValueError):
+        DataLoader(dirty_csv, use_cache=True, validator=DataValidator('raise')).load_data()
+    cached = DataLoader(dirty_csv, use_cache=True, validator=DataValidator('drop')).load_data()
+    assert len(cached) == 3
+
+def test_cache_keeps_report(dirty_csv):
+    """Test that a warm cache load restores the report and rewrites a missing quarantine file"""
+    cold = DataLoader(dirty_csv, use_cache=True, validator=DataValidator('quarantine'))
+    cold.load_data()
+    warm = DataLoader(dirty_csv, use_cache=True, validator=DataValidator('quarantine'))
+    assert len(warm.load_data()) == 3
+    assert warm.validation_report.counts() == cold.validation_report.counts()
+    np.testing.assert_array_equal(warm.validation_report.invalid, cold.validation_report.invalid)
+
+    warm.quarantine_path.unlink()
+    again = DataLoader(dirty_csv, use_cache=True, validator=DataValidator('quarantine'))
+    again.load_data()
+    assert again.quarantine_path.exists()
+
+def test_valid_dataset_unchanged():
+    """Test that the package dataset passes and loads as without validation"""
+    loader = DataLoader(validator=DataValidator())
+    validated = loader.read_data()
+
+    assert loader.validation_report.ok
+    pd.testing.assert_frame_equal(validated, DataLoader().read_data())
+
+def test_large_file_is_vectorized():
+    """Test a large synthetic race with a few corrupted rows"""
+    df = generate_race(200_000, seed=3).astype({'dorsal': str})
+    bad = np.array([10, 5_000, 150_000])
+    df.loc[bad, 'time'] = '1:2:3'
+    report = DataValidator().validate(df)
+
+    assert report.issues['time_format'].tolist() == bad.tolist()
+    assert report.invalid.tolist() == bad.tolist()
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -1,33 +1,355 @@
+from contextlib import contextmanager
 from datetime import datetime
+from functools import wraps
+from pathlib import Path
+import atexit
+import cProfile
+import json
+import queue
 import sys
+import threading
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+def _max_rss_mb():
+    """Peak resident set size of the process in MB, None if unavailable"""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return rss / 1024 ** 2 if sys.platform == 'darwin' else rss / 1024
+
+def _rows(value):
+    """Number of rows of a dataframe, or of the first dataframe of a tuple"""
+    if isinstance(value, tuple):
+        value = next((item for item in value if hasattr(item, 'shape')), None)
+    return len(value) if hasattr(value, 'shape') else None
+
+class Metrics:
+    def __init__(self):
+        self.records = []
+        self.trace_memory = False
+        self.profile_dir = None
+        self._lock = threading.Lock()
+        # Open spans measuring memory; tracemalloc is started by the first
+        # one and stopped by the last one
+        self._tracing_spans = 0
+        self._owns_tracing = False
+        # Profiled calls by stage, to number the dumps of repeated stages
+        self._profile_calls = {}
+
+    def configure(self, trace_memory=None, profile_dir=None):
+        """
+        Configures what the spans measure.
+
+        Args:
+            trace_memory (bool): Measure the peak Python/NumPy memory of every
+                span with tracemalloc (slows down Python-level code)
+            profile_dir (str): Directory where a cProfile dump per span is
+                written ('<stage>.prof', then '<stage>.2.prof'... for repeated stages)
+        """
+        if trace_memory is not None:
+            self.trace_memory = trace_memory
+        if profile_dir is not None:
+            self.profile_dir = Path(profile_dir)
+            self.profile_dir.mkdir(parents=True, exist_ok=True)
+
+    def reset(self):
+        """Drops the recorded spans"""
+        with self._lock:
+            self.records = []
+
+    @contextmanager
+    def span(self, stage, rows_in=None):
+        """
+        Measures a block of code.
+
+        Records wall time, CPU time, rows in/out and peak memory. Set
+        record['rows_out'] inside the block to report the output size.
+
+        CPU time is that of the calling thread (time.thread_time), so
+        concurrent stages do not count each other's work, but work done in
+        other threads or processes started by the stage is not included.
+        tracemalloc has a single process-wide peak: it is reset when the
+        first open span starts, so with nested or concurrent spans (e.g.
+        --stage-workers) each peak covers everything traced since the
+        outermost open span started.
+
+        Args:
+            stage (str): Name of the measured stage
+            rows_in (int): Number of input rows
+
+        Yields:
+            dict: The record being filled
+        """
+        record = {'stage': stage, 'rows_in': rows_in, 'rows_out': None}
+        traced = self.trace_memory
+        if traced:
+            with self._lock:
+                if self._tracing_spans == 0:
+                    if tracemalloc.is_tracing():
+                        # reset_peak is new in Python 3.9; before, the peak is not reset
+                        if hasattr(tracemalloc, 'reset_peak'):
+                            tracemalloc.reset_peak()
+                    else:
+                        tracemalloc.start()
+                        self._owns_tracing = True
+                self._tracing_spans += 1
+        profiler = cProfile.Profile() if self.profile_dir is not None else None
+        if profiler is not None:
+            try:
+                profiler.enable()
+            except ValueError:
+                # Another span is already profiling (concurrent stages)
+                profiler = None
+
+        wall_start, cpu_start = time.perf_counter(), time.thread_time()
+        try:
+            yield record
+        finally:
+            record['wall_s'] = time.perf_counter() - wall_start
+            record['cpu_s'] = time.thread_time() - cpu_start
+            if profiler is not None:
+                profiler.disable()
+                with self._lock:
+                    calls = self._profile_calls[stage] = self._profile_calls.get(stage, 0) + 1
+                name = f"{stage}.prof" if calls == 1 else f"{stage}.{calls}.prof"
+                profiler.dump_stats(self.profile_dir / name)
+            if traced:
+                with self._lock:
+                    record['peak_mb'] = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+                    self._tracing_spans -= 1
+                    if self._tracing_spans == 0 and self._owns_tracing:
+                        tracemalloc.stop()
+                        self._owns_tracing = False
+            record['max_rss_mb'] = _max_rss_mb()
+            with self._lock:
+                self.records.append(record)
+
+    def timed(self, func):
+        """
+        Decorator recording a span for every call of an analyzer method.
+
+        The span is named 'Class.method'; rows in/out are taken from the
+        first dataframe argument and from the returned dataframe.
+        """
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            stage = func.__qualname__
+            rows_in = next((_rows(arg) for arg in args if hasattr(arg, 'shape')), None)
+            with self.span(stage, rows_in) as record:
+                result = func(*args, **kwargs)
+                record['rows_out'] = _rows(result)
+            return result
+        return wrapper
+
+    def to_json_lines(self):
+        """Returns the records as JSON lines"""
+        return ''.join(json.dumps(record) + '\n' for record in self.records)
+
+    def write_json_lines(self, path):
+        """Writes the records as JSON lines to path"""
+        Path(path).write_text(self.to_json_lines())
+
+    def summary(self):
+        """
+        Returns the records as a text table.
+
+        'cpu s' is the CPU time of the thread that ran the stage; 'peak MB'
+        is process-wide, so overlapping stages share their peaks.
+        """
+        lines = [f"{'stage':<40} {'wall s':>8} {'cpu s':>8} {'rows in':>9} {'rows out':>9} {'peak MB':>8}"]
+        for record in self.records:
+            rows_in = '-' if record['rows_in'] is None else record['rows_in']
+            rows_out = '-' if record['rows_out'] is None else record['rows_out']
+            peak = f"{record['peak_mb']:.1f}" if 'peak_mb' in record else '-'
+            lines.append(f"{record['stage']:<40} {record['wall_s']:>8.3f} {record['cpu_s']:>8.3f} "
+                         f"{rows_in:>9} {rows_out:>9} {peak:>8}")
+        return '\n'.join(lines)
+
+# Process-wide recorder used by the analyzers
+metrics = Metrics()
+
+def timed(func):
+    """Records a metrics span for every call of func"""
+    return metrics.timed(func)
+
+LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
+
+def _level_value(level):
+    """
+    Numeric value of a level name.
+
+    Raises:
+        ValueError: If the level is unknown
+    """
+    value = LEVELS.get(level)
+    if value is None:
+        raise ValueError(f"Unknown log level '{level}'. Expected one of {list(LEVELS)}")
+    return value
+
+class StreamHandler:
+    """Writes log lines synchronously to stdout, or stderr for errors"""
+
+    def emit(self, text, error=False):
+        stream = sys.stderr if error else sys.stdout
+        stream.write(text + "\n")
+
+    def flush(self):
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+    def close(self):
+        self.flush()
+
+class QueueHandler(StreamHandler):
+    """Queues log lines and writes them from a background thread"""
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._write, name="LoggerWriter", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def emit(self, text, error=False):
+        if self.thread.is_alive():
+            self.queue.put((text, error))
+        else:
+            # Forked worker processes do not inherit the writer thread
+            super().emit(text, error)
+
+    def _write(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                super().emit(*item)
+            finally:
+                self.queue.task_done()
+
+    def flush(self):
+        """Blocks until every queued line has been written"""
+        if self.thread.is_alive():
+            self.queue.join()
+        super().flush()
+
+    def close(self):
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+        super().flush()
 
 class Logger:
+    # Shared by every logger: threshold level and output handler
+    level = LEVELS["INFO"]
+    handler = StreamHandler()
+    _timestamp_second = None
+    _timestamp = None
+
     def __init__(self, name="MonegrosLogger"):
         self.name = name
 
-    def log(self, message, level="INFO"):
+    @classmethod
+    def configure(cls, level=None, buffered=None):
+        """
+        Configures all loggers.
+
+        Args:
+            level (str): Minimum level written (DEBUG, INFO, WARNING, ERROR)
+            buffered (bool): Write from a background thread through a queue
+                instead of synchronously
+        """
+        if level is not None:
+            cls.level = _level_value(level)
+        if buffered is not None and buffered != isinstance(cls.handler, QueueHandler):
+            cls.handler.close()
+            cls.handler = QueueHandler() if buffered else StreamHandler()
+
+    @classmethod
+    def flush(cls):
+        """Waits until every pending log line has been written"""
+        cls.handler.flush()
+
+    @classmethod
+    def _now(cls):
+        """Formatted timestamp, only rebuilt once per second"""
+        second = int(time.time())
+        if second != cls._timestamp_second:
+            cls._timestamp = datetime.fromtimestamp(second).strftime("%Y-%m-%d %H:%M:%S")
+            cls._timestamp_second = second
+        return cls._timestamp
+
+    def is_enabled(self, level):
+        """Returns whether messages of level are written"""
+        return _level_value(level) >= Logger.level
+
+    def log(self, message, level="INFO", *args):
         """
         Logs a message with timestamp and level.
+
+        Nothing is formatted when the level is disabled: args are only
+        applied with '%' and callables only called for enabled levels.
         
         Args:
-            message (str): Message to log
-            level (str): Log level (INFO, WARNING, ERROR)
+            message (str or callable): Message to log, or function returning it
+            level (str): Log level (DEBUG, INFO, WARNING, ERROR)
+            *args: Values for '%' placeholders in message
+
+        Raises:
+            ValueError: If the level is unknown
         """
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        log_message = f"[{timestamp}] {level} - {self.name}: {message}"
-        print(log_message, file=sys.stdout if level != "ERROR" else sys.stderr)
+        if _level_value(level) < Logger.level:
+            return
+        if callable(message):
+            message = message()
+        if args:
+            message = message % args
+        log_message = f"[{self._now()}] {level} - {self.name}: {message}"
+        Logger.handler.emit(log_message, error=(level == "ERROR"))
 
-    def info(self, message):
+    def preview(self, content, level="INFO"):
+        """
+        Writes a dataframe preview or other output as is, without prefix.
+
+        Args:
+            content (object or callable): What to write, or a function
+                returning it (e.g. df.head), only rendered if level is enabled
+            level (str): Log level of the preview
+
+        Raises:
+            ValueError: If the level is unknown
+        """
+        if _level_value(level) < Logger.level:
+            return
+        if callable(content):
+            content = content()
+        Logger.handler.emit(str(content), error=False)
+
+    def debug(self, message, *args):
+        """Logs a debug message"""
+        self.log(message, "DEBUG", *args)
+
+    def info(self, message, *args):
         """Logs an info message"""
-        self.log(message, "INFO")
+        self.log(message, "INFO", *args)
 
-    def warning(self, message):
+    def warning(self, message, *args):
         """Logs a warning message"""
-        self.log(message, "WARNING")
+        self.log(message, "WARNING", *args)
 
-    def error(self, message):
+    def error(self, message, *args):
         """Logs an error message"""
-        self.log(message, "ERROR")
+        self.log(message, "ERROR", *args)
+
+    def span(self, stage, rows_in=None):
+        """Measures a block of code as '<logger name>.<stage>'"""
+        return metrics.span(f"{self.name}.{stage}", rows_in)
 
 if __name__ == "__main__":
     # Example usage
@@ -0,0 +1,151 @@
+import re
+import numpy as np
+import pandas as pd
+
+TIME_REGEX = re.compile(r'^(\d{2,}):([0-5]\d):([0-5]\d)$')
+
+# Finish time, in seconds, of riders who did not finish ('00:00:00' in the
+# source files). Every stage tests this sentinel instead of the string.
+DNF_SECONDS = 0
+
+# Offsets of the characters of a fixed-width 'HH:MM:SS' string
+_DIGITS = [0, 1, 3, 4, 6, 7]
+_COLONS = [2, 5]
+
+
+def parse_seconds(times):
+    """
+    Parses 'HH:MM:SS' strings into integer seconds for a whole column at once.
+
+    Hours are not limited to 23, so finish times over 24h are accepted.
+    Non-finishers ('00:00:00') get DNF_SECONDS.
+
+    Args:
+        times (pd.Series or array-like): Times in format 'HH:MM:SS'
+
+    Returns:
+        np.ndarray: Seconds as uint32, one per input value
+
+    Raises:
+        ValueError: If any value is not a valid 'HH:MM:SS' time
+    """
+    times = pd.Series(times, copy=False)
+    if times.empty:
+        return np.zeros(0, dtype=np.uint32)
+
+    try:
+        fixed_width = bool((times.str.len() == 8).all())
+    except AttributeError:
+        fixed_width = False
+    if fixed_width:
+        # Fast path: fixed width strings, read the code points as integers
+        chars = times.to_numpy(dtype='U8').view(np.uint32).reshape(-1, 8) - ord('0')
+        digits = chars[:, _DIGITS]
+        valid = ((digits <= 9).all(axis=1)
+                 & (chars[:, _COLONS] == ord(':') - ord('0')).all(axis=1)
+                 & (digits[:, 2] <= 5) & (digits[:, 4] <= 5))
+        if valid.all():
+            hours = digits[:, 0] * 10 + digits[:, 1]
+            minutes = digits[:, 2] * 10 + digits[:, 3]
+            seconds = digits[:, 4] * 10 + digits[:, 5]
+            return (hours * 3600 + minutes * 60 + seconds).astype(np.uint32)
+
+    parts = times.astype(object).where(times.notna(), '').astype(str).str.extract(TIME_REGEX)
+    invalid = parts.isna().any(axis=1).to_numpy()
+    if invalid.any():
+        bad = times.index[invalid]
+        raise ValueError(
+            f"Invalid time format in {invalid.sum()} rows "
+            f"(first: {list(bad[:5])}). Expected HH:MM:SS"
+        )
+    parts = parts.astype(np.int64).to_numpy()
+    return (parts[:, 0] * 3600 + parts[:, 1] * 60 + parts[:, 2]).astype(np.uint32)
+
+
+def parse_time(time_str):
+    """
+    Parses one 'HH:MM:SS' string into seconds.
+
+    Args:
+        time_str (str): Time in format 'HH:MM:SS'
+
+    Returns:
+        int: Seconds
+
+    Raises:
+        ValueError: If the value is not a valid 'HH:MM:SS' time
+    """
+    match = TIME_REGEX.match(time_str) if isinstance(time_str, str) else None
+    if match is None:
+        raise ValueError(f"Invalid time format: {time_str}. Expected HH:MM:SS")
+    hours, minutes, seconds = map(int, match.groups())
+    return hours * 3600 + minutes * 60 + seconds
+
+
+def format_hhmm(seconds):
+    """
+    Formats seconds as 'HH:MM' labels.
+
+    Args:
+        seconds (array-like): Seconds to format
+
+    Returns:
+        list: Labels in format 'HH:MM'
+    """
+    return [f"{s // 3600:02d}:{s % 3600 // 60:02d}" for s in np.asarray(seconds, dtype=np.int64).tolist()]
+
+def frame_seconds(df):
+    """
+    Returns the finish times of a dataframe in seconds.
+
+    Uses the 'seconds' column added by DataLoader when present, so times
+    are only parsed once, and parses 'time' otherwise. A RaceTable has its
+    seconds column returned as is.
+
+    Args:
+        df (pd.DataFrame or RaceTable): DataFrame with a 'seconds' or 'time'
+            column, or a RaceTable
+
+    Returns:
+        np.ndarray: Seconds, one per row
+    """
+    if isinstance(getattr(df, 'seconds', None), np.ndarray):
+        return df.seconds
+    if 'seconds' in df.columns:
+        return df['seconds'].to_numpy()
+    return parse_seconds(df['time'])
+
+
+def is_finisher(seconds):
+    """
+    Mask of the finish times that are not the DNF sentinel.
+
+    Args:
+        seconds (array-like): Finish times in seconds
+
+    Returns:
+        np.ndarray: True for riders who finished
+    """
+    return np.asarray(seconds) != DNF_SECONDS
+
+
+def seconds_to_strings(seconds):
+    """
+    Formats seconds as 'HH:MM:SS' strings for a whole column at once.
+
+    Hours are capped at 99 so every string has the same width.
+
+    Args:
+        seconds (array-like): Seconds to format
+
+    Returns:
+        np.ndarray: Fixed width unicode array of 'HH:MM:SS' strings
+    """
+    seconds = np.minimum(np.asarray(seconds, dtype=np.int64), 99 * 3600 + 59 * 60 + 59)
+    hours, rest = np.divmod(seconds, 3600)
+    minutes, secs = np.divmod(rest, 60)
+    chars = np.full((len(seconds), 8), ord(':'), dtype=np.uint32)
+    for offset, value in zip((0, 3, 6), (hours, minutes, secs)):
+        chars[:, offset] = value // 10 + ord('0')
+        chars[:, offset + 1] = value % 10 + ord('0')
+    return chars.view('U8').ravel()